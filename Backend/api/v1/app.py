@@ -3,11 +3,13 @@
     This module is the entry point for the TimeWise API. It initializes and configures
     the Flask application, sets up the database, and registers app_views.
 """
-from flask import Flask, jsonify
+import click
+from flask import Flask, Response, jsonify, request
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_mail import Mail
 from sqlalchemy import text
+from sqlalchemy.orm import defer
 from api.v1.config import config_dict
 from api.v1.views.auth import auth_bp
 from api.v1.views.tasks import task_bp
@@ -15,38 +17,133 @@ from api.v1.views.progress import progress_bp
 from api.v1.views.users import admin_bp
 from api.v1.views.analytics import analytics_bp
 from models.base_model import db
+from models.user import User
+from models.session import init_replica, route_reads_to_replica
 from os import getenv
+import uuid
 from dotenv import load_dotenv
 from flask_jwt_extended import JWTManager
+from flask_jwt_extended.exceptions import RevokedTokenError
 from utils.logging_utils import setup_logging
-
-# API documentation - Swagger UI
-from flasgger import Swagger
+from utils.json_provider import FastJSONProvider
+from utils.swagger import init_api_docs
+from utils.password_hashing import PasswordHashingBusy, init_password_hasher
+from utils.email_outbox import init_email_outbox
+from utils.db_pool import build_engine_options, instrument_engine, pool_status
+from utils.decorators import admin_required
+from utils.metrics import init_metrics, render_prometheus
+from utils.profiling import init_profiling
+from utils.query_counter import init_query_checks
+from utils.slow_query_log import init_slow_query_log
 
 load_dotenv()
 
 
 def create_app(config_name="development"):
     """Initialize the Flask app."""
-    # Setup logging
-    setup_logging(log_file="logs/app.log")
-
     app = Flask(__name__)
     app.config.from_object(config_dict[config_name])
 
+    # Setup logging
+    setup_logging(
+        log_file=app.config.get('LOG_FILE', 'logs/app.log'),
+        level=app.config.get('LOG_LEVEL', 'INFO'),
+        json_lines=app.config.get('LOG_JSON', False),
+        levels=app.config.get('LOG_LEVELS'),
+        sampling=app.config.get('LOG_SAMPLING'),
+        max_bytes=app.config.get('LOG_MAX_BYTES', 5 * 1024 * 1024),
+        backup_count=app.config.get('LOG_BACKUP_COUNT', 3),
+        queue_size=app.config.get('LOG_QUEUE_SIZE', 10000)
+    )
+
+    # Encode responses with orjson when available, else the stdlib
+    app.json = FastJSONProvider(app)
+    if not app.config.get('JSON_USE_ORJSON', True):
+        app.json.use_orjson = False
+
     # Enable CORS
     CORS(app)
 
     # Initialize database
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', build_engine_options(app.config))
     db.init_app(app)
+    engines = []
+    replica_uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+    if replica_uri:
+        replica_options = build_engine_options({**app.config, 'SQLALCHEMY_DATABASE_URI': replica_uri})
+        engines.append(init_replica(app, replica_uri, **replica_options))
     with app.app_context():
-        db.create_all()  # Create tables
+        engines.append(db.engine)
+    for engine in engines:
+        instrument_engine(engine)
+
+    # Opt-in profiling of single admin requests; registered first so that it
+    # also covers the other request hooks
+    init_profiling(app)
+
+    # Per-request latency, status and SQL metrics, served at /api/v1/metrics
+    if app.config.get('METRICS_ENABLED', True):
+        init_metrics(app, engines)
+
+    # Per-view query budgets and repeated-statement (N+1) warnings, in debug and tests
+    init_query_checks(app, engines)
+
+    # Slow statements with their plans, in their own log file
+    init_slow_query_log(app, engines)
+
+    # The schema is managed by the migrations in migrations/ (`flask db upgrade`).
+    # Flask-Migrate pulls in alembic (~150 ms of imports), so it is only loaded
+    # when the app is created by the flask CLI, not by API workers.
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    if replica_uri:
+        @app.before_request
+        def choose_read_bind():
+            """Serve safe read-only routes from the replica."""
+            view = app.view_functions.get(request.endpoint)
+            read_only = request.method in ('GET', 'HEAD') and not getattr(view, 'use_primary', False)
+            route_reads_to_replica(db.session, read_only)
+
+        @app.teardown_request
+        def reset_read_bind(_error):
+            route_reads_to_replica(db.session, False)
 
     # Initialize JWTManager
     jwt = JWTManager(app)
 
-    # Initialize Flask-Mail
-    mail = Mail(app)
+    @jwt.user_lookup_loader
+    def load_current_user(_jwt_header, jwt_data):
+        """
+            Load the authenticated user once per request. Views and decorators
+            read it through flask_jwt_extended.current_user; repeated lookups
+            in the same request are served from the session identity map.
+            Tokens issued before the user's last role change are revoked here,
+            so checking the role claim costs no extra query.
+        """
+        try:
+            user_id = uuid.UUID(str(jwt_data[app.config.get('JWT_IDENTITY_CLAIM', 'sub')]))
+        except ValueError:
+            return None
+        user = db.session.get(User, user_id, options=[defer(User.password_hash)])
+        token_version = jwt_data.get('role_version')
+        if user is not None and token_version is not None and token_version != user.role_version:
+            raise RevokedTokenError(_jwt_header, jwt_data)
+        return user
+
+    @jwt.user_lookup_error_loader
+    def current_user_not_found(_jwt_header, jwt_data):
+        """Return a 404 when the token's user no longer exists."""
+        return jsonify({'error': 'User not found'}), 404
+
+    # Hash and verify passwords on a bounded pool
+    init_password_hasher(app)
+
+    # Initialize Flask-Mail and the background sender of the email outbox.
+    # CLI commands (e.g. `flask db upgrade`) do not start the sender thread.
+    Mail(app)
+    init_email_outbox(app, start=False if click.get_current_context(silent=True) is not None else None)
 
     # Initialize Swagger UI
     template = {
@@ -72,7 +169,7 @@ def create_app(config_name="development"):
         'title': "Timewise API",
         'uiversion': 3
     }
-    swagger = Swagger(app, template=template)
+    init_api_docs(app, template)
 
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix="/api/v1/auth")
@@ -97,6 +194,20 @@ def create_app(config_name="development"):
             database=database_status
         )
 
+    @app.route('/api/v1/health/pool', methods=["GET"])
+    def pool_health():
+        """Report the connection pool of this worker process."""
+        return jsonify(pool_status(db.engine))
+
+    @app.route('/api/v1/metrics', methods=["GET"])
+    @admin_required
+    def metrics():
+        """Serve the request and SQL metrics of all workers in the Prometheus text format."""
+        exporter = app.extensions.get('metrics')
+        if exporter is None:
+            return jsonify({'error': 'Metrics are disabled'}), 404
+        return Response(render_prometheus(exporter.collect()), mimetype='text/plain; version=0.0.4')
+
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
@@ -104,6 +215,14 @@ def create_app(config_name="development"):
         app.logger.warning(f"404 Error: {error}")
         return jsonify({'error': 'Not found'}), 404
 
+    @app.errorhandler(PasswordHashingBusy)
+    def password_hashing_busy(error):
+        """Shed login/registration load instead of queueing behind a storm."""
+        app.logger.warning(f"503 Error: {error}")
+        response = jsonify({'error': 'Server is busy, please retry shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
     @app.errorhandler(500)
     def server_error(error):
         """Return a custom 500 error."""
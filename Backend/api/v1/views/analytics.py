@@ -3,15 +3,18 @@
     This Module contains the Analytics API Route
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, current_user
 from models.base_model import db
-from models.user import User
 from datetime import datetime, timedelta
 import uuid
 from models.analytics import Analytics
 from models.task import Task
-import logging 
-from flasgger import swag_from
+from models.user_task_stats import UserTaskStats
+from models.sql_functions import interval_seconds
+from sqlalchemy import case, func
+import logging
+from utils.decorators import query_budget
+from utils.swagger import swag_from
 
 
 analytics_bp = Blueprint('analytics', __name__)
@@ -19,10 +22,11 @@ logger = logging.getLogger(__name__)
 
 @analytics_bp.route('/analytics', methods=['GET'])
 @jwt_required()
+@query_budget(3)  # 2 once the user has a rollup row
 @swag_from({
     'tags': ['Analytics'],
     'summary': 'Get user analytics',
-    'description': 'Retrieve analytics for the current user, including total tasks, completed tasks, and total time spent.',
+    'description': 'Retrieve analytics for the current user, including total tasks, completed tasks, and total time spent. Read from a per-user rollup kept up to date by task and progress writes.',
     'responses': {
         200: {
             'description': 'Analytics data retrieved successfully',
@@ -46,28 +50,30 @@ logger = logging.getLogger(__name__)
 })
 def get_user_analytics():
     """Retrieve analytics for the current user."""
-    user_id = get_jwt_identity()
+    user_id = current_user.id
     logger.info(f"Attempting to retrieve analytics for user {user_id}")
-    user = User.get(id=user_id)
-
-    if not user:
-        logger.warning(f"User {user_id} not found for analytics retrieval.")
-        return jsonify({'error': 'User not found'}), 404
 
     try:
-        # Calculate analytics
-        total_tasks = len(user.tasks)
-        completed_tasks = len([task for task in user.tasks if task.completed])
-        
-        total_time_spent_sum = timedelta()
-        for task in user.tasks:
-            if task.total_time_spent:
-                total_time_spent_sum += task.total_time_spent
+        # One primary-key read of the rollup, whatever the size of the history
+        stats = db.session.execute(
+            db.select(UserTaskStats.total_tasks, UserTaskStats.completed_tasks, UserTaskStats.total_time_spent)
+            .where(UserTaskStats.user_id == user_id)
+        ).first()
+        if stats is not None:
+            total_tasks, completed_tasks, total_time_spent = stats
+        else:
+            # Users inserted outside the ORM have no rollup until it is recomputed
+            total_tasks, completed_tasks, total_seconds = db.session.query(
+                func.count(Task.id),
+                func.count(case((Task.completed.is_(True), 1))),
+                func.coalesce(func.sum(interval_seconds(Task.total_time_spent)), 0)
+            ).filter(Task.user_id == user_id).one()
+            total_time_spent = timedelta(seconds=float(total_seconds))
 
         analytics_data = {
             'total_tasks': total_tasks,
             'completed_tasks': completed_tasks,
-            'total_time_spent': str(total_time_spent_sum) # Use the calculated sum
+            'total_time_spent': str(total_time_spent)
         }
         logger.info(f"Successfully retrieved analytics for user {user_id}")
         return jsonify(analytics_data), 200
@@ -126,13 +132,8 @@ def get_user_analytics():
 })
 def create_user_analytics():
     """Create a new analytics entry for the current user."""
-    user_id = get_jwt_identity()
+    user_id = current_user.id
     logger.info(f"Attempting to create analytics entry for user {user_id}")
-    user = User.get(id=user_id)
-
-    if not user:
-        logger.warning(f"User {user_id} not found for creating analytics.")
-        return jsonify({'error': 'User not found'}), 404
 
     data = request.get_json()
     if not data:
@@ -140,8 +141,13 @@ def create_user_analytics():
         return jsonify({'error': 'Invalid input'}), 400
 
     try:
-        task_id = data.get('task_id')
-        task = Task.get(id=task_id, user_id=user_id) 
+        task_id = uuid.UUID(str(data.get('task_id')))
+    except ValueError:
+        logger.warning(f"Invalid task id received for creating analytics for user {user_id}")
+        return jsonify({'error': 'Invalid input'}), 400
+
+    try:
+        task = Task.get(id=task_id, user_id=user_id)
 
         if not task:
             logger.warning(f"Task {task_id} not found or does not belong to user {user_id}")
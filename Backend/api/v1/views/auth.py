@@ -3,7 +3,7 @@
     This Module contains the authentication API Route
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, decode_token
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, decode_token, current_user
 from models.base_model import db
 from models.user import User
 # from flask import current_app
@@ -14,8 +14,10 @@ from flask_jwt_extended import get_jwt, unset_jwt_cookies
 from werkzeug.security import generate_password_hash
 from datetime import datetime
 from utils.email_utils import send_email
+from utils.password_hashing import PasswordHashingBusy
 import logging
-from flasgger import swag_from
+from utils.decorators import query_budget
+from utils.swagger import swag_from
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -102,7 +104,7 @@ def register():
         user.save()
         
         # Generate access token
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=user.id, additional_claims=user.token_claims())
 
         logging.info(f"User registered successfully: {user.email}")
         return jsonify({
@@ -182,9 +184,18 @@ def login():
     if not user or not user.check_password(data['password']):
         return jsonify({'error': 'Invalid credentials'}), 401
 
+    # Upgrade hashes made under an older hashing policy. Best effort: when the
+    # hashing pool is busy the login still succeeds and the next one retries.
+    try:
+        if user.rehash_password_if_needed(data['password']):
+            user.save()
+            logging.info(f"Password hash upgraded for user: {user.email}")
+    except PasswordHashingBusy:
+        logging.warning(f"Password hash upgrade skipped, hashing pool busy: {user.email}")
+
     try:
         # Generate access token
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=user.id, additional_claims=user.token_claims())
         
         logging.info(f"User logged in: {user.email}")
         return jsonify({
@@ -198,39 +209,19 @@ def login():
 
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
+@query_budget(1)
 def get_profile():
     """Get the user's profile information."""
-    user_id = get_jwt_identity()
-
-    try:
-        # convert user_id to UUID
-        user_id = uuid.UUID(user_id)
-    except ValueError:
-        return jsonify({'error': 'Invalid user ID format'}), 400
+    user = current_user
 
-    user = db.session.get(User, user_id)
-    
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
-    
     return jsonify(user.to_json()), 200
 
 @auth_bp.route('/profile', methods=['PUT'])
 @jwt_required()
 def update_profile():
     """Update the user's profile information."""
-    user_id = get_jwt_identity()
-    
-    try:
-        user_id = uuid.UUID(user_id)
-    except ValueError:
-        return jsonify({'error': 'Invalid user ID format'}), 400
+    user = current_user
 
-    user = db.session.get(User, user_id)
-    
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
-    
     data = request.get_json()
     
     # Update user fields
@@ -269,17 +260,8 @@ def logout_status():
 @jwt_required()
 def delete_account():
     """Delete the user's account."""
-    user_id = get_jwt_identity()
+    user = current_user
 
-    try:
-        user_id = uuid.UUID(user_id)
-    except ValueError:
-        return jsonify({'error': 'Invalid user ID format'}), 400
-    user = db.session.get(User, user_id)
-    
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
-    
     # Delete user from database
     user.delete()
     
@@ -357,11 +339,7 @@ def password_reset():
 @jwt_required()
 def email_verification_request():
     """Request an email verification token."""
-    user_id = get_jwt_identity()
-    user = User.get(id=user_id)
-
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user
 
     if user.email_verified:
         return jsonify({'message': 'Email is already verified'}), 200
@@ -369,10 +347,10 @@ def email_verification_request():
     # Generate an email verification token (valid for 1 hour)
     verification_token = create_access_token(
         identity=user.id,
-        expires_delta=datetime.timedelta(hours=1)
+        expires_delta=timedelta(hours=1)
     )
 
-    # Send the verification token via email
+    # Queue the verification token email; it is delivered in the background
     send_email(
         subject="Email Verification",
         recipients=[user.email],
@@ -418,25 +396,19 @@ def refresh():
     current_user_id = get_jwt_identity()
     
     # Generate a new access token
-    new_access_token = create_access_token(identity=current_user_id)
+    new_access_token = create_access_token(
+        identity=current_user_id,
+        additional_claims=current_user.token_claims()
+    )
     
     return jsonify({'access_token': new_access_token}), 200
 
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
+@query_budget(1)
 def me():
     """Get the current user's profile."""
-    user_id = get_jwt_identity()
-    
-    try:
-        user_id = uuid.UUID(user_id)
-    except ValueError:
-        return jsonify({'error': 'Invalid user ID format'}), 400
+    user = current_user
 
-    user = db.session.get(User, user_id)
-    
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
-    
     return jsonify(user.to_json()), 200
 
@@ -1,24 +1,41 @@
 #!/usr/bin/python3
 """
-    This Module contains the Progress API Route
+    This Module contains the Progress API Route.
+    A progress entry is a time-tracking timer on a task: it is started with
+    POST /progress, closed with POST /progress/stop, and listed with GET /progress.
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
 from models.base_model import db
-from models.user import User
+from models.task import Task
+from models.progress import Progress
 from datetime import datetime
+from utils.datetime_utils import parse_iso_datetime
+from utils.pagination import InvalidCursorError, paginate_keyset, parse_limit
+from utils.decorators import query_budget, use_primary
 import uuid
-from flasgger import swag_from
+import logging
+from utils.swagger import swag_from
 
 progress_bp = Blueprint('progress', __name__)
+logger = logging.getLogger(__name__)
+
+
+def _running_timer(user_id, for_update=False):
+    """Return the user's running timer, if any."""
+    query = Progress.query.filter(Progress.user_id == user_id, Progress.end_time.is_(None))
+    if for_update:
+        query = query.with_for_update()
+    return query.first()
 
 
 @progress_bp.route('/', methods=['POST'], strict_slashes=False)
 @jwt_required()
 @swag_from({
     'tags': ['Progress'],
-    'summary': 'Create progress entry',
-    'description': 'Create a new progress entry for the authenticated user.',
+    'summary': 'Start a timer',
+    'description': 'Start a time-tracking timer on one of the authenticated user\'s tasks. A user can only have one running timer.',
     'parameters': [
         {
             'name': 'body',
@@ -27,78 +44,215 @@ progress_bp = Blueprint('progress', __name__)
             'schema': {
                 'type': 'object',
                 'properties': {
-                    'description': {'type': 'string', 'description': 'Progress description'},
-                    'status': {'type': 'string', 'description': 'Progress status'}
+                    'task_id': {'type': 'string', 'format': 'uuid', 'description': 'The task to track time against'}
                 },
-                'required': ['description', 'status']
+                'required': ['task_id']
             }
         }
     ],
     'responses': {
         201: {
-            'description': 'Progress entry created',
-            'examples': {'application/json': {'id': 'uuid', 'user_id': 'uuid', 'description': 'desc', 'status': 'done', 'created_at': '2024-06-01T12:00:00Z'}}
+            'description': 'Timer started',
+            'examples': {'application/json': {'id': 'uuid', 'user_id': 'uuid', 'task_id': 'uuid', 'start_time': '2024-06-01T12:00:00', 'end_time': 'None', 'duration': 'None'}}
         },
         400: {
             'description': 'Invalid input',
             'examples': {'application/json': {'error': 'Invalid input'}}
         },
+        404: {
+            'description': 'Task not found',
+            'examples': {'application/json': {'error': 'Task not found'}}
+        },
+        409: {
+            'description': 'A timer is already running',
+            'examples': {'application/json': {'error': 'A timer is already running'}}
+        },
         500: {
             'description': 'Server error',
-            'examples': {'application/json': {'error': 'error message'}}
+            'examples': {'application/json': {'error': 'Failed to start timer'}}
         }
     }
 })
 def create_progress():
     """
-        Create a new progress entry for the authenticated user.
+        Start a timer on a task for the authenticated user.
     """
-    user_id = get_jwt_identity()
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not data or 'task_id' not in data:
+        return jsonify({"error": "Invalid input"}), 400
 
-    if not data or 'description' not in data or 'status' not in data:
+    try:
+        user_id = uuid.UUID(get_jwt_identity())
+        task_id = uuid.UUID(str(data['task_id']))
+    except ValueError:
         return jsonify({"error": "Invalid input"}), 400
 
+    task = Task.query.filter_by(id=task_id, user_id=user_id).first()
+    if not task:
+        return jsonify({"error": "Task not found"}), 404
+
+    progress = Progress(user_id=user_id, task_id=task_id, start_time=datetime.utcnow())
     try:
-        new_progress = {
-            "id": str(uuid.uuid4()),
-            "user_id": user_id,
-            "description": data['description'],
-            "status": data['status'],
-            "created_at": datetime.utcnow()
+        db.session.add(progress)
+        db.session.commit()
+    except IntegrityError:
+        # The partial unique index rejects a second running timer, even across workers
+        db.session.rollback()
+        return jsonify({"error": "A timer is already running"}), 409
+    except Exception as e:
+        db.session.rollback()
+        logger.exception(f"Error starting timer for user {user_id}")
+        return jsonify({"error": "Failed to start timer"}), 500
+
+    logger.info(f"Timer {progress.id} started on task {task_id} for user {user_id}")
+    return jsonify(progress.to_json()), 201
+
+
+@progress_bp.route('/stop', methods=['POST'])
+@jwt_required()
+@swag_from({
+    'tags': ['Progress'],
+    'summary': 'Stop the running timer',
+    'description': 'Stop the authenticated user\'s running timer and record its duration.',
+    'responses': {
+        200: {
+            'description': 'Timer stopped',
+            'examples': {'application/json': {'id': 'uuid', 'user_id': 'uuid', 'task_id': 'uuid', 'start_time': '2024-06-01T12:00:00', 'end_time': '2024-06-01T12:30:00', 'duration': '0:30:00'}}
+        },
+        404: {
+            'description': 'No timer is running',
+            'examples': {'application/json': {'error': 'No timer is running'}}
+        },
+        500: {
+            'description': 'Server error',
+            'examples': {'application/json': {'error': 'Failed to stop timer'}}
         }
-        db['progress'].append(new_progress)  # Assuming db['progress'] is a list for simplicity
-        return jsonify(new_progress), 201
+    }
+})
+def stop_progress():
+    """
+        Stop the authenticated user's running timer.
+    """
+    try:
+        user_id = uuid.UUID(get_jwt_identity())
+    except ValueError:
+        return jsonify({'error': 'Invalid user ID format'}), 400
+
+    try:
+        # Lock the row so two concurrent stops cannot both close it
+        progress = _running_timer(user_id, for_update=True)
+        if not progress:
+            db.session.rollback()
+            return jsonify({"error": "No timer is running"}), 404
+
+        progress.end_time = datetime.utcnow()
+        progress.duration = progress.end_time - progress.start_time
+        db.session.commit()
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        db.session.rollback()
+        logger.exception(f"Error stopping timer for user {user_id}")
+        return jsonify({"error": "Failed to stop timer"}), 500
+
+    logger.info(f"Timer {progress.id} stopped for user {user_id} after {progress.duration}")
+    return jsonify(progress.to_json()), 200
+
+
+@progress_bp.route('/current', methods=['GET'])
+@use_primary  # polled right after starting/stopping a timer; replica lag would hide it
+@jwt_required()
+@query_budget(2)
+@swag_from({
+    'tags': ['Progress'],
+    'summary': 'Get the running timer',
+    'description': 'Return the authenticated user\'s running timer, or null when none is running.',
+    'responses': {
+        200: {
+            'description': 'The running timer or null',
+            'examples': {'application/json': {'timer': {'id': 'uuid', 'task_id': 'uuid', 'start_time': '2024-06-01T12:00:00'}}}
+        }
+    }
+})
+def get_current_progress():
+    """
+        Return the authenticated user's running timer.
+    """
+    try:
+        user_id = uuid.UUID(get_jwt_identity())
+    except ValueError:
+        return jsonify({'error': 'Invalid user ID format'}), 400
+
+    progress = _running_timer(user_id)
+    return jsonify({'timer': progress.to_json() if progress else None}), 200
 
 
 @progress_bp.route('/', methods=['GET'], strict_slashes=False)
 @jwt_required()
+@query_budget(2)
 @swag_from({
     'tags': ['Progress'],
     'summary': 'Get user progress',
-    'description': 'Retrieve all progress entries for the authenticated user.',
+    'description': 'Retrieve a page of the authenticated user\'s timers ordered by start time, optionally restricted to a time range or task.',
+    'parameters': [
+        {'name': 'from', 'in': 'query', 'type': 'string', 'format': 'date-time', 'required': False, 'description': 'Only timers started at or after this time'},
+        {'name': 'to', 'in': 'query', 'type': 'string', 'format': 'date-time', 'required': False, 'description': 'Only timers started before this time'},
+        {'name': 'task_id', 'in': 'query', 'type': 'string', 'format': 'uuid', 'required': False, 'description': 'Only timers for this task'},
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Page size (default 50, max 200)'},
+        {'name': 'cursor', 'in': 'query', 'type': 'string', 'required': False, 'description': 'The next_cursor returned with the previous page'}
+    ],
     'responses': {
         200: {
-            'description': 'List of progress entries',
-            'examples': {'application/json': [
-                {'id': 'uuid', 'user_id': 'uuid', 'description': 'desc', 'status': 'done', 'created_at': '2024-06-01T12:00:00Z'}
-            ]}
+            'description': 'Page of progress entries',
+            'examples': {'application/json': {
+                'progress': [{'id': 'uuid', 'user_id': 'uuid', 'task_id': 'uuid', 'start_time': '2024-06-01T12:00:00', 'end_time': '2024-06-01T12:30:00', 'duration': '0:30:00'}],
+                'next_cursor': None
+            }}
         },
-        500: {
-            'description': 'Server error',
-            'examples': {'application/json': {'error': 'error message'}}
+        400: {
+            'description': 'Invalid query parameters',
+            'examples': {'application/json': {'error': 'from and to must be ISO 8601 datetimes'}}
         }
     }
 })
 def get_progress():
     """
-    Retrieve all progress entries for the authenticated user.
+    Retrieve a page of progress entries for the authenticated user.
     """
-    user_id = get_jwt_identity()
     try:
-        user_progress = [p for p in db['progress'] if p['user_id'] == user_id]
-        return jsonify(user_progress), 200
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        user_id = uuid.UUID(get_jwt_identity())
+    except ValueError:
+        return jsonify({'error': 'Invalid user ID format'}), 400
+
+    query = Progress.query.filter(Progress.user_id == user_id)
+
+    try:
+        if request.args.get('from'):
+            query = query.filter(Progress.start_time >= parse_iso_datetime(request.args['from']))
+        if request.args.get('to'):
+            query = query.filter(Progress.start_time < parse_iso_datetime(request.args['to']))
+    except ValueError:
+        return jsonify({'error': 'from and to must be ISO 8601 datetimes'}), 400
+
+    if request.args.get('task_id'):
+        try:
+            query = query.filter(Progress.task_id == uuid.UUID(request.args['task_id']))
+        except ValueError:
+            return jsonify({'error': 'task_id must be a UUID'}), 400
+
+    try:
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    try:
+        entries, next_cursor = paginate_keyset(
+            query, Progress, limit,
+            cursor=request.args.get('cursor'),
+            sort_column=Progress.start_time
+        )
+    except InvalidCursorError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return jsonify({
+        'progress': [entry.to_json() for entry in entries],
+        'next_cursor': next_cursor
+    }), 200
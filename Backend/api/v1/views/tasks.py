@@ -2,30 +2,161 @@
 """
     This Module contains the api endpoints for the task
 """
-from flask import Flask, abort, request, jsonify, Blueprint
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask import Flask, abort, request, jsonify, Blueprint, current_app
+from flask_jwt_extended import jwt_required, current_user
 from models.base_model import db
-from models.user import User
-from models.task import Task
+from models.task import Task, apply_task_totals
+from models.progress import Progress
+from models.analytics import Analytics
+from models.task_search import MAX_QUERY_LENGTH, search_terms, search_tasks
 from datetime import datetime
-from flasgger import swag_from
+from sqlalchemy import insert
+from utils.datetime_utils import parse_iso_datetime
+from utils.pagination import InvalidCursorError, paginate_keyset, parse_limit
+import uuid
+import logging
+from utils.decorators import query_budget
+from utils.swagger import swag_from
 
 
 task_bp = Blueprint('task', __name__)
 
+TASK_PRIORITIES = ('low', 'medium', 'high')
+
+# sort parameter -> (column, nullable); "-" in front sorts newest first
+TASK_SORTS = {
+    'created_at': (Task.created_at, False),
+    'updated_at': (Task.updated_at, False),
+    'deadline': (Task.deadline, True),
+}
+
+# Range parameters of the task list -> (column, inclusive lower bound)
+TASK_RANGES = {
+    'deadline_from': (Task.deadline, True),
+    'deadline_to': (Task.deadline, False),
+    'created_from': (Task.created_at, True),
+    'created_to': (Task.created_at, False),
+    'updated_from': (Task.updated_at, True),
+    'updated_to': (Task.updated_at, False),
+}
+
+
+def _validate_task_payload(data, partial=False):
+    """
+        Validate a task payload and convert it to column values
+        Arguments:
+            - data: The JSON object describing one task
+            - partial: Allow title and description to be omitted (for patches)
+        Returns:
+            - A (values, error) tuple; values is None when error is set
+    """
+    if not isinstance(data, dict):
+        return None, 'Task must be a JSON object'
+
+    if not partial:
+        for field in ('title', 'description'):
+            if field not in data:
+                return None, f'Missing required field: {field}'
+
+    values = {}
+    if 'title' in data:
+        if not isinstance(data['title'], str) or not data['title'].strip():
+            return None, 'title must be a non-empty string'
+        if len(data['title']) > 255:
+            return None, 'title must be at most 255 characters'
+        values['title'] = data['title']
+
+    if 'description' in data:
+        if data['description'] is not None and not isinstance(data['description'], str):
+            return None, 'description must be a string'
+        if data['description'] and len(data['description']) > 500:
+            return None, 'description must be at most 500 characters'
+        values['description'] = data['description']
+
+    if 'priority' in data:
+        if data['priority'] not in TASK_PRIORITIES:
+            return None, f'priority must be one of {list(TASK_PRIORITIES)}'
+        values['priority'] = data['priority']
+
+    if partial and 'deadline' in data and data['deadline'] is None:
+        values['deadline'] = None
+    elif data.get('deadline') is not None:
+        try:
+            values['deadline'] = parse_iso_datetime(data['deadline'])
+        except ValueError:
+            return None, 'deadline must be an ISO 8601 datetime'
+
+    if 'completed' in data:
+        if not isinstance(data['completed'], bool):
+            return None, 'completed must be a boolean'
+        values['completed'] = data['completed']
+
+    return values, None
+
+
+def _task_list_filters(args):
+    """
+        Turn the filters of the task list query string into SQL conditions
+        Arguments:
+            - args: The request's query parameters
+        Returns:
+            - A (conditions, error) tuple; conditions is None when error is set
+    """
+    conditions = []
+    if args.get('priority'):
+        priorities = [value.strip() for value in args['priority'].split(',')]
+        if any(priority not in TASK_PRIORITIES for priority in priorities):
+            return None, f'priority must be a comma-separated list of {list(TASK_PRIORITIES)}'
+        conditions.append(Task.priority.in_(priorities))
+
+    if args.get('completed'):
+        completed = args['completed'].lower()
+        if completed not in ('true', 'false'):
+            return None, 'completed must be true or false'
+        conditions.append(Task.completed.is_(completed == 'true'))
+
+    for name, (column, lower) in TASK_RANGES.items():
+        if args.get(name):
+            try:
+                value = parse_iso_datetime(args[name])
+            except ValueError:
+                return None, f'{name} must be an ISO 8601 datetime'
+            conditions.append(column >= value if lower else column < value)
+
+    return conditions, None
+
 
 @task_bp.route('/tasks', methods=['GET'])
 @jwt_required()
+@query_budget(2)
 @swag_from({
     'tags': ['Tasks'],
     'summary': 'Get all tasks',
-    'description': 'Get all tasks for the current user.',
+    'description': 'Get a page of tasks for the current user, filtered and sorted by the database.',
+    'parameters': [
+        {'name': 'priority', 'in': 'query', 'type': 'string', 'required': False, 'description': 'Only these priorities, e.g. high or medium,high'},
+        {'name': 'completed', 'in': 'query', 'type': 'boolean', 'required': False, 'description': 'Only completed (true) or open (false) tasks'},
+        {'name': 'deadline_from', 'in': 'query', 'type': 'string', 'format': 'date-time', 'required': False, 'description': 'Only tasks due at or after this time'},
+        {'name': 'deadline_to', 'in': 'query', 'type': 'string', 'format': 'date-time', 'required': False, 'description': 'Only tasks due before this time'},
+        {'name': 'created_from', 'in': 'query', 'type': 'string', 'format': 'date-time', 'required': False, 'description': 'Only tasks created at or after this time'},
+        {'name': 'created_to', 'in': 'query', 'type': 'string', 'format': 'date-time', 'required': False, 'description': 'Only tasks created before this time'},
+        {'name': 'updated_from', 'in': 'query', 'type': 'string', 'format': 'date-time', 'required': False, 'description': 'Only tasks updated at or after this time'},
+        {'name': 'updated_to', 'in': 'query', 'type': 'string', 'format': 'date-time', 'required': False, 'description': 'Only tasks updated before this time'},
+        {'name': 'sort', 'in': 'query', 'type': 'string', 'required': False, 'description': 'created_at (default), updated_at or deadline; prefix with - for descending. Tasks without a deadline come last, or first with -deadline'},
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Page size (default 50, max 200)'},
+        {'name': 'cursor', 'in': 'query', 'type': 'string', 'required': False, 'description': 'The next_cursor returned with the previous page (with the same filters and sort)'}
+    ],
     'responses': {
         200: {
-            'description': 'List of tasks',
-            'examples': {'application/json': [
-                {'id': 1, 'title': 'Task 1', 'description': 'Desc', 'user_id': 'uuid'}
-            ]}
+            'description': 'Page of tasks',
+            'examples': {'application/json': {
+                'tasks': [{'id': 'uuid', 'title': 'Task 1', 'description': 'Desc', 'user_id': 'uuid'}],
+                'next_cursor': 'opaque-cursor'
+            }}
+        },
+        400: {
+            'description': 'Invalid filter, sort or pagination parameters',
+            'examples': {'application/json': {'error': 'Invalid cursor'}}
         },
         404: {
             'description': 'User not found',
@@ -34,18 +165,98 @@ task_bp = Blueprint('task', __name__)
     }
 })
 def get_tasks():
-    """Get all tasks for the current user."""
-    current_user = get_jwt_identity()
-    user = User.get(id=current_user)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
+    """Get a filtered, sorted page of tasks for the current user, in one query."""
+    user = current_user
+
+    conditions, error = _task_list_filters(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    sort = request.args.get('sort') or 'created_at'
+    descending = sort.startswith('-')
+    if descending:
+        sort = sort[1:]
+    if sort not in TASK_SORTS:
+        return jsonify({'error': f'sort must be one of {list(TASK_SORTS)}, optionally prefixed with -'}), 400
+    sort_column, nullable = TASK_SORTS[sort]
+
+    try:
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    try:
+        tasks, next_cursor = paginate_keyset(
+            Task.query.filter(Task.user_id == user.id, *conditions),
+            Task,
+            limit,
+            cursor=request.args.get('cursor'),
+            sort_column=sort_column,
+            descending=descending,
+            nullable=nullable
+        )
+    except InvalidCursorError:
+        return jsonify({'error': 'Invalid cursor'}), 400
 
-    tasks = user.tasks
-    return jsonify([task.to_json() for task in tasks]), 200
+    return jsonify({
+        'tasks': [task.to_json() for task in tasks],
+        'next_cursor': next_cursor
+    }), 200
+
+
+@task_bp.route('/tasks/search', methods=['GET'])
+@jwt_required()
+@query_budget(2)
+@swag_from({
+    'tags': ['Tasks'],
+    'summary': 'Search tasks',
+    'description': 'Full-text search over the title and description of the current user\'s tasks, best matches first. Words are stemmed, and every word must match.',
+    'parameters': [
+        {'name': 'q', 'in': 'query', 'type': 'string', 'required': True, 'description': f'The words to look for (at most {MAX_QUERY_LENGTH} characters)'},
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Page size (default 50, max 200)'},
+        {'name': 'cursor', 'in': 'query', 'type': 'string', 'required': False, 'description': 'The next_cursor returned with the previous page (with the same q)'}
+    ],
+    'responses': {
+        200: {
+            'description': 'Page of matching tasks',
+            'examples': {'application/json': {
+                'tasks': [{'id': 'uuid', 'title': 'Quarterly report', 'description': 'Desc', 'user_id': 'uuid'}],
+                'next_cursor': None
+            }}
+        },
+        400: {
+            'description': 'Missing or invalid search parameters',
+            'examples': {'application/json': {'error': 'q must contain at least one word'}}
+        }
+    }
+})
+def search_user_tasks():
+    """Search the current user's tasks, ranked by relevance."""
+    query = request.args.get('q', '')
+    if len(query) > MAX_QUERY_LENGTH:
+        return jsonify({'error': f'q must be at most {MAX_QUERY_LENGTH} characters'}), 400
+    if not search_terms(query):
+        return jsonify({'error': 'q must contain at least one word'}), 400
+
+    try:
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    try:
+        tasks, next_cursor = search_tasks(current_user.id, query, limit, cursor=request.args.get('cursor'))
+    except InvalidCursorError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return jsonify({
+        'tasks': [task.to_json() for task in tasks],
+        'next_cursor': next_cursor
+    }), 200
 
 
 @task_bp.route('/tasks/<int:task_id>', methods=['GET'])
 @jwt_required()
+@query_budget(2)
 @swag_from({
     'tags': ['Tasks'],
     'summary': 'Get task by ID',
@@ -66,10 +277,7 @@ def get_tasks():
 })
 def get_task(task_id):
     """Get a specific task by ID."""
-    current_user = get_jwt_identity()
-    user = User.get(id=current_user)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
+    user = current_user
 
     task = user.tasks.filter_by(id=task_id).first()
     if not task:
@@ -117,10 +325,7 @@ def get_task(task_id):
 def create_task():
     """Create a new task."""
     data = request.get_json()
-    current_user = get_jwt_identity()
-    user = User.get(id=current_user)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
+    user = current_user
 
     # Validate required fields
     required_fields = ['title', 'description']
@@ -143,6 +348,239 @@ def create_task():
     }), 201
 
 
+@task_bp.route('/tasks/batch', methods=['POST'])
+@jwt_required()
+@swag_from({
+    'tags': ['Tasks'],
+    'summary': 'Create tasks in bulk',
+    'description': 'Validate a list of tasks and insert the valid ones in a single transaction. Each item is reported individually.',
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'tasks': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'title': {'type': 'string'},
+                                'description': {'type': 'string'},
+                                'priority': {'type': 'string', 'enum': ['low', 'medium', 'high']},
+                                'deadline': {'type': 'string', 'format': 'date-time'},
+                                'completed': {'type': 'boolean'}
+                            },
+                            'required': ['title', 'description']
+                        }
+                    }
+                },
+                'required': ['tasks']
+            }
+        }
+    ],
+    'responses': {
+        201: {
+            'description': 'All tasks created',
+            'examples': {'application/json': {'created': 1, 'failed': 0, 'results': [{'index': 0, 'status': 'created', 'id': 'uuid'}]}}
+        },
+        207: {
+            'description': 'Some tasks were rejected',
+            'examples': {'application/json': {'created': 1, 'failed': 1, 'results': [
+                {'index': 0, 'status': 'created', 'id': 'uuid'},
+                {'index': 1, 'status': 'error', 'error': 'Missing required field: title'}
+            ]}}
+        },
+        400: {
+            'description': 'Invalid batch or no valid tasks',
+            'examples': {'application/json': {'error': 'Batch exceeds the maximum of 500 tasks'}}
+        },
+        404: {
+            'description': 'User not found',
+            'examples': {'application/json': {'error': 'User not found'}}
+        },
+        500: {
+            'description': 'Failed to create tasks',
+            'examples': {'application/json': {'error': 'Failed to create tasks'}}
+        }
+    }
+})
+def create_tasks_batch():
+    """Create many tasks for the current user with one bulk insert."""
+    user = current_user
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid input'}), 400
+    if not isinstance(data.get('tasks'), list) or not data['tasks']:
+        return jsonify({'error': 'tasks must be a non-empty list'}), 400
+
+    max_size = current_app.config.get('TASK_BATCH_MAX_SIZE', 500)
+    if len(data['tasks']) > max_size:
+        return jsonify({'error': f'Batch exceeds the maximum of {max_size} tasks'}), 400
+
+    # Validate every item before touching the database
+    rows = []
+    results = []
+    for index, item in enumerate(data['tasks']):
+        values, error = _validate_task_payload(item)
+        if error:
+            results.append({'index': index, 'status': 'error', 'error': error})
+            continue
+        values['id'] = uuid.uuid4()
+        values['user_id'] = user.id
+        rows.append(values)
+        results.append({'index': index, 'status': 'created', 'id': str(values['id'])})
+
+    if not rows:
+        return jsonify({'error': 'No valid tasks in batch', 'results': results}), 400
+
+    try:
+        # One executemany INSERT in a single transaction, counted in the user's rollup
+        db.session.execute(insert(Task), rows)
+        apply_task_totals(db.session.connection(), Task.id.in_([row['id'] for row in rows]))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error creating task batch for user {user.id}: {e}")
+        return jsonify({'error': 'Failed to create tasks'}), 500
+
+    failed = len(results) - len(rows)
+    return jsonify({
+        'created': len(rows),
+        'failed': failed,
+        'results': results
+    }), 207 if failed else 201
+
+
+@task_bp.route('/tasks/bulk', methods=['POST'])
+@jwt_required()
+@swag_from({
+    'tags': ['Tasks'],
+    'summary': 'Bulk task action',
+    'description': 'Complete, uncomplete, delete or patch many of the current user\'s tasks with a single UPDATE/DELETE statement.',
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'ids': {'type': 'array', 'items': {'type': 'string', 'format': 'uuid'}},
+                    'action': {'type': 'string', 'enum': ['complete', 'uncomplete', 'delete', 'update']},
+                    'fields': {
+                        'type': 'object',
+                        'description': 'Fields to set when action is update',
+                        'properties': {
+                            'title': {'type': 'string'},
+                            'description': {'type': 'string'},
+                            'priority': {'type': 'string', 'enum': ['low', 'medium', 'high']},
+                            'deadline': {'type': 'string', 'format': 'date-time'},
+                            'completed': {'type': 'boolean'}
+                        }
+                    }
+                },
+                'required': ['ids', 'action']
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Action applied',
+            'examples': {'application/json': {'action': 'complete', 'requested': 3, 'affected': 3}}
+        },
+        400: {
+            'description': 'Invalid input',
+            'examples': {'application/json': {'error': 'action must be one of complete, uncomplete, delete, update'}}
+        },
+        404: {
+            'description': 'User not found',
+            'examples': {'application/json': {'error': 'User not found'}}
+        },
+        500: {
+            'description': 'Failed to apply action',
+            'examples': {'application/json': {'error': 'Failed to apply bulk action'}}
+        }
+    }
+})
+def bulk_task_action():
+    """Apply one action to many of the current user's tasks."""
+    user = current_user
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid input'}), 400
+    if not isinstance(data.get('ids'), list) or not data['ids']:
+        return jsonify({'error': 'ids must be a non-empty list'}), 400
+
+    max_size = current_app.config.get('TASK_BATCH_MAX_SIZE', 500)
+    if len(data['ids']) > max_size:
+        return jsonify({'error': f'Bulk action exceeds the maximum of {max_size} tasks'}), 400
+
+    try:
+        task_ids = {uuid.UUID(str(task_id)) for task_id in data['ids']}
+    except ValueError:
+        return jsonify({'error': 'ids must be task UUIDs'}), 400
+
+    action = data.get('action')
+    if action == 'complete':
+        values = {'completed': True}
+    elif action == 'uncomplete':
+        values = {'completed': False}
+    elif action == 'update':
+        values, error = _validate_task_payload(data.get('fields'), partial=True)
+        if error:
+            return jsonify({'error': error}), 400
+        if not values:
+            return jsonify({'error': 'fields must contain at least one updatable field'}), 400
+    elif action != 'delete':
+        return jsonify({'error': 'action must be one of complete, uncomplete, delete, update'}), 400
+
+    owned = (Task.user_id == user.id) & Task.id.in_(task_ids)
+    try:
+        if action == 'delete':
+            # Progress rows reference the tasks, so remove them in the same transaction
+            owned_ids = db.select(Task.id).where(owned)
+            db.session.execute(
+                db.delete(Progress).where(Progress.task_id.in_(owned_ids)),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.execute(
+                db.update(Analytics).where(Analytics.task_id.in_(owned_ids)).values(task_id=None),
+                execution_options={'synchronize_session': False}
+            )
+            apply_task_totals(db.session.connection(), owned, remove=True)
+            result = db.session.execute(
+                db.delete(Task).where(owned),
+                execution_options={'synchronize_session': False}
+            )
+        else:
+            # Only the completed flag is counted in the user's rollup
+            counted = 'completed' in values
+            if counted:
+                apply_task_totals(db.session.connection(), owned, remove=True)
+            result = db.session.execute(
+                db.update(Task).where(owned).values(**values),
+                execution_options={'synchronize_session': False}
+            )
+            if counted:
+                apply_task_totals(db.session.connection(), owned)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error applying bulk {action} for user {user.id}: {e}")
+        return jsonify({'error': 'Failed to apply bulk action'}), 500
+
+    return jsonify({
+        'action': action,
+        'requested': len(task_ids),
+        'affected': result.rowcount
+    }), 200
+
+
 @task_bp.route('/tasks/<int:task_id>', methods=['PUT'])
 @jwt_required()
 @swag_from({
@@ -178,10 +616,7 @@ def create_task():
 def update_task(task_id):
     """Update a specific task by ID."""
     data = request.get_json()
-    current_user = get_jwt_identity()
-    user = User.get(id=current_user)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
+    user = current_user
 
     task = user.tasks.filter_by(id=task_id).first()
     if not task:
@@ -222,10 +657,7 @@ def update_task(task_id):
 })
 def delete_task(task_id):
     """Delete a specific task by ID."""
-    current_user = get_jwt_identity()
-    user = User.get(id=current_user)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
+    user = current_user
 
     task = user.tasks.filter_by(id=task_id).first()
     if not task:
@@ -258,10 +690,7 @@ def delete_task(task_id):
 })
 def complete_task(task_id):
     """Mark a task as completed."""
-    current_user = get_jwt_identity()
-    user = User.get(id=current_user)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
+    user = current_user
 
     task = user.tasks.filter_by(id=task_id).first()
     if not task:
@@ -297,10 +726,7 @@ def complete_task(task_id):
 })
 def uncomplete_task(task_id):
     """Mark a task as uncompleted."""
-    current_user = get_jwt_identity()
-    user = User.get(id=current_user)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
+    user = current_user
 
     task = user.tasks.filter_by(id=task_id).first()
     if not task:
@@ -314,58 +740,9 @@ def uncomplete_task(task_id):
     }), 200
 
 
-@task_bp.route('/tasks/<int:task_id>/progress', methods=['POST'])
-@jwt_required()
-@swag_from({
-    'tags': ['Tasks'],
-    'summary': 'Update task progress',
-    'description': 'Update the progress of a task.',
-    'parameters': [
-        {'name': 'task_id', 'in': 'path', 'type': 'integer', 'required': True, 'description': 'Task ID'}
-    ],
-    'responses': {
-        200: {
-            'description': 'Task progress updated',
-            'examples': {'application/json': {'message': 'Task progress updated successfully', 'task': {'id': 1, 'title': 'Task 1', 'description': 'Desc', 'user_id': 'uuid'}}}
-        },
-        400: {
-            'description': 'Missing required field',
-            'examples': {'application/json': {'error': 'Missing required field: progress'}}
-        },
-        404: {
-            'description': 'Task or user not found',
-            'examples': {'application/json': {'error': 'Task not found'}}
-        }
-    }
-})
-def update_task_progress(task_id):
-    """Update the progress of a task."""
-    data = request.get_json()
-    current_user = get_jwt_identity()
-    user = User.get(id=current_user)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-
-    task = user.tasks.filter_by(id=task_id).first()
-    if not task:
-        return jsonify({"error": "Task not found"}), 404
-
-    # Validate required fields
-    required_fields = ['progress']
-    for field in required_fields:
-        if field not in data:
-            return jsonify({'error': f'Missing required field: {field}'}), 400
-
-    task.progress = data['progress']
-    task.save()
-    return jsonify({
-        'message': 'Task progress updated successfully',
-        'task': task.to_json()
-    }), 200
-
-
 @task_bp.route('/tasks/<int:task_id>/analytics', methods=['GET'])
 @jwt_required()
+@query_budget(2)
 @swag_from({
     'tags': ['Tasks'],
     'summary': 'Get task analytics',
@@ -376,7 +753,7 @@ def update_task_progress(task_id):
     'responses': {
         200: {
             'description': 'Analytics data',
-            'examples': {'application/json': {'total_time_spent': '1 hour', 'progress': 50, 'completed': True}}
+            'examples': {'application/json': {'total_time_spent': '1:00:00', 'completed': True}}
         },
         404: {
             'description': 'Task or user not found',
@@ -386,10 +763,7 @@ def update_task_progress(task_id):
 })
 def get_task_analytics(task_id):
     """Get analytics for a specific task."""
-    current_user = get_jwt_identity()
-    user = User.get(id=current_user)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
+    user = current_user
 
     task = user.tasks.filter_by(id=task_id).first()
     if not task:
@@ -398,7 +772,6 @@ def get_task_analytics(task_id):
     # Example analytics data
     analytics_data = {
         'total_time_spent': str(task.total_time_spent),
-        'progress': task.progress,
         'completed': task.completed
     }
 
@@ -439,10 +812,7 @@ def get_task_analytics(task_id):
 def update_task_analytics(task_id):
     """Update analytics for a specific task."""
     data = request.get_json()
-    current_user = get_jwt_identity()
-    user = User.get(id=current_user)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
+    user = current_user
 
     task = user.tasks.filter_by(id=task_id).first()
     if not task:
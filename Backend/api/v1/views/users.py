@@ -6,11 +6,12 @@ from flask import Flask, abort, request, jsonify, Blueprint
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.base_model import db
 from models.user import User, UserRole
+from models.task import Task
 from datetime import datetime
 import uuid
 import logging
-from utils.decorators import admin_required # Import the decorator
-from flasgger import swag_from
+from utils.decorators import admin_required, query_budget # Import the decorator
+from utils.swagger import swag_from
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -18,6 +19,7 @@ admin_bp = Blueprint('admin', __name__)
 @admin_bp.route('/users', methods=['GET'])
 @jwt_required()
 @admin_required
+@query_budget(2)
 @swag_from({
     'tags': ['Admin'],
     'summary': 'List all users',
@@ -52,6 +54,7 @@ def get_all_users():
 @admin_bp.route('/users/<uuid:user_id>', methods=['GET'])
 @jwt_required()
 @admin_required
+@query_budget(2)
 @swag_from({
     'tags': ['Admin'],
     'summary': 'Get user by ID',
@@ -152,7 +155,10 @@ def update_user_by_id(user_id):
     try:
         for field in updatable_fields:
             if field in data:
-                setattr(user, field, data[field])
+                if field == 'role':
+                    user.set_role(UserRole(data['role']))
+                else:
+                    setattr(user, field, data[field])
         
         user.updated_at = datetime.utcnow()
         user.save()
@@ -239,11 +245,11 @@ def update_user_role(user_id):
     try:
         user_id = uuid.UUID(str(user_id))
         user = db.session.get(User, user_id)
-        print("\n\n\n","I have gotten here", "\n\n\n")
         if not user:
             return jsonify({"error": "User not found"}), 404
 
-        user.role = new_role
+        # Bumps role_version so tokens carrying the old role claim are revoked
+        user.set_role(new_role)
         db.session.commit()
         logging.info(f"User {user_id} role successfully updated to {new_role_str} by {current_user_id}.")
 
@@ -251,4 +257,37 @@ def update_user_role(user_id):
     except Exception as e:
         db.session.rollback()
         logging.error(f"Error updating user role {user_id}: {e}")
-        return jsonify({"error": "Failed to update user role", "details": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to update user role", "details": str(e)}), 500
+
+
+@admin_bp.route('/tasks/recompute-time-spent', methods=['POST'])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Admin'],
+    'summary': 'Recompute task time totals',
+    'description': 'Repair drift in every task\'s total_time_spent by recomputing it from progress durations in one set-based UPDATE (Admin only).',
+    'responses': {
+        200: {
+            'description': 'Totals recomputed',
+            'examples': {'application/json': {'message': 'Task time totals recomputed', 'updated': 3}}
+        },
+        500: {
+            'description': 'Failed to recompute totals',
+            'examples': {'application/json': {'error': 'Failed to recompute task time totals'}}
+        }
+    }
+})
+def recompute_task_time_spent():
+    """Recompute total_time_spent for every task (Admin only)."""
+    current_user_id = get_jwt_identity()
+    logging.info(f"User {current_user_id} triggered a task time total recompute.")
+
+    try:
+        updated = Task.recompute_total_time_spent()
+        db.session.commit()
+        return jsonify({'message': 'Task time totals recomputed', 'updated': updated}), 200
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error recomputing task time totals: {e}")
+        return jsonify({'error': 'Failed to recompute task time totals'}), 500
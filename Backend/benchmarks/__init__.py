@@ -0,0 +1,6 @@
+#!/usr/bin/env python3
+"""
+    This package contains the performance benchmarks for the TimeWise API.
+    Each module can be run directly, e.g. `python -m benchmarks.bench_analytics`
+    from the Backend directory.
+"""
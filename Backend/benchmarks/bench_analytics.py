@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+    Benchmark for GET /api/v1/analytics/analytics.
+
+    Seeds one user per size with that many tasks (bulk inserted) and times the
+    endpoint through the Flask test client, so its cost can be compared as a
+    user's task history grows. The endpoint reads the user's user_task_stats
+    row by primary key, so the latency should stay flat; --aggregate times the
+    live COUNT/SUM over the user's tasks instead (the rollup row is removed),
+    which grows with the history.
+
+    Usage:
+        python -m benchmarks.bench_analytics [--sizes 10 1000 100000] [--repeat 50] [--aggregate]
+"""
+import argparse
+import logging
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+from api.v1.app import create_app
+from models.base_model import db
+from models.user import User
+from models.task import Task
+from models.user_task_stats import UserTaskStats
+
+
+def seed_user(size):
+    """Create a user owning `size` tasks and return its id."""
+    user = User(
+        name="Bench User",
+        username=f"bench_{uuid.uuid4().hex}",
+        email=f"bench_{uuid.uuid4().hex}@example.com",
+        password_hash="x"
+    )
+    db.session.add(user)
+    db.session.commit()
+
+    rows = [
+        {
+            'title': f"Task {i}",
+            'user_id': user.id,
+            'completed': i % 3 == 0,
+            'total_time_spent': timedelta(minutes=i % 120)
+        }
+        for i in range(size)
+    ]
+    if rows:
+        db.session.execute(insert(Task), rows)
+        # The bulk insert skips the ORM events that maintain the rollup
+        Task.recompute_user_stats(user_ids=[user.id])
+        db.session.commit()
+    return user.id
+
+
+def time_endpoint(client, headers, repeat):
+    """Return the per-request latencies of the analytics endpoint in ms."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get('/api/v1/analytics/analytics', headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--config', default='testing', help='Config name from api.v1.config')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--aggregate', action='store_true', help='Time the live aggregate instead of the rollup')
+    args = parser.parse_args()
+
+    app = create_app(config_name=args.config)
+    logging.getLogger().setLevel(logging.WARNING)
+    client = app.test_client()
+
+    print(f"{'tasks':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    with app.app_context():
+        db.create_all()
+        for size in args.sizes:
+            user_id = seed_user(size)
+            if args.aggregate:
+                stats = UserTaskStats.__table__
+                db.session.execute(stats.delete().where(stats.c.user_id == user_id))
+                db.session.commit()
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+            timings = sorted(time_endpoint(client, headers, args.repeat))
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{size:>8} {statistics.median(timings):>9.2f} {p95:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+    Benchmark for the JSON response provider.
+
+    Builds large task and user list payloads the way the list endpoints do
+    (via to_json) and compares response encoding throughput of Flask's default
+    provider, FastJSONProvider on the stdlib path and FastJSONProvider on orjson.
+
+    Usage:
+        python -m benchmarks.bench_json [--rows 20000] [--repeat 10]
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.orm import configure_mappers
+from models.user import User, UserRole
+from models.task import Task
+from utils.json_provider import FastJSONProvider, orjson
+
+
+def make_payloads(rows):
+    """Build serialized task and user lists like the list endpoints return."""
+    now = datetime.utcnow()
+    user_id = uuid.uuid4()
+    tasks = [
+        Task(id=uuid.uuid4(), title=f"Task {i}", description="Benchmark task",
+             priority='medium', deadline=now, completed=bool(i % 2),
+             total_time_spent=timedelta(minutes=i % 90), user_id=user_id,
+             created_at=now, updated_at=now).to_json()
+        for i in range(rows)
+    ]
+    users = [
+        User(id=uuid.uuid4(), name=f"User {i}", username=f"user{i}",
+             email=f"user{i}@example.com", timezone='UTC', language='en',
+             email_verified=True, role=UserRole.USER,
+             created_at=now, updated_at=now).to_json()
+        for i in range(rows)
+    ]
+    return {'tasks': {'tasks': tasks, 'next_cursor': None}, 'users': users}
+
+
+def bench(app, label, payload, repeat):
+    """Time building `repeat` responses and print MB/s and responses/s."""
+    with app.test_request_context():
+        size = len(app.json.response(payload).get_data())
+        start = time.perf_counter()
+        for _ in range(repeat):
+            app.json.response(payload)
+        elapsed = time.perf_counter() - start
+    print(f"{label:<22} {repeat / elapsed:>8.1f} resp/s {size * repeat / elapsed / 1e6:>8.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    configure_mappers()
+    payloads = make_payloads(args.rows)
+
+    app = Flask(__name__)
+    providers = [('flask default', DefaultJSONProvider(app))]
+    stdlib = FastJSONProvider(app)
+    stdlib.use_orjson = False
+    providers.append(('fast provider (stdlib)', stdlib))
+    if orjson is not None:
+        providers.append(('fast provider (orjson)', FastJSONProvider(app)))
+    else:
+        print("orjson is not installed; skipping the orjson run")
+
+    for name, payload in payloads.items():
+        print(f"-- {name} list, {args.rows} rows")
+        for label, provider in providers:
+            app.json = provider
+            bench(app, label, payload, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+    Benchmark for the API under a login storm.
+
+    Serves the app on a local threaded server, then runs login clients
+    hammering POST /auth/login next to reader clients calling
+    GET /task/tasks. It is run once with inline hashing
+    (PASSWORD_HASH_WORKERS=0) and once with the bounded hashing pool, and
+    reports login throughput, shed logins (503) and the reader p50/p99.
+
+    Usage:
+        python -m benchmarks.bench_login_storm [--duration 10] [--logins 16] [--readers 4] [--workers 2]
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from flask_jwt_extended import create_access_token
+from werkzeug.serving import make_server
+from api.v1.app import create_app
+from api.v1.config import TestConfig, config_dict
+from models.base_model import db
+from models.user import User
+from models.task import Task
+
+PASSWORD = 'storm-password'
+
+
+def start_server(hash_workers, db_path):
+    """Serve a fresh app on a free port and return (server, token, email)."""
+    class StormConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        PASSWORD_HASH_WORKERS = hash_workers
+
+    config_dict['login-storm'] = StormConfig
+    app = create_app(config_name='login-storm')
+    logging.getLogger().setLevel(logging.ERROR)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(name='Storm', username='storm', email='storm@example.com')
+        user.set_password(PASSWORD)
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all(Task(title=f'Task {i}', user_id=user.id) for i in range(50))
+        db.session.commit()
+        token = create_access_token(identity=str(user.id), additional_claims=user.token_claims())
+        email = user.email
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, token, email
+
+
+def request(port, method, path, body=None, headers=None):
+    """Send one request and return (status, latency in ms)."""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    start = time.perf_counter()
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response.status, (time.perf_counter() - start) * 1000
+
+
+def run_clients(port, token, email, logins, readers, duration):
+    """Run login and reader clients for `duration` seconds."""
+    stop = time.perf_counter() + duration
+    login_statuses, reader_latencies = [], []
+    login_body = json.dumps({'email': email, 'password': PASSWORD})
+
+    def login_client():
+        while time.perf_counter() < stop:
+            status, _ = request(port, 'POST', '/api/v1/auth/login', login_body,
+                                {'Content-Type': 'application/json'})
+            login_statuses.append(status)
+
+    def reader_client():
+        while time.perf_counter() < stop:
+            status, latency = request(port, 'GET', '/api/v1/task/tasks?limit=20', None,
+                                      {'Authorization': f'Bearer {token}'})
+            assert status == 200, status
+            reader_latencies.append(latency)
+
+    threads = [threading.Thread(target=login_client) for _ in range(logins)]
+    threads += [threading.Thread(target=reader_client) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return login_statuses, sorted(reader_latencies)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per scenario')
+    parser.add_argument('--logins', type=int, default=16, help='Concurrent login clients')
+    parser.add_argument('--readers', type=int, default=4, help='Concurrent reader clients')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help='PASSWORD_HASH_WORKERS for the pooled scenario')
+    args = parser.parse_args()
+
+    scenarios = [
+        ('no storm', 0, 0),
+        ('storm, inline hashing', 0, args.logins),
+        (f'storm, pool of {args.workers}', args.workers, args.logins),
+    ]
+    print(f"{'scenario':<24} {'logins/s':>9} {'503s':>6} {'reads/s':>8} {'read p50':>9} {'read p99':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, hash_workers, logins in scenarios:
+            server, token, email = start_server(hash_workers, os.path.join(tmp, 'storm.db'))
+            try:
+                statuses, latencies = run_clients(
+                    server.server_port, token, email, logins, args.readers, args.duration
+                )
+            finally:
+                server.shutdown()
+            ok_logins = sum(1 for status in statuses if status == 200)
+            shed = sum(1 for status in statuses if status == 503)
+            print(f"{name:<24} {ok_logins / args.duration:>9.1f} {shed:>6} "
+                  f"{len(latencies) / args.duration:>8.1f} "
+                  f"{statistics.median(latencies) if latencies else float('nan'):>9.1f} "
+                  f"{percentile(latencies, 0.99):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
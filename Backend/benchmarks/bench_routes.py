@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+    End-to-end benchmark of the API routes, for comparison across commits.
+
+    Drives the routes of every blueprint (auth, task, progress, analytics,
+    admin) as a sample of the users of a generated dataset (see
+    benchmarks.generate_data), through the Flask test client or against a
+    running server such as a local gunicorn, and reports the throughput and
+    the p50/p95/p99 latencies per route as JSON. Each route runs on its own,
+    --concurrency clients at a time; the sample mixes random users with the
+    heaviest ones so that the long tail shows in the percentiles.
+
+    The runner mints the tokens itself, so a server must share its database
+    and JWT_SECRET_KEY, e.g.:
+        DATABASE_URL=sqlite:////tmp/bench.db gunicorn -w 4 "api.v1.app:create_app('production')"
+
+    `compare` prints the change per route between two reports and exits with
+    status 1 when a route got slower than --threshold percent.
+
+    Usage:
+        python -m benchmarks.bench_routes run --database-url sqlite:///bench.db [--url http://127.0.0.1:8000] [--requests 200] [--concurrency 1] [--output HEAD.json]
+        python -m benchmarks.bench_routes compare BASE.json HEAD.json [--threshold 10]
+"""
+import argparse
+import http.client
+import json
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func, select
+from benchmarks.generate_data import DEFAULT_DATABASE_URL, DEFAULT_PASSWORD, bench_app, table_counts
+from models.base_model import db
+from models.user import User, UserRole
+from models.task import Task
+from models.progress import Progress
+
+PERCENTILES = (50, 95, 99)
+
+
+def _user(user):
+    return user['headers']
+
+
+def _admin(user):
+    return user['admin_headers']
+
+
+# (steps, weight): the steps run in order as one user, each timed as its own
+# route; a step is (method, path template, path builder, body builder, auth).
+# The weight scales --requests for routes that are slow by design.
+SCENARIOS = (
+    ((('GET', '/api/v1/health', None, None, None),), 1.0),
+    ((('POST', '/api/v1/auth/login', None,
+       lambda user: {'email': user['email'], 'password': DEFAULT_PASSWORD}, None),), 0.1),
+    ((('GET', '/api/v1/auth/profile', None, None, _user),), 1.0),
+    ((('GET', '/api/v1/auth/me', None, None, _user),), 1.0),
+    ((('GET', '/api/v1/task/tasks?limit=50', None, None, _user),), 1.0),
+    ((('GET', '/api/v1/task/tasks?completed=false&priority=high,medium&sort=deadline&limit=50', None, None, _user),), 1.0),
+    ((('GET', '/api/v1/task/tasks/search?q=report+review&limit=20', None, None, _user),), 1.0),
+    ((('POST', '/api/v1/task/tasks', None,
+       lambda user: {'title': 'Benchmark task', 'description': 'Created by bench_routes'}, _user),), 1.0),
+    ((('GET', '/api/v1/progress?limit=50', None, None, _user),), 1.0),
+    ((('GET', '/api/v1/progress/current', None, None, _user),), 1.0),
+    ((('POST', '/api/v1/progress', None, lambda user: {'task_id': user['task_id']}, _user),
+      ('POST', '/api/v1/progress/stop', None, None, _user)), 1.0),
+    ((('GET', '/api/v1/analytics/analytics', None, None, _user),), 1.0),
+    ((('POST', '/api/v1/analytics/analytics', None,
+       lambda user: {'task_id': user['task_id'], 'time_spent': 600}, _user),), 1.0),
+    ((('GET', '/api/v1/admin/users/<user_id>', lambda user: f"/api/v1/admin/users/{user['id']}", None, _admin),), 1.0),
+    # Lists every user: keep it short on large datasets
+    ((('GET', '/api/v1/admin/users', None, None, _admin),), 0.05),
+    ((('GET', '/api/v1/metrics', None, None, _admin),), 0.1),
+)
+
+
+def route_name(method, template):
+    return f"{method} {template}"
+
+
+def sample_users(count):
+    """
+        Pick the users to act as: the heaviest tenth by task count, then users
+        in id (random uuid) order; users with a running timer are skipped so
+        that starting one succeeds. Returns dicts with the user's id, email,
+        one of its task ids and auth headers for it and for an admin.
+    """
+    idle = ~select(Progress.id).where(Progress.user_id == User.id, Progress.end_time.is_(None)).exists()
+    task_count = func.count(Task.id).label('task_count')
+    with_tasks = (select(User.id, User.email, User.role_version, task_count)
+                  .join(Task, Task.user_id == User.id)
+                  .where(idle, User.role == UserRole.USER)
+                  .group_by(User.id, User.email, User.role_version))
+    heavy = db.session.execute(with_tasks.order_by(task_count.desc()).limit(max(1, count // 10))).all()
+    chosen = {row.id for row in heavy}
+    others = db.session.execute(with_tasks.order_by(User.id).limit(count)).all()
+    rows = (heavy + [row for row in others if row.id not in chosen])[:count]
+
+    admin = db.session.scalars(select(User).where(User.role == UserRole.ADMIN).limit(1)).first()
+    if admin is None or not rows:
+        raise SystemExit("No generated data found; run python -m benchmarks.generate_data first")
+    admin_token = create_access_token(identity=str(admin.id), additional_claims=admin.token_claims())
+    users = []
+    for row in rows:
+        claims = {'role': UserRole.USER.value, 'role_version': row.role_version}
+        token = create_access_token(identity=str(row.id), additional_claims=claims)
+        users.append({
+            'id': str(row.id),
+            'email': row.email,
+            'task_id': str(db.session.scalar(select(Task.id).where(Task.user_id == row.id).limit(1))),
+            'task_count': row.task_count,
+            'headers': {'Authorization': f"Bearer {token}"},
+            'admin_headers': {'Authorization': f"Bearer {admin_token}"},
+        })
+    return users
+
+
+class ClientTarget:
+    """Sends the requests through the Flask test client, in process."""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+        self.name = 'test-client'
+
+    def request(self, method, path, body, headers):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        return client.open(path, method=method, json=body, headers=headers).status_code
+
+
+class HTTPTarget:
+    """Sends the requests to a running server, one keep-alive connection per client."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.local = threading.local()
+        self.name = url
+
+    def request(self, method, path, body, headers):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            connection = getattr(self.local, 'connection', None)
+            if connection is None:
+                connection = self.local.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, OSError):
+                # The server closed the idle connection; retry once on a new one
+                connection.close()
+                self.local.connection = None
+                if attempt:
+                    raise
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an ordered list."""
+    if not ordered:
+        return None
+    return ordered[max(0, -(-len(ordered) * q // 100) - 1)]
+
+
+def summarize(latencies, statuses, seconds):
+    """Throughput, percentiles (ms) and errors of one route."""
+    ordered = sorted(latencies)
+    summary = {
+        'requests': len(ordered),
+        'errors': sum(1 for status in statuses if status >= 400),
+        'statuses': {str(status): statuses.count(status) for status in sorted(set(statuses))},
+        'throughput_rps': round(len(ordered) / seconds, 2) if seconds else None,
+        'mean_ms': round(sum(ordered) / len(ordered), 3) if ordered else None,
+    }
+    for q in PERCENTILES:
+        value = percentile(ordered, q)
+        summary[f'p{q}_ms'] = round(value, 3) if value is not None else None
+    return summary
+
+
+def run_scenario(target, steps, users, requests, concurrency):
+    """Run one scenario `requests` times over `concurrency` clients; returns {route: summary}."""
+    timings = {index: ([], []) for index in range(len(steps))}
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client(own_users):
+        # Each client has its own users, so a user never runs two steps at once
+        position = 0
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    return
+            user = own_users[position % len(own_users)]
+            position += 1
+            for index, (method, template, build_path, build_body, auth) in enumerate(steps):
+                path = build_path(user) if build_path else template
+                body = build_body(user) if build_body else None
+                start = time.perf_counter()
+                status = target.request(method, path, body, auth(user) if auth else {})
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    timings[index][0].append(elapsed)
+                    timings[index][1].append(status)
+
+    concurrency = max(1, min(concurrency, len(users)))
+    threads = [threading.Thread(target=client, args=(users[number::concurrency],)) for number in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    return {
+        route_name(method, template): summarize(*timings[index], seconds)
+        for index, (method, template, *_) in enumerate(steps)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(app, target, requests=200, concurrency=1, users=20, warmup=5):
+    """
+        Benchmark every scenario against target (within an app context)
+        Arguments:
+            - app: The app on the benchmark database, used to pick users and mint tokens
+            - target: A ClientTarget or HTTPTarget
+            - requests: Requests per route (scaled down by the scenario weight)
+            - concurrency: Concurrent clients per route
+            - users: Number of users to act as
+            - warmup: Untimed requests per route first
+        Returns:
+            - The report: commit, target, dataset size and {route: summary}
+    """
+    sample = sample_users(users)
+    report = {
+        'commit': git_commit(),
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'target': target.name,
+        'database': db.engine.dialect.name,
+        'dataset': table_counts(),
+        'requests': requests,
+        'concurrency': concurrency,
+        'users': len(sample),
+        'routes': {},
+    }
+    for steps, weight in SCENARIOS:
+        if warmup:
+            run_scenario(target, steps, sample, max(1, int(warmup * weight)), 1)
+        report['routes'].update(run_scenario(target, steps, sample, max(1, int(requests * weight)), concurrency))
+    return report
+
+
+def print_report(report, output=sys.stdout):
+    print(f"{'route':<48} {'req':>5} {'err':>4} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}", file=output)
+    for name, route in report['routes'].items():
+        print(f"{name:<48} {route['requests']:>5} {route['errors']:>4} {route['throughput_rps']:>9.1f} "
+              f"{route['p50_ms']:>9.2f} {route['p95_ms']:>9.2f} {route['p99_ms']:>9.2f}", file=output)
+
+
+def compare(base, head, threshold=10.0):
+    """
+        Print the per-route change from base to head
+        Returns:
+            - The routes whose p50 or p95 grew by more than threshold percent
+    """
+    print(f"{base.get('commit')} -> {head.get('commit')}")
+    for key in ('target', 'database', 'dataset', 'concurrency'):
+        if base.get(key) != head.get(key):
+            print(f"Note: the reports differ in {key}: {base.get(key)} vs {head.get(key)}")
+    print(f"{'route':<48} {'p50 ms':>19} {'p95 ms':>19} {'req/s':>19}")
+    slower = []
+    for name, new in head['routes'].items():
+        old = base['routes'].get(name)
+        if old is None:
+            print(f"{name:<48} (new)")
+            continue
+        cells = []
+        for key in ('p50_ms', 'p95_ms', 'throughput_rps'):
+            change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            cells.append(f"{old[key]:>8.2f}>{new[key]:<8.2f}{change:+.0f}%")
+            if key != 'throughput_rps' and change > threshold:
+                slower.append(name)
+        print(f"{name:<48} " + " ".join(f"{cell:>19}" for cell in cells))
+    return sorted(set(slower))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='Benchmark the routes and write a JSON report')
+    run.add_argument('--database-url', default=DEFAULT_DATABASE_URL, help='The database filled by generate_data')
+    run.add_argument('--url', help='Benchmark a running server instead of the test client')
+    run.add_argument('--requests', type=int, default=200, help='Requests per route')
+    run.add_argument('--concurrency', type=int, default=1)
+    run.add_argument('--users', type=int, default=20, help='Users to act as')
+    run.add_argument('--output', help='Write the JSON report to this file')
+    diff = commands.add_parser('compare', help='Compare two JSON reports')
+    diff.add_argument('base')
+    diff.add_argument('head')
+    diff.add_argument('--threshold', type=float, default=10.0, help='Percent slowdown that fails')
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        with open(args.base) as base, open(args.head) as head:
+            slower = compare(json.load(base), json.load(head), args.threshold)
+        if slower:
+            print(f"Slower by more than {args.threshold:g}%: {', '.join(slower)}")
+            sys.exit(1)
+        return
+
+    app = bench_app(args.database_url)
+    target = HTTPTarget(args.url) if args.url else ClientTarget(app)
+    with app.app_context():
+        report = run_benchmarks(app, target, args.requests, args.concurrency, args.users)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
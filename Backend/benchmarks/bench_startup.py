@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+    Benchmark for worker import and startup time.
+
+    Starts fresh interpreters that import api.v1.app and call create_app, with
+    the API docs (flasgger) enabled and disabled, and reports the import time,
+    the create_app time and the slowest packages to import from `python -X importtime`.
+    Exits with status 1 when a run exceeds the --budget-ms startup budget.
+
+    Usage:
+        python -m benchmarks.bench_startup [--config testing] [--repeat 5] [--budget-ms 1500]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPT = """
+import json, logging, time
+start = time.perf_counter()
+from api.v1.app import create_app
+imported = time.perf_counter()
+create_app(config_name={config!r})
+created = time.perf_counter()
+print(json.dumps({{'import_ms': (imported - start) * 1000, 'create_ms': (created - imported) * 1000}}))
+"""
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)')
+
+
+def run_startup(config, docs_enabled):
+    """Time one cold start in a fresh interpreter."""
+    env = dict(os.environ, API_DOCS_ENABLED=str(docs_enabled))
+    result = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT.format(config=config)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(docs_enabled, top):
+    """Return the packages whose modules take the most import time, self time summed per package."""
+    env = dict(os.environ, API_DOCS_ENABLED=str(docs_enabled))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import api.v1.app'],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    totals = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            package = match.group(2).split('.')[0]
+            totals[package] = totals.get(package, 0) + int(match.group(1)) / 1000
+    return sorted(((ms, package) for package, ms in totals.items()), reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--config', default='testing', help='Config name from api.v1.config')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help='Number of slowest imports to list')
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='Fail when the median import + create_app time exceeds this')
+    args = parser.parse_args()
+
+    over_budget = False
+    print(f"{'docs':>5} {'import ms':>10} {'create ms':>10} {'total ms':>10}")
+    for docs_enabled in (True, False):
+        runs = [run_startup(args.config, docs_enabled) for _ in range(args.repeat)]
+        import_ms = statistics.median(run['import_ms'] for run in runs)
+        create_ms = statistics.median(run['create_ms'] for run in runs)
+        total_ms = import_ms + create_ms
+        print(f"{'on' if docs_enabled else 'off':>5} {import_ms:>10.1f} {create_ms:>10.1f} {total_ms:>10.1f}")
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            over_budget = True
+
+    for docs_enabled in (True, False):
+        print(f"\nslowest imports, docs {'on' if docs_enabled else 'off'}:")
+        for self_ms, package in slowest_imports(docs_enabled, args.top):
+            print(f"  {self_ms:>8.1f} ms  {package}")
+
+    if over_budget:
+        print(f"\nstartup exceeded the budget of {args.budget_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
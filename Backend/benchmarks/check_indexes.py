@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+    Check that the API's hot queries are served by their indexes.
+
+    Runs EXPLAIN on the queries behind the task list, task filters, progress
+    timers and analytics lookups, and reports the index each plan uses. Exits
+    with status 1 when a query does not use the index it is expected to.
+    On PostgreSQL sequential scans are disabled for the check, so the result
+    does not depend on how many rows the tables hold.
+
+    Usage:
+        flask --app api.v1.app db upgrade
+        python -m benchmarks.check_indexes [--config development]
+"""
+import argparse
+import json
+import logging
+import re
+import sys
+import uuid
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from api.v1.app import create_app
+from models.base_model import db
+from models.task import Task
+from models.progress import Progress
+from models.analytics import Analytics
+
+
+class explain(Executable, ClauseElement):
+    """EXPLAIN a statement, keeping its bound parameters."""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(explain)
+def _explain_default(element, compiler, **kw):
+    """PostgreSQL: a JSON plan."""
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+@compiles(explain, 'sqlite')
+def _explain_sqlite(element, compiler, **kw):
+    """SQLite: the query plan, one row per step."""
+    return "EXPLAIN QUERY PLAN " + compiler.process(element.statement, **kw)
+
+
+def hot_queries():
+    """Return (name, statement, expected index) for each hot query."""
+    user_id, task_id = uuid.uuid4(), uuid.uuid4()
+    return [
+        ('task list page',
+         select(Task).filter(Task.user_id == user_id).order_by(Task.created_at, Task.id).limit(51),
+         'ix_tasks_user_id_created_at_id'),
+        ('open tasks by deadline',
+         select(Task).filter(Task.user_id == user_id, Task.completed.is_(False)).order_by(Task.deadline),
+         'ix_tasks_user_id_completed_deadline'),
+        ('tasks by last update',
+         select(Task).filter(Task.user_id == user_id).order_by(Task.updated_at.desc(), Task.id.desc()).limit(51),
+         'ix_tasks_user_id_updated_at_id'),
+        ('tasks due in a range',
+         select(Task).filter(Task.user_id == user_id, Task.deadline >= datetime(2026, 1, 1),
+                             Task.deadline < datetime(2026, 2, 1))
+         .order_by(Task.deadline.asc().nulls_last(), Task.id).limit(51),
+         'ix_tasks_user_id_deadline_id'),
+        ('progress page',
+         select(Progress).filter(Progress.user_id == user_id).order_by(Progress.start_time, Progress.id).limit(51),
+         'ix_progress_user_id_start_time'),
+        ('running timer',
+         select(Progress).filter(Progress.user_id == user_id, Progress.end_time.is_(None)),
+         'ux_progress_user_id_running'),
+        ('progress of a task',
+         select(Progress).filter(Progress.task_id == task_id),
+         'ix_progress_task_id'),
+        ('analytics of a task',
+         select(Analytics).filter(Analytics.user_id == user_id, Analytics.task_id == task_id),
+         'ix_analytics_user_id_task_id'),
+    ]
+
+
+def _plan_indexes(connection, statement):
+    """Return the plan text and the names of the indexes it uses."""
+    result = connection.execute(explain(statement))
+    # Read the raw rows: the result is typed with the explained query's columns
+    rows = result.cursor.fetchall()
+    result.close()
+    if connection.dialect.name == 'sqlite':
+        plan = "\n".join(row[-1] for row in rows)
+        return plan, set(re.findall(r'USING (?:COVERING )?INDEX (\w+)', plan))
+
+    plan = rows[0][0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    indexes = set()
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if 'Index Name' in node:
+            indexes.add(node['Index Name'])
+        nodes.extend(node.get('Plans', []))
+    return json.dumps(plan, indent=2), indexes
+
+
+def check_indexes(connection):
+    """
+        EXPLAIN every hot query on a connection
+        Returns:
+            - A list of (name, expected index, used indexes, plan) tuples
+    """
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    results = []
+    for name, statement, expected in hot_queries():
+        plan, used = _plan_indexes(connection, statement)
+        results.append((name, expected, used, plan))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--config', default='development', help='Config name from api.v1.config')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan')
+    args = parser.parse_args()
+
+    app = create_app(config_name=args.config)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    failed = False
+    with app.app_context(), db.engine.connect() as connection:
+        for name, expected, used, plan in check_indexes(connection):
+            ok = expected in used
+            failed = failed or not ok
+            print(f"{'ok' if ok else 'FAIL':<5} {name:<24} expected {expected}, used {sorted(used) or 'no index'}")
+            if args.verbose or not ok:
+                print(plan)
+        connection.rollback()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
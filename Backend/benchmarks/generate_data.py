@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+    Synthetic dataset generator for the benchmarks.
+
+    Fills the users, tasks, progress and analytics tables with a realistic,
+    skewed dataset of about --rows rows (1k to 10M): task counts per user and
+    timer sessions per task follow Pareto distributions, so a few heavy users
+    own most of the history; session lengths are log-normal and activity is
+    concentrated in the last weeks. Rows are bulk inserted per chunk of users,
+    so memory stays flat at any size.
+
+    Every generated user has the password DEFAULT_PASSWORD, the first one is an
+    admin, and about 5% have a running timer. Inserts go through Core, so the
+    ORM events that maintain tasks.total_time_spent do not run; the generator
+    computes the totals itself.
+
+    Usage:
+        python -m benchmarks.generate_data --database-url sqlite:///bench.db [--rows 100000] [--seed 0]
+"""
+import argparse
+import logging
+import math
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from api.v1.app import create_app
+from api.v1.config import TestConfig, config_dict
+from models.base_model import db
+from models.user import User, UserRole
+from models.task import Task
+from models.progress import Progress
+from models.analytics import Analytics
+from utils.password_hashing import hash_password
+
+DEFAULT_DATABASE_URL = 'sqlite:///bench.db'
+DEFAULT_PASSWORD = 'bench-password'
+
+# Average rows generated per user (1 user + ~11 tasks + ~12 sessions + ~1
+# analytics), used to turn --rows into a number of users
+ROWS_PER_USER = 25
+MAX_TASKS_PER_USER = 20000
+MAX_SESSIONS_PER_TASK = 200
+RUNNING_TIMER_SHARE = 0.05
+ANALYTICS_SHARE = 0.3
+HISTORY_DAYS = 365
+
+WORDS = ('report', 'review', 'design', 'meeting', 'invoice', 'release', 'budget', 'client',
+         'sprint', 'backlog', 'email', 'research', 'draft', 'deploy', 'interview', 'training')
+PRIORITIES = (('low', 0.25), ('medium', 0.6), ('high', 0.15))
+TIMEZONES = (('UTC', 0.4), ('Africa/Lagos', 0.2), ('Europe/London', 0.15),
+             ('America/New_York', 0.15), ('Asia/Kolkata', 0.1))
+LANGUAGES = (('en', 0.8), ('fr', 0.1), ('es', 0.1))
+
+
+def bench_app(database_url=DEFAULT_DATABASE_URL, **settings):
+    """Create the app on database_url, with the schema created if missing."""
+    class BenchConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = database_url
+        QUERY_CHECKS_ENABLED = False
+        LOG_LEVEL = 'WARNING'
+
+    for name, value in settings.items():
+        setattr(BenchConfig, name, value)
+    config_dict['bench'] = BenchConfig
+    app = create_app(config_name='bench')
+    logging.getLogger().setLevel(logging.WARNING)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _choice(rng, weighted):
+    values, weights = zip(*weighted)
+    return rng.choices(values, weights)[0]
+
+
+def _days_ago(rng):
+    """Most activity is recent: exponential with a 45 day mean, capped at a year."""
+    return min(rng.expovariate(1 / 45), HISTORY_DAYS)
+
+
+def task_count(rng):
+    """Tasks of one user: Pareto, at least 3, mean about 11 (capped)."""
+    return min(int(3 * rng.paretovariate(1.3)), MAX_TASKS_PER_USER)
+
+
+def session_count(rng):
+    """Timer sessions of one task: 0 for about two thirds of the tasks, long tail."""
+    return min(int(rng.paretovariate(1.5)) - 1, MAX_SESSIONS_PER_TASK)
+
+
+def session_seconds(rng):
+    """Length of one timer session: log-normal around 25 minutes, at most 8 hours."""
+    return max(60, min(int(rng.lognormvariate(math.log(1500), 0.9)), 8 * 3600))
+
+
+def generate_user(rng, index, tag, password_hash, now):
+    """Return the rows (user, tasks, progress, analytics) of one user."""
+    user_id = uuid.uuid4()
+    joined = now - timedelta(days=HISTORY_DAYS + rng.random() * 365)
+    user = {
+        'id': user_id,
+        'created_at': joined,
+        'updated_at': joined,
+        'name': f"Bench User {index}",
+        'username': f"bench_{tag}_{index}",
+        'email': f"bench_{tag}_{index}@example.com",
+        'password_hash': password_hash,
+        'timezone': _choice(rng, TIMEZONES),
+        'language': _choice(rng, LANGUAGES),
+        'email_verified': rng.random() < 0.8,
+        'role': UserRole.ADMIN if index == 0 else UserRole.USER,
+        'role_version': 1,
+    }
+
+    tasks, progress, analytics = [], [], []
+    for number in range(task_count(rng)):
+        task_id = uuid.uuid4()
+        created = now - timedelta(days=_days_ago(rng) + 1)
+        total = 0
+        start = created
+        for _ in range(session_count(rng)):
+            start = start + timedelta(minutes=rng.randint(5, 3 * 24 * 60))
+            if start >= now:
+                break
+            seconds = session_seconds(rng)
+            total += seconds
+            progress.append({
+                'id': uuid.uuid4(),
+                'created_at': start,
+                'updated_at': start,
+                'user_id': user_id,
+                'task_id': task_id,
+                'start_time': start,
+                'end_time': start + timedelta(seconds=seconds),
+                'duration': timedelta(seconds=seconds),
+            })
+        tasks.append({
+            'id': task_id,
+            'created_at': created,
+            'updated_at': start,
+            'title': f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} {number}",
+            'description': f"Synthetic task {number} of user {index}",
+            'priority': _choice(rng, PRIORITIES),
+            'deadline': created + timedelta(days=rng.randint(1, 60)) if rng.random() < 0.4 else None,
+            # Older tasks are more likely to be done
+            'completed': rng.random() < min(0.9, (now - created).days / 60),
+            'total_time_spent': timedelta(seconds=total),
+            'user_id': user_id,
+        })
+        if total and rng.random() < ANALYTICS_SHARE:
+            analytics.append({
+                'id': uuid.uuid4(),
+                'created_at': start,
+                'updated_at': start,
+                'user_id': user_id,
+                'task_id': task_id,
+                'total_time_spent': timedelta(seconds=total),
+            })
+
+    if tasks and rng.random() < RUNNING_TIMER_SHARE:
+        started = now - timedelta(minutes=rng.randint(1, 120))
+        progress.append({
+            'id': uuid.uuid4(),
+            'created_at': started,
+            'updated_at': started,
+            'user_id': user_id,
+            'task_id': rng.choice(tasks)['id'],
+            'start_time': started,
+            'end_time': None,
+            'duration': None,
+        })
+    return user, tasks, progress, analytics
+
+
+def generate(rows=None, users=None, seed=None, chunk_users=500, password=DEFAULT_PASSWORD, verbose=False):
+    """
+        Bulk insert a synthetic dataset (within an app context)
+        Arguments:
+            - rows: Approximate total number of rows to generate
+            - users: Number of users instead of rows
+            - seed: Seed of the random generator, for a reproducible dataset
+            - chunk_users: Users generated and inserted per transaction
+            - password: The password of every generated user
+            - verbose: Print the progress after each transaction
+        Returns:
+            - The number of rows inserted per table
+    """
+    if users is None:
+        users = max(1, (rows or 1000) // ROWS_PER_USER)
+    rng = random.Random(seed)
+    # Each run gets its own usernames, so a database can be topped up
+    tag = uuid.uuid4().hex[:8]
+    password_hash = hash_password(password)
+    now = datetime.utcnow()
+    counts = {'users': 0, 'tasks': 0, 'progress': 0, 'analytics': 0}
+    models = (('users', User), ('tasks', Task), ('progress', Progress), ('analytics', Analytics))
+
+    for first in range(0, users, chunk_users):
+        batch = {name: [] for name in counts}
+        for index in range(first, min(first + chunk_users, users)):
+            user, tasks, progress, analytics = generate_user(rng, index, tag, password_hash, now)
+            batch['users'].append(user)
+            batch['tasks'].extend(tasks)
+            batch['progress'].extend(progress)
+            batch['analytics'].extend(analytics)
+        for name, model in models:
+            if batch[name]:
+                db.session.execute(model.__table__.insert(), batch[name])
+                counts[name] += len(batch[name])
+        # Core inserts skip the ORM events that maintain the analytics rollup
+        Task.recompute_user_stats(user_ids=[user['id'] for user in batch['users']])
+        db.session.commit()
+        if verbose:
+            print(f"{min(first + chunk_users, users)}/{users} users, {sum(counts.values())} rows")
+    return counts
+
+
+def table_counts():
+    """The current number of rows of the generated tables."""
+    return {
+        name: db.session.scalar(select(func.count()).select_from(model))
+        for name, model in (('users', User), ('tasks', Task), ('progress', Progress), ('analytics', Analytics))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL,
+                        help='Relative SQLite paths are created in the instance folder')
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--rows', type=int, default=100000, help='Approximate total rows (1k to 10M)')
+    size.add_argument('--users', type=int, help='Number of users instead of --rows')
+    parser.add_argument('--seed', type=int, help='Seed for a reproducible dataset')
+    parser.add_argument('--chunk-users', type=int, default=500, help='Users inserted per transaction')
+    args = parser.parse_args()
+
+    app = bench_app(args.database_url)
+    with app.app_context():
+        start = time.perf_counter()
+        counts = generate(rows=args.rows, users=args.users, seed=args.seed,
+                          chunk_users=args.chunk_users, verbose=True)
+        elapsed = time.perf_counter() - start
+        total = sum(counts.values())
+        print(f"Inserted {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s): "
+              + ", ".join(f"{name} {count}" for name, count in counts.items()))
+        print("Tables now hold: " + ", ".join(f"{name} {count}" for name, count in table_counts().items()))
+
+
+if __name__ == "__main__":
+    main()
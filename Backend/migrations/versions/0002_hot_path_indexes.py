@@ -0,0 +1,68 @@
+"""hot path indexes and role version
+
+Indexes the foreign keys and the queries the API runs on every request, adds
+the partial unique index that allows one running timer per user, and adds
+users.role_version for the role claims in access tokens.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 17:30:12.418223
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('role_version', sa.Integer(), server_default='1', nullable=False))
+
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.create_index('ix_tasks_user_id_completed_deadline', ['user_id', 'completed', 'deadline'], unique=False)
+        batch_op.create_index('ix_tasks_user_id_created_at_id', ['user_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('analytics', schema=None) as batch_op:
+        batch_op.create_index('ix_analytics_task_id', ['task_id'], unique=False)
+        batch_op.create_index('ix_analytics_user_id_task_id', ['user_id', 'task_id'], unique=False)
+
+    # Before the unique index can be built, close all but the latest running
+    # timer of each user (the old timer API did not prevent duplicates)
+    op.execute(
+        "UPDATE progress SET end_time = start_time "
+        "WHERE end_time IS NULL AND id NOT IN ("
+        "  SELECT id FROM ("
+        "    SELECT id, ROW_NUMBER() OVER ("
+        "      PARTITION BY user_id ORDER BY start_time DESC, id DESC"
+        "    ) AS position FROM progress WHERE end_time IS NULL"
+        "  ) AS running WHERE position = 1"
+        ")"
+    )
+    with op.batch_alter_table('progress', schema=None) as batch_op:
+        batch_op.create_index('ix_progress_task_id', ['task_id'], unique=False)
+        batch_op.create_index('ix_progress_user_id_start_time', ['user_id', 'start_time'], unique=False)
+        batch_op.create_index('ux_progress_user_id_running', ['user_id'], unique=True, postgresql_where=sa.text('end_time IS NULL'), sqlite_where=sa.text('end_time IS NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('progress', schema=None) as batch_op:
+        batch_op.drop_index('ux_progress_user_id_running', postgresql_where=sa.text('end_time IS NULL'), sqlite_where=sa.text('end_time IS NULL'))
+        batch_op.drop_index('ix_progress_user_id_start_time')
+        batch_op.drop_index('ix_progress_task_id')
+
+    with op.batch_alter_table('analytics', schema=None) as batch_op:
+        batch_op.drop_index('ix_analytics_user_id_task_id')
+        batch_op.drop_index('ix_analytics_task_id')
+
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_tasks_user_id_created_at_id')
+        batch_op.drop_index('ix_tasks_user_id_completed_deadline')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('role_version')
@@ -0,0 +1,31 @@
+"""task list sort indexes
+
+Indexes the task list sorted by last update and by deadline, for the sort
+parameter of GET /task/tasks.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 20:14:37.502118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.create_index('ix_tasks_user_id_deadline_id', ['user_id', 'deadline', 'id'], unique=False)
+        batch_op.create_index('ix_tasks_user_id_updated_at_id', ['user_id', 'updated_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_tasks_user_id_updated_at_id')
+        batch_op.drop_index('ix_tasks_user_id_deadline_id')
@@ -0,0 +1,57 @@
+"""user task stats rollup
+
+Adds user_task_stats, the per-user task counters read by
+GET /analytics/analytics (see models/user_task_stats.py), and fills it from
+the existing tasks.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 10:12:48.183402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+BACKFILL = {
+    'postgresql': (
+        "INSERT INTO user_task_stats (user_id, total_tasks, completed_tasks, total_time_spent) "
+        "SELECT users.id, count(tasks.id), count(tasks.id) FILTER (WHERE tasks.completed), "
+        "coalesce(sum(tasks.total_time_spent), interval '0') "
+        "FROM users LEFT OUTER JOIN tasks ON tasks.user_id = users.id GROUP BY users.id"
+    ),
+    # Intervals are DATETIME offsets from the Unix epoch on SQLite
+    'sqlite': (
+        "INSERT INTO user_task_stats (user_id, total_tasks, completed_tasks, total_time_spent) "
+        "SELECT users.id, count(tasks.id), count(CASE WHEN tasks.completed THEN 1 END), "
+        "strftime('%Y-%m-%d %H:%M:%f', coalesce(sum("
+        "CAST(strftime('%s', tasks.total_time_spent) AS REAL) "
+        "+ strftime('%f', tasks.total_time_spent) - CAST(strftime('%S', tasks.total_time_spent) AS INTEGER)"
+        "), 0), 'unixepoch') "
+        "FROM users LEFT OUTER JOIN tasks ON tasks.user_id = users.id GROUP BY users.id"
+    ),
+}
+
+
+def upgrade():
+    op.create_table('user_task_stats',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('total_tasks', sa.Integer(), nullable=False),
+    sa.Column('completed_tasks', sa.Integer(), nullable=False),
+    sa.Column('total_time_spent', sa.Interval(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    backfill = BACKFILL.get(op.get_bind().dialect.name)
+    if backfill:
+        op.execute(backfill)
+
+
+def downgrade():
+    op.drop_table('user_task_stats')
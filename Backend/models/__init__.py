@@ -4,6 +4,9 @@
 """
 from .base_model import db
 from .user import User
+from .user_task_stats import UserTaskStats
 from .task import Task
 from .progress import Progress
-from .analytics import Analytics
\ No newline at end of file
+from .analytics import Analytics
+from .email_outbox import OutboxEmail
+from .task_search import search_tasks
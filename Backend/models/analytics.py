@@ -10,6 +10,12 @@ class Analytics(BaseModel):
         This Model is used for keeping the analytics of a user of the total time spent on a task
     """
     __tablename__ = 'analytics'
+    __table_args__ = (
+        # Per-user (and per-task) analytics lookups; user_id leads so it also covers the FK
+        db.Index('ix_analytics_user_id_task_id', 'user_id', 'task_id'),
+        # Nulling task_id when tasks are deleted
+        db.Index('ix_analytics_task_id', 'task_id'),
+    )
 
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     task_id = db.Column(UUID(as_uuid=True), db.ForeignKey('tasks.id'), nullable=True)
@@ -10,15 +10,44 @@ import uuid
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import UUID
+from operator import attrgetter
+import enum
 import logging
+from models.session import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Per-request CRUD logging; level and sampling are set by the LOG_LEVELS and
+# LOG_SAMPLING config for "models.base_model"
+logger = logging.getLogger(__name__)
+
+
+def _datetime_to_json(value):
+    """Serialize a datetime column value."""
+    return value.isoformat() if value is not None else str(value)
+
+
+def _enum_to_json(value):
+    """Serialize a Python enum column value by its value."""
+    return value.value if isinstance(value, enum.Enum) else str(value)
+
+
+def _converter_for(column):
+    """Pick the to_json converter for a column from its type."""
+    if isinstance(column.type, db.DateTime):
+        return _datetime_to_json
+    if isinstance(column.type, db.Enum) and column.type.enum_class is not None:
+        return _enum_to_json
+    return str
 
 
 class BaseModel(db.Model):
     """Abstract base model with UUID primary key and common fields."""
     __abstract__ = True # This Prevents the table creation
 
+    # Columns that are never included by to_json
+    _serialize_exclude = frozenset({'password_hash'})
+
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -27,9 +56,9 @@ class BaseModel(db.Model):
         """Save the instance to the database."""
         try:
             db.session.commit()
-            logging.info(f"Saved {self} to the database.")
+            logger.info("Saved %s to the database.", self)
         except Exception as e:
-            logging.error(f"Error saving {self}: {e}")
+            logger.error("Error saving %s: %s", self, e)
             db.session.rollback()
 
     def delete(self, obj=None):
@@ -40,9 +69,9 @@ class BaseModel(db.Model):
             else:
                 db.session.delete(obj)
             db.session.commit()
-            logging.info(f"Deleted {self} from the database.")
+            logger.info("Deleted %s from the database.", self)
         except Exception as e:
-            logging.error(f"Error deleting {self}: {e}")
+            logger.error("Error deleting %s: %s", self, e)
             db.session.rollback()
     
     def new(self, obj=None):
@@ -52,9 +81,9 @@ class BaseModel(db.Model):
                 db.session.add(self)
             else:
                 db.session.add(obj)
-            logging.info(f"Added new instance: {obj or self}")
+            logger.info("Added new instance: %s", obj or self)
         except Exception as e:
-            logging.error(f"Error adding object: {e}")
+            logger.error("Error adding object: %s", e)
 
     @classmethod
     def get(cls, **kwargs):
@@ -63,11 +92,11 @@ class BaseModel(db.Model):
         try:
             instance = cls.query.filter_by(**kwargs).first()
             if instance:
-                logging.debug(f"Retrieved instance {instance} using filter {kwargs}")
+                logger.debug("Retrieved instance %s using filter %s", instance, kwargs)
             else:
-                logging.debug(f"No instance found for {cls.__name__} with filter {kwargs}")
+                logger.debug("No instance found for %s with filter %s", cls.__name__, kwargs)
         except Exception as e:
-            logging.exception(f"Error retrieving {cls.__name__} object from the database with filter {kwargs}") 
+            logger.exception("Error retrieving %s object from the database with filter %s", cls.__name__, kwargs) 
         return instance
 
     @classmethod
@@ -75,22 +104,39 @@ class BaseModel(db.Model):
         """Return all records of the model."""
         return cls.query.all()
 
-    def to_json(self):
-        """Convert the model instance to a JSON-friendly dictionary."""
-        from models.user import UserRole
-        result = {}
-        for column in self.__table__.columns:
-            if column.name == 'password_hash':
+    def to_json(self, include=None, exclude=None):
+        """
+            Convert the model instance to a JSON-friendly dictionary.
+            Arguments:
+                - include: Optional set of column names to keep
+                - exclude: Optional set of column names to drop
+        """
+        serializer = type(self).__dict__.get('_serializer')
+        if serializer is None:
+            serializer = type(self)._build_serializer()
+        if include is not None or exclude is not None:
+            serializer = [
+                field for field in serializer
+                if (include is None or field[0] in include)
+                and (exclude is None or field[0] not in exclude)
+            ]
+        return {name: convert(get(self)) for name, get, convert in serializer}
+
+    @classmethod
+    def _build_serializer(cls):
+        """
+            Precompute the (name, getter, converter) triples used by to_json so
+            columns and their types are inspected once per class, not per row.
+        """
+        mapper = db.inspect(cls)
+        serializer = []
+        for column in cls.__table__.columns:
+            if column.name in cls._serialize_exclude:
                 continue
-            value = getattr(self, column.name)
-            if isinstance(value, UserRole):
-                value = value.value
-            elif isinstance(value, datetime):
-                value = value.isoformat()
-            else:
-                value = str(value)
-            result[column.name] = value
-        return result
+            key = mapper.get_property_by_column(column).key
+            serializer.append((column.name, attrgetter(key), _converter_for(column)))
+        cls._serializer = serializer
+        return serializer
 
     def __str__(self):
         """Return a string representation of the model instance."""
@@ -99,3 +145,9 @@ class BaseModel(db.Model):
     def __repr__(self):
         """Return a developer-friendly string representation."""
         return self.__str__()
+
+
+@db.event.listens_for(BaseModel, 'mapper_configured', propagate=True)
+def _compile_serializer(mapper, cls):
+    """Build each model's serializer as soon as its mapper is configured."""
+    cls._build_serializer()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the Email Outbox Database Model
+"""
+from .base_model import db, BaseModel
+from datetime import datetime
+import enum
+
+
+class EmailStatus(enum.Enum):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+
+class OutboxEmail(BaseModel):
+    """
+        An email waiting to be delivered by the background sender
+        (see utils/email_outbox.py). Requests only insert rows here.
+    """
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        # The sender's poll: pending emails that are due, oldest first
+        db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    subject = db.Column(db.String(255), nullable=False)
+    recipients = db.Column(db.JSON, nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.Enum(EmailStatus), default=EmailStatus.PENDING, nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.Text)
+    sent_at = db.Column(db.DateTime)
+
+    def __str__(self):
+        return f"<OutboxEmail {self.id} to {self.recipients} - {self.status.value}>"
@@ -11,12 +11,27 @@ class Progress(BaseModel):
         This Model is used for keeping track of each user with their tasks
     """
     __tablename__ = 'progress'
+    __table_args__ = (
+        db.Index('ix_progress_user_id_start_time', 'user_id', 'start_time'),
+        db.Index('ix_progress_task_id', 'task_id'),
+        # At most one running timer (end_time IS NULL) per user, enforced by the database
+        db.Index(
+            'ux_progress_user_id_running', 'user_id', unique=True,
+            postgresql_where=db.text('end_time IS NULL'),
+            sqlite_where=db.text('end_time IS NULL')
+        ),
+    )
 
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
-    task_id = db.Column(UUID(as_uuid=True), db.ForeignKey('tasks.id'), nullable=False)
+    # active_history loads the previous value on change so the task's
+    # total_time_spent can be adjusted by the exact delta (see models/task.py)
+    task_id = db.column_property(
+        db.Column(UUID(as_uuid=True), db.ForeignKey('tasks.id'), nullable=False),
+        active_history=True
+    )
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
     end_time = db.Column(db.DateTime, nullable=True)
-    duration = db.Column(db.Interval, nullable=True)
+    duration = db.column_property(db.Column(db.Interval, nullable=True), active_history=True)
 
     # Relationship
     user = db.relationship('User', back_populates="progress")
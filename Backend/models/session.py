@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+    This module contains the session class used by the TimeWise database.
+
+    When a read replica is configured (SQLALCHEMY_REPLICA_URI), reads in a
+    request marked read-only are sent to the replica. As soon as the session
+    writes, or a read needs a row lock, the rest of the request uses the
+    primary so it reads its own writes.
+"""
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+
+# Kept out of SQLALCHEMY_BINDS: a bind would add a metadata to the shared `db`
+# that create_all() then expects every app to have an engine for
+REPLICA_EXTENSION_KEY = 'sqlalchemy_replica'
+
+
+class RoutingSession(Session):
+    """Session that routes read-only work to the replica, if any."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            replica = replica_engine()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        """Whether the statement being executed may be served by the replica."""
+        if not self.info.get('read_replica') or self.info.get('wrote') or self._flushing:
+            return False
+        if clause is None:
+            return False
+        if getattr(clause, 'is_dml', False) or getattr(clause, '_for_update_arg', None) is not None:
+            # Writes and locking reads go to the primary; stay there afterwards
+            self.info['wrote'] = True
+            return False
+        return getattr(clause, 'is_select', False)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _pin_to_primary(session, flush_context):
+    """Read-your-writes: once a request has flushed, stop reading from the replica."""
+    session.info['wrote'] = True
+
+
+def init_replica(app, uri, **engine_options):
+    """
+        Create the read replica engine for an app
+        Arguments:
+            - app: The Flask app
+            - uri: The replica database URI
+            - engine_options: create_engine keyword arguments
+        Returns:
+            - The replica engine
+    """
+    engine = create_engine(uri, **engine_options)
+    app.extensions[REPLICA_EXTENSION_KEY] = engine
+    return engine
+
+
+def replica_engine(app=None):
+    """Return the app's replica engine, or None when none is configured."""
+    return (app or current_app).extensions.get(REPLICA_EXTENSION_KEY)
+
+
+def route_reads_to_replica(session, enabled):
+    """
+        Enable or disable replica reads for the current request
+        Arguments:
+            - session: The scoped or plain session
+            - enabled: True for read-only requests
+    """
+    session.info['read_replica'] = enabled
+    session.info.pop('wrote', None)
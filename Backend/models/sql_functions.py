@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+    This Module contains dialect-aware SQL expressions used by the models.
+
+    PostgreSQL stores `db.Interval` columns as native INTERVALs, while SQLite
+    (used in tests and development) stores them as a DATETIME offset from the
+    Unix epoch. These helpers compile to the right SQL for each backend so
+    interval arithmetic can stay in the database.
+"""
+from sqlalchemy import Float, Interval
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+
+class interval_seconds(FunctionElement):
+    """Convert an Interval expression into a number of seconds."""
+    type = Float()
+    inherit_cache = True
+    name = 'interval_seconds'
+
+
+@compiles(interval_seconds)
+def _interval_seconds_default(element, compiler, **kw):
+    """PostgreSQL: read the epoch of the interval."""
+    return "EXTRACT(EPOCH FROM %s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(interval_seconds, 'sqlite')
+def _interval_seconds_sqlite(element, compiler, **kw):
+    """SQLite: whole seconds since the epoch plus the millisecond fraction."""
+    expr = compiler.process(element.clauses, **kw)
+    return (
+        "(CAST(strftime('%%s', %(x)s) AS REAL) "
+        "+ strftime('%%f', %(x)s) - CAST(strftime('%%S', %(x)s) AS INTEGER))"
+        % {'x': expr}
+    )
+
+
+class seconds_interval(FunctionElement):
+    """Convert a number of seconds into an Interval expression."""
+    type = Interval()
+    inherit_cache = True
+    name = 'seconds_interval'
+
+
+@compiles(seconds_interval)
+def _seconds_interval_default(element, compiler, **kw):
+    """PostgreSQL: build a native interval."""
+    return "make_interval(secs => %s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(seconds_interval, 'sqlite')
+def _seconds_interval_sqlite(element, compiler, **kw):
+    """SQLite: render the epoch-offset datetime the Interval type expects."""
+    return (
+        "strftime('%%Y-%%m-%%d %%H:%%M:%%f', %s, 'unixepoch')"
+        % compiler.process(element.clauses, **kw)
+    )
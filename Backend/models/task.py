@@ -5,19 +5,33 @@
 from sqlalchemy.dialects.postgresql import UUID
 from .base_model import db, BaseModel
 from datetime import datetime, timedelta
+from sqlalchemy import case, or_, true
 from sqlalchemy.sql import func
 from models.progress import Progress
+from models.sql_functions import interval_seconds, seconds_interval
+from models.user import User
+from models.user_task_stats import UserTaskStats
+import logging
 
 
 class Task(BaseModel):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Backs keyset pagination of a user's task list
+        db.Index('ix_tasks_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        # Open/completed task lists and upcoming deadlines per user
+        db.Index('ix_tasks_user_id_completed_deadline', 'user_id', 'completed', 'deadline'),
+        # Task lists sorted by last update or by deadline (keyset on the id)
+        db.Index('ix_tasks_user_id_updated_at_id', 'user_id', 'updated_at', 'id'),
+        db.Index('ix_tasks_user_id_deadline_id', 'user_id', 'deadline', 'id'),
+    )
 
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.String(500))
     priority = db.Column(db.Enum('low', 'medium', 'high', name='priority_enum'), default='medium')
     deadline = db.Column(db.DateTime, nullable=True)
     completed = db.Column(db.Boolean, default=False)
-    # I would update this soon
+    # Maintained incrementally as progress rows are closed, edited or deleted
     total_time_spent = db.Column(db.Interval, default=timedelta(seconds=0))
 
     # Foreign Key
@@ -25,14 +39,219 @@ class Task(BaseModel):
 
     # Relationship
     user = db.relationship('User', back_populates='tasks')
-    progress = db.relationship('Progress', back_populates='task', uselist=False) # one task -> one progress
+    progress = db.relationship('Progress', back_populates='task') # one task -> many timers
 
     def __str__(self):
         return f"<Task {self.title} - {self.priority} {self.id}>"
     
     def calculate_total_time_spent(self):
-        """Calculate the total time spent on this task based on related progress records."""
-        total_time = db.session.query(func.sum(Progress.duration)).filter_by(task_id=self.id).scalar()
-        self.total_time_spent = total_time or timedelta(seconds=0)
-        self.save()
-        return self.total_time_spent
\ No newline at end of file
+        """
+            Recalculate the total time spent on this task from its progress records.
+            total_time_spent is kept up to date as progress rows change, so this is
+            only needed to repair a single drifted task.
+        """
+        Task.recompute_total_time_spent(task_ids=[self.id])
+        db.session.commit()
+        db.session.refresh(self, ['total_time_spent'])
+        return self.total_time_spent
+
+    @classmethod
+    def recompute_total_time_spent(cls, task_ids=None):
+        """
+            Recompute total_time_spent from progress durations in one set-based UPDATE.
+            Arguments:
+                - task_ids: Optionally restrict the repair to these tasks
+            Returns:
+                - The number of tasks whose total was corrected
+        """
+        tasks = cls.__table__
+        totals = db.select(
+            tasks.c.id.label('task_id'),
+            func.coalesce(
+                func.sum(interval_seconds(Progress.__table__.c.duration)), 0
+            ).label('seconds')
+        ).select_from(
+            tasks.outerjoin(Progress.__table__, Progress.__table__.c.task_id == tasks.c.id)
+        ).group_by(tasks.c.id)
+        if task_ids is not None:
+            totals = totals.where(tasks.c.id.in_(task_ids))
+        totals = totals.subquery('totals')
+
+        result = db.session.execute(
+            tasks.update()
+            .where(tasks.c.id == totals.c.task_id)
+            .where(interval_seconds(tasks.c.total_time_spent).is_distinct_from(totals.c.seconds))
+            .values(total_time_spent=seconds_interval(totals.c.seconds))
+        )
+        logging.info(f"Recomputed total_time_spent for {result.rowcount} task(s)")
+        # The owners' summed time follows the corrected totals
+        owners = None if task_ids is None else db.select(tasks.c.user_id).where(tasks.c.id.in_(task_ids))
+        cls.recompute_user_stats(user_ids=owners)
+        return result.rowcount
+
+    @classmethod
+    def recompute_user_stats(cls, user_ids=None):
+        """
+            Recompute the user_task_stats rollup from the tasks table in one
+            set-based UPDATE, first creating the rows of users that have none.
+            Arguments:
+                - user_ids: Optionally restrict the repair to these users (ids or a SELECT of them)
+            Returns:
+                - The number of users whose counters were corrected
+        """
+        tasks, users, stats = cls.__table__, User.__table__, UserTaskStats.__table__
+        scope = users.c.id.in_(user_ids) if user_ids is not None else true()
+
+        db.session.execute(stats.insert().from_select(
+            ['user_id', 'total_tasks', 'completed_tasks', 'total_time_spent'],
+            db.select(users.c.id, db.literal(0), db.literal(0), seconds_interval(db.literal(0)))
+            .where(scope)
+            .where(~db.select(stats.c.user_id).where(stats.c.user_id == users.c.id).exists())
+        ))
+
+        totals = db.select(
+            users.c.id.label('user_id'),
+            func.count(tasks.c.id).label('tasks'),
+            func.count(case((tasks.c.completed.is_(True), 1))).label('completed'),
+            func.coalesce(func.sum(interval_seconds(tasks.c.total_time_spent)), 0).label('seconds')
+        ).select_from(
+            users.outerjoin(tasks, tasks.c.user_id == users.c.id)
+        ).where(scope).group_by(users.c.id).subquery('totals')
+
+        result = db.session.execute(
+            stats.update()
+            .where(stats.c.user_id == totals.c.user_id)
+            .where(or_(
+                stats.c.total_tasks != totals.c.tasks,
+                stats.c.completed_tasks != totals.c.completed,
+                # Intervals are stored to the millisecond on SQLite
+                func.abs(interval_seconds(stats.c.total_time_spent) - totals.c.seconds) >= 0.001
+            ))
+            .values(
+                total_tasks=totals.c.tasks,
+                completed_tasks=totals.c.completed,
+                total_time_spent=seconds_interval(totals.c.seconds)
+            )
+        )
+        logging.info(f"Recomputed task stats for {result.rowcount} user(s)")
+        return result.rowcount
+
+
+def apply_task_totals(connection, condition, remove=False):
+    """
+        Add the tasks matching condition to their owners' user_task_stats, or
+        remove them. The counts and times are read from the task rows in SQL,
+        so a change is applied by removing the rows before it and adding them
+        back after it.
+        Arguments:
+            - connection: The connection of the transaction making the change
+            - condition: A WHERE clause on the tasks table
+            - remove: Subtract the tasks instead of adding them
+    """
+    tasks, stats = Task.__table__, UserTaskStats.__table__
+    totals = db.select(
+        tasks.c.user_id,
+        func.count().label('tasks'),
+        func.count(case((tasks.c.completed.is_(True), 1))).label('completed'),
+        func.coalesce(func.sum(interval_seconds(tasks.c.total_time_spent)), 0).label('seconds')
+    ).where(condition).group_by(tasks.c.user_id).subquery('totals')
+
+    sign = -1 if remove else 1
+    connection.execute(
+        stats.update()
+        .where(stats.c.user_id == totals.c.user_id)
+        .values(
+            total_tasks=stats.c.total_tasks + sign * totals.c.tasks,
+            completed_tasks=stats.c.completed_tasks + sign * totals.c.completed,
+            total_time_spent=seconds_interval(
+                interval_seconds(stats.c.total_time_spent) + sign * totals.c.seconds
+            )
+        )
+    )
+
+
+def _add_time_spent(connection, task_id, delta):
+    """Atomically add `delta` to a task's total_time_spent without reading it first."""
+    if task_id is None or not delta:
+        return
+    tasks = Task.__table__
+    connection.execute(
+        tasks.update()
+        .where(tasks.c.id == task_id)
+        .values(total_time_spent=seconds_interval(
+            func.coalesce(interval_seconds(tasks.c.total_time_spent), 0)
+            + delta.total_seconds()
+        ))
+    )
+    stats = UserTaskStats.__table__
+    connection.execute(
+        stats.update()
+        .where(stats.c.user_id == db.select(tasks.c.user_id).where(tasks.c.id == task_id).scalar_subquery())
+        .values(total_time_spent=seconds_interval(
+            interval_seconds(stats.c.total_time_spent) + delta.total_seconds()
+        ))
+    )
+
+
+# Columns counted by user_task_stats; ORM changes to them move the task's
+# contribution (removed before the UPDATE, added back after it)
+_COUNTED_ATTRIBUTES = ('user_id', 'completed', 'total_time_spent')
+
+
+def _counted_change(target):
+    state = db.inspect(target)
+    return any(state.attrs[name].history.has_changes() for name in _COUNTED_ATTRIBUTES)
+
+
+@db.event.listens_for(Task, 'after_insert')
+def _task_inserted(mapper, connection, target):
+    apply_task_totals(connection, Task.__table__.c.id == target.id)
+
+
+@db.event.listens_for(Task, 'before_update')
+def _task_updating(mapper, connection, target):
+    if _counted_change(target):
+        apply_task_totals(connection, Task.__table__.c.id == target.id, remove=True)
+
+
+@db.event.listens_for(Task, 'after_update')
+def _task_updated(mapper, connection, target):
+    if _counted_change(target):
+        apply_task_totals(connection, Task.__table__.c.id == target.id)
+
+
+@db.event.listens_for(Task, 'before_delete')
+def _task_deleting(mapper, connection, target):
+    apply_task_totals(connection, Task.__table__.c.id == target.id, remove=True)
+
+
+@db.event.listens_for(Progress, 'after_insert')
+def _progress_inserted(mapper, connection, target):
+    """Count the duration of a progress row that is created already closed."""
+    _add_time_spent(connection, target.task_id, target.duration)
+
+
+@db.event.listens_for(Progress, 'after_update')
+def _progress_updated(mapper, connection, target):
+    """Apply the change in duration when a progress row is closed or edited."""
+    state = db.inspect(target)
+    duration = state.attrs.duration.history
+    task_id = state.attrs.task_id.history
+    if not duration.has_changes() and not task_id.has_changes():
+        return
+
+    old_duration = duration.deleted[0] if duration.deleted else target.duration
+    old_task_id = task_id.deleted[0] if task_id.deleted else target.task_id
+    if old_task_id == target.task_id:
+        _add_time_spent(connection, target.task_id,
+                        (target.duration or timedelta()) - (old_duration or timedelta()))
+    else:
+        _add_time_spent(connection, old_task_id, -(old_duration or timedelta()))
+        _add_time_spent(connection, target.task_id, target.duration)
+
+
+@db.event.listens_for(Progress, 'after_delete')
+def _progress_deleted(mapper, connection, target):
+    """Remove the duration of a deleted progress row from its task."""
+    if target.duration:
+        _add_time_spent(connection, target.task_id, -target.duration)
\ No newline at end of file
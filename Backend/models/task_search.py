@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the full-text search over task titles and descriptions.
+
+    PostgreSQL matches the words of the query against
+    to_tsvector('english', title || ' ' || description), served by the GIN
+    expression index ix_tasks_search (migration 0005), and ranks with
+    ts_rank_cd. SQLite (tests and development) uses the FTS5 table tasks_fts,
+    an external-content index of the tasks table kept in sync by triggers, and
+    ranks with bm25. Both stem English words, and results are ordered by rank
+    and paginated with a (rank, id) cursor.
+
+    On SQLite the FTS table follows tasks by rowid: a migration that recreates
+    the tasks table (batch_alter_table copies) must recreate the triggers and
+    rebuild the index, as migration 0005 does.
+"""
+import re
+from sqlalchemy import Float, and_, cast, column, event, func, literal_column, or_, select, table, text
+from .base_model import db
+from .task import Task
+from utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+SEARCH_LANGUAGE = 'english'
+MAX_QUERY_LENGTH = 200
+
+# Rendered as constants, not bound parameters, so that PostgreSQL matches the
+# expression of the ix_tasks_search index
+TASK_DOCUMENT = literal_column(
+    f"to_tsvector('{SEARCH_LANGUAGE}', coalesce(tasks.title, '') || ' ' || coalesce(tasks.description, ''))"
+)
+
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+    "title, description, content='tasks', content_rowid='rowid', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+    "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+)
+
+tasks_fts = table('tasks_fts', column('rowid'))
+
+
+@event.listens_for(Task.__table__, 'after_create')
+def _create_sqlite_fts(target, connection, **kw):
+    """db.create_all() (tests, benchmarks) builds the FTS5 index along with tasks."""
+    if connection.dialect.name == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Task.__table__, 'before_drop')
+def _drop_sqlite_fts(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql("DROP TABLE IF EXISTS tasks_fts")
+
+
+def search_terms(query):
+    """The words of a search query, or [] when it has none."""
+    return re.findall(r'\w+', query or '')
+
+
+def _sqlite_match(terms):
+    """An FTS5 query matching every term; quoting keeps user input from being parsed as syntax."""
+    return ' '.join('"%s"' % term.replace('"', '""') for term in terms)
+
+
+def search_tasks(user_id, query, limit, cursor=None):
+    """
+        Find the user's tasks matching a text query, best matches first
+        Arguments:
+            - user_id: The owner of the tasks
+            - query: The words to look for (every word must match)
+            - limit: The page size
+            - cursor: The next_cursor returned with the previous page, if any
+        Returns:
+            - A (tasks, next_cursor) tuple; next_cursor is None on the last page
+        Raises:
+            - InvalidCursorError for a malformed cursor
+    """
+    dialect = db.session.get_bind(mapper=Task.__mapper__).dialect.name
+    if dialect == 'sqlite':
+        # bm25 is lower for better matches; negate it so that higher is better everywhere
+        rank = (-func.bm25(literal_column('tasks_fts'))).label('rank')
+        statement = (
+            select(Task, rank)
+            .join(tasks_fts, tasks_fts.c.rowid == literal_column('tasks.rowid'))
+            .where(text('tasks_fts MATCH :match').bindparams(match=_sqlite_match(search_terms(query))))
+        )
+    else:
+        # The words only, as on SQLite: "-", "or" and quotes are not query syntax
+        tsquery = func.plainto_tsquery(literal_column(f"'{SEARCH_LANGUAGE}'"), ' '.join(search_terms(query)))
+        # ts_rank_cd is a real; as a double the rank sent back in the cursor
+        # compares equal to the row's own rank, so tied rows are not skipped
+        rank = cast(func.ts_rank_cd(TASK_DOCUMENT, tsquery), Float(53)).label('rank')
+        statement = select(Task, rank).where(TASK_DOCUMENT.op('@@')(tsquery))
+    statement = statement.where(Task.user_id == user_id)
+
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor)
+        if not isinstance(last_rank, (int, float)):
+            raise InvalidCursorError("Invalid cursor")
+        rank_expression = rank.element
+        statement = statement.where(or_(
+            rank_expression < last_rank,
+            and_(rank_expression == last_rank, Task.id > last_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    rows = db.session.execute(statement.order_by(rank.desc(), Task.id).limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].rank, rows[-1].Task.id)
+    return [row.Task for row in rows], next_cursor
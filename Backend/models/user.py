@@ -5,7 +5,7 @@
 from sqlalchemy.dialects.postgresql import UUID
 from .base_model import db, BaseModel
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.password_hashing import hash_method, hash_password, needs_rehash, verify_password
 import enum
 
 # Define roles
@@ -25,6 +25,8 @@ class User(BaseModel):
     bio = db.Column(db.Text)
     email_verified = db.Column(db.Boolean, default=False)
     role = db.Column(db.Enum(UserRole), default=UserRole.USER, nullable=False) # Add role field
+    # Bumped on every role change; tokens carrying an older value are revoked
+    role_version = db.Column(db.Integer, default=1, nullable=False, server_default='1')
 
     
     # Relationship
@@ -33,11 +35,31 @@ class User(BaseModel):
 
     def set_password(self, password):
         """Hash the password and store it securely."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         """Verify the password against the stored hash."""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def rehash_password_if_needed(self, password):
+        """
+            Rehash a just-verified password when its hash predates the
+            PASSWORD_HASH_METHOD policy. Returns True when the hash changed.
+        """
+        if not needs_rehash(self.password_hash, hash_method()):
+            return False
+        self.set_password(password)
+        return True
+
+    def token_claims(self):
+        """Return the additional JWT claims used to authorize without a database lookup."""
+        return {'role': self.role.value, 'role_version': self.role_version}
+
+    def set_role(self, role):
+        """Change the role and invalidate tokens that carry the previous one."""
+        if role != self.role:
+            self.role = role
+            self.role_version = (self.role_version or 1) + 1
 
     def __str__(self):
         return f"<User {self.username} {self.id}>"
\ No newline at end of file
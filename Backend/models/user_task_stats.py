@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the per-user task rollup read by GET /analytics/analytics.
+
+    Each row keeps a user's number of tasks, number of completed tasks and
+    summed total_time_spent, so the dashboard reads one row by primary key
+    however long the user's history is. The counters are adjusted in the same
+    transaction as the writes that change them (see models/task.py and the
+    bulk task endpoints), and Task.recompute_user_stats() repairs drift.
+
+    Rows are created with their user. Users inserted outside the ORM (the
+    benchmark datasets) get theirs from Task.recompute_user_stats(); until
+    then their analytics are aggregated from the tasks table.
+"""
+from sqlalchemy.dialects.postgresql import UUID
+from .base_model import db
+from .user import User
+from datetime import timedelta
+
+
+class UserTaskStats(db.Model):
+    """
+        Task counters of one user, kept in step with the tasks table
+    """
+    __tablename__ = 'user_task_stats'
+
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    total_tasks = db.Column(db.Integer, default=0, nullable=False)
+    completed_tasks = db.Column(db.Integer, default=0, nullable=False)
+    total_time_spent = db.Column(db.Interval, default=timedelta(seconds=0), nullable=False)
+
+    def __str__(self):
+        return f"<UserTaskStats for User {self.user_id} - {self.total_tasks} tasks>"
+
+
+@db.event.listens_for(User, 'after_insert')
+def _user_inserted(mapper, connection, target):
+    """Start every new user's counters at zero."""
+    connection.execute(UserTaskStats.__table__.insert().values(
+        user_id=target.id, total_tasks=0, completed_tasks=0, total_time_spent=timedelta(seconds=0)
+    ))
+
+
+@db.event.listens_for(User, 'before_delete')
+def _user_deleted(mapper, connection, target):
+    """Drop the counters with their user (ON DELETE CASCADE where foreign keys are enforced)."""
+    stats = UserTaskStats.__table__
+    connection.execute(stats.delete().where(stats.c.user_id == target.id))
@@ -11,6 +11,7 @@ from models.user import User, UserRole
 from models.task import Task
 from models.progress import Progress
 from sqlalchemy.orm import configure_mappers
+from utils.query_counter import assert_max_queries
 configure_mappers()
 
 
@@ -25,6 +26,24 @@ def test_app():
         db.session.remove()
         db.drop_all()
 
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(request):
+    """Fail a test when one of its requests ran more queries than its view's @query_budget."""
+    if 'test_app' not in request.fixturenames:
+        yield
+        return
+    checks = request.getfixturevalue('test_app').extensions.get('query_checks')
+    if checks is not None:
+        checks.violations.clear()
+    yield
+    if checks is not None and checks.violations:
+        pytest.fail("\n\n".join(checks.violations))
+
+@pytest.fixture
+def max_queries(test_app):
+    """Assert a block stays within a query budget: `with max_queries(2): ...`"""
+    return assert_max_queries
+
 @pytest.fixture(scope='module')
 def test_client(test_app):
     """A test client for the app."""
@@ -7,7 +7,11 @@
 import json
 import pytest
 from models.user import User, UserRole
+from models.task import Task
 from models.base_model import db
+from datetime import timedelta
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
 # Fixtures new_user, admin_user, another_user, test_client, auth_headers, admin_auth_headers auto-imported
 
 def test_admin_get_all_users_forbidden(test_client, auth_headers):
@@ -128,4 +132,92 @@ def test_admin_delete_user_not_found(test_client, admin_auth_headers):
 #     """Test DELETE /admin/users/<id> prevents admin from deleting self."""
 #     response = test_client.delete(f'/api/v1/admin/users/{admin_user.id}', headers=admin_auth_headers)
 #     assert response.status_code == 403 # Or 400 depending on implementation
-#     assert "cannot delete themselves" in response.get_json()['error']
\ No newline at end of file
+#     assert "cannot delete themselves" in response.get_json()['error']
+
+def test_admin_recompute_task_time_spent(test_client, new_user, admin_auth_headers, db_session):
+    """Test POST /admin/tasks/recompute-time-spent repairs drifted totals."""
+    task = Task(title="Drifted", user_id=new_user.id, total_time_spent=timedelta(hours=4))
+    db_session.add(task)
+    db_session.commit()
+
+    response = test_client.post('/api/v1/admin/tasks/recompute-time-spent', headers=admin_auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['updated'] >= 1
+    db_session.refresh(task)
+    assert task.total_time_spent == timedelta()
+
+
+def test_admin_recompute_task_time_spent_forbidden(test_client, auth_headers):
+    """Test POST /admin/tasks/recompute-time-spent forbidden for regular user."""
+    response = test_client.post('/api/v1/admin/tasks/recompute-time-spent', headers=auth_headers)
+    assert response.status_code == 403
+
+
+def test_admin_route_loads_current_user_once(test_client, admin_user, admin_auth_headers):
+    """The decorator and view share the request's current user instead of re-querying it."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # Start from an empty identity map so every lookup hits the database
+    db.session.expunge_all()
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = test_client.get('/api/v1/admin/users', headers=admin_auth_headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert response.status_code == 200
+    # One lookup for the current user, one for the listing itself
+    assert len([s for s in statements if 'FROM users' in s]) == 2
+    current_user_lookup = next(s for s in statements if 'FROM users' in s)
+    assert 'password_hash' not in current_user_lookup
+
+
+def test_admin_forbidden_for_user_role_claim_without_user_query(test_client, new_user, auth_headers):
+    """A USER role claim is rejected by the decorator without loading the user."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db.session.expunge_all()
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = test_client.get('/api/v1/admin/users', headers=auth_headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert response.status_code == 403
+    # Only the token revocation check reads the user; the role comes from the claims
+    assert len([s for s in statements if 'FROM users' in s]) == 1
+
+
+def test_role_change_revokes_existing_tokens(test_client, new_user, admin_user, auth_headers, admin_auth_headers):
+    """Tokens issued before a role change are rejected; a fresh login carries the new role."""
+    response = test_client.put(f'/api/v1/admin/users/{new_user.id}/role',
+                               json={'role': 'ADMIN'}, headers=admin_auth_headers)
+    assert response.status_code == 200
+
+    response = test_client.get('/api/v1/admin/users', headers=auth_headers)
+    assert response.status_code == 401
+
+    login = test_client.post('/api/v1/auth/login', json={'email': new_user.email, 'password': 'password123'})
+    token = login.get_json()['access_token']
+    response = test_client.get('/api/v1/admin/users', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+
+
+def test_admin_token_without_role_claim_uses_loaded_role(test_client, test_app, new_user, admin_user):
+    """Tokens issued before the role claim existed are authorized from the user's stored role."""
+    with test_app.test_request_context():
+        admin_token = create_access_token(identity=str(admin_user.id))
+        user_token = create_access_token(identity=str(new_user.id))
+
+    response = test_client.get('/api/v1/admin/users', headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 200
+    response = test_client.get('/api/v1/admin/users', headers={'Authorization': f'Bearer {user_token}'})
+    assert response.status_code == 403
@@ -1,8 +1,10 @@
 import pytest
 from models.task import Task
 from models.analytics import Analytics
+from models.progress import Progress
 from models.user import User
-from datetime import timedelta
+from models.user_task_stats import UserTaskStats
+from datetime import datetime, timedelta
 
 
 def test_get_user_analytics_success(test_client, new_user, auth_headers, db_session):
@@ -69,3 +71,105 @@ def test_get_user_analytics_no_tasks(test_client, new_user, auth_headers):
     assert data['total_tasks'] == 0
     assert data['completed_tasks'] == 0
     assert data['total_time_spent'] == '0:00:00'
+
+
+def test_get_user_analytics_aggregates_in_sql(test_client, new_user, another_user, auth_headers, db_session):
+    # Tasks belonging to another user must not be counted
+    db_session.add_all([
+        Task(title="Done", user_id=new_user.id, completed=True, total_time_spent=timedelta(hours=2)),
+        Task(title="Open", user_id=new_user.id, completed=False, total_time_spent=timedelta(hours=1, minutes=30)),
+        Task(title="Other", user_id=another_user.id, completed=True, total_time_spent=timedelta(hours=5)),
+    ])
+    db_session.commit()
+
+    response = test_client.get('/api/v1/analytics/analytics', headers=auth_headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total_tasks'] == 2
+    assert data['completed_tasks'] == 1
+    assert data['total_time_spent'] == '3:30:00'
+
+
+def test_create_user_analytics_task_id_string(test_client, new_user, auth_headers, db_session):
+    """JSON clients send the task id as a string; an invalid one is rejected."""
+    task = Task(title="Analytics Task", user_id=new_user.id)
+    db_session.add(task)
+    db_session.commit()
+
+    response = test_client.post('/api/v1/analytics/analytics', json={"task_id": str(task.id), "time_spent": 60},
+                                headers=auth_headers)
+    assert response.status_code == 201
+    assert response.get_json()['analytics']['task_id'] == str(task.id)
+
+    response = test_client.post('/api/v1/analytics/analytics', json={"task_id": "not-a-uuid", "time_spent": 60},
+                                headers=auth_headers)
+    assert response.status_code == 400
+
+
+def _analytics(test_client, headers):
+    response = test_client.get('/api/v1/analytics/analytics', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_user_analytics_rollup_follows_task_and_progress_writes(test_client, new_user, auth_headers, db_session):
+    """Every write path keeps the rollup equal to a fresh aggregate of the tasks."""
+    task = Task(title="Tracked", user_id=new_user.id)
+    other = Task(title="Other", user_id=new_user.id, completed=True, total_time_spent=timedelta(minutes=10))
+    db_session.add_all([task, other])
+    db_session.commit()
+
+    # Progress changes the task time through Core updates
+    timer = Progress(user_id=new_user.id, task_id=task.id, end_time=datetime.utcnow(), duration=timedelta(hours=1))
+    db_session.add(timer)
+    db_session.commit()
+    task.completed = True
+    db_session.commit()
+    timer.duration = timedelta(minutes=45)
+    db_session.commit()
+    assert _analytics(test_client, auth_headers) == {
+        'total_tasks': 2, 'completed_tasks': 2, 'total_time_spent': '0:55:00'
+    }
+
+    # Bulk endpoints
+    response = test_client.post('/api/v1/task/tasks/batch', headers=auth_headers, json={'tasks': [
+        {'title': 'Batch 1', 'description': 'd', 'completed': True}, {'title': 'Batch 2', 'description': 'd'}
+    ]})
+    assert response.status_code == 201
+    response = test_client.post('/api/v1/task/tasks/bulk', headers=auth_headers,
+                                json={'action': 'uncomplete', 'ids': [str(task.id), str(other.id)]})
+    assert response.status_code == 200
+    assert _analytics(test_client, auth_headers)['completed_tasks'] == 1
+
+    response = test_client.post('/api/v1/task/tasks/bulk', headers=auth_headers,
+                                json={'action': 'delete', 'ids': [str(other.id)]})
+    assert response.status_code == 200
+    db_session.delete(db_session.get(Progress, timer.id))
+    db_session.commit()
+    assert _analytics(test_client, auth_headers) == {
+        'total_tasks': 3, 'completed_tasks': 1, 'total_time_spent': '0:00:00'
+    }
+    # Nothing for the repair to correct
+    assert Task.recompute_user_stats(user_ids=[new_user.id]) == 0
+
+
+def test_user_analytics_rollup_recompute(test_client, new_user, auth_headers, db_session):
+    """Drifted and missing rollups are repaired; a user without one is aggregated live."""
+    db_session.add(Task(title="Done", user_id=new_user.id, completed=True, total_time_spent=timedelta(hours=2)))
+    db_session.commit()
+    expected = {'total_tasks': 1, 'completed_tasks': 1, 'total_time_spent': '2:00:00'}
+
+    stats = UserTaskStats.__table__
+    db_session.execute(stats.update().where(stats.c.user_id == new_user.id).values(total_tasks=7))
+    db_session.commit()
+    assert _analytics(test_client, auth_headers)['total_tasks'] == 7
+    assert Task.recompute_user_stats(user_ids=[new_user.id]) == 1
+    db_session.commit()
+    assert _analytics(test_client, auth_headers) == expected
+
+    db_session.execute(stats.delete().where(stats.c.user_id == new_user.id))
+    db_session.commit()
+    assert _analytics(test_client, auth_headers) == expected
+    Task.recompute_user_stats(user_ids=[new_user.id])
+    db_session.commit()
+    assert db_session.execute(stats.select().where(stats.c.user_id == new_user.id)).one().total_tasks == 1
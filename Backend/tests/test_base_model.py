@@ -3,6 +3,7 @@
     This module contains the test for the BaseModel model
 """
 from models.base_model import BaseModel, db
+from models.user import User, UserRole
 from datetime import datetime
 
 
@@ -33,4 +34,18 @@ def test_base_model_creation(db_session): # Use db_session fixture for isolation
 
     # Use the renamed class
     deleted_record = _HelperTestModel.query.filter_by(name="Test Record").first()
-    assert deleted_record is None
\ No newline at end of file
+    assert deleted_record is None
+
+def test_to_json_include_exclude(db_session):
+    """Test to_json honours include/exclude and never returns password_hash."""
+    user = User(name="Serializer", username="serializer", email="s@example.com",
+                password_hash="secret", role=UserRole.ADMIN)
+
+    full = user.to_json()
+    assert 'password_hash' not in full
+    assert full['role'] == 'admin'
+
+    assert user.to_json(include={'username', 'role', 'password_hash'}) == {
+        'username': 'serializer', 'role': 'admin'
+    }
+    assert 'bio' not in user.to_json(exclude={'bio'})
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+    This module contains the tests for the synthetic dataset generator and the route benchmark
+"""
+from datetime import timedelta
+from sqlalchemy import func, select
+from benchmarks.bench_routes import SCENARIOS, ClientTarget, compare, percentile, run_benchmarks
+from benchmarks.generate_data import generate, table_counts
+from models.base_model import db
+from models.progress import Progress
+from models.task import Task
+
+
+def test_generate_is_consistent(test_app):
+    """Generated totals match the sessions, and no user has two running timers."""
+    counts = generate(users=30, seed=1, chunk_users=8)
+    assert counts['users'] == 30
+    assert table_counts() == counts
+    assert counts['tasks'] >= 3 * 30
+
+    for task in db.session.scalars(select(Task)).all():
+        durations = db.session.scalars(
+            select(Progress.duration).where(Progress.task_id == task.id, Progress.end_time.isnot(None))
+        ).all()
+        assert task.total_time_spent == sum(durations, timedelta())
+
+    running = db.session.execute(
+        select(Progress.user_id, func.count()).where(Progress.end_time.is_(None)).group_by(Progress.user_id)
+    ).all()
+    assert all(count == 1 for _, count in running)
+
+
+def test_run_benchmarks_drives_every_route(test_app):
+    """Every route of the scenarios answers without errors and gets its percentiles."""
+    report = run_benchmarks(test_app, ClientTarget(test_app), requests=4, users=3, warmup=0)
+    routes = report['routes']
+    assert len(routes) == sum(len(steps) for steps, _ in SCENARIOS)
+    for name, route in routes.items():
+        assert route['errors'] == 0, (name, route['statuses'])
+        assert route['p50_ms'] <= route['p95_ms'] <= route['p99_ms']
+    assert report['dataset']['users'] >= 30
+
+    slower = dict(report, routes={name: dict(route, p50_ms=route['p50_ms'] * 2) for name, route in routes.items()})
+    assert compare(report, slower, threshold=50) == sorted(routes)
+    assert compare(report, report) == []
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+    assert percentile([], 50) is None
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+    This module contains the tests for the email outbox and its background sender
+"""
+import socketserver
+import threading
+from datetime import datetime
+import pytest
+from flask_mail import Mail
+from models.base_model import db
+from models.email_outbox import EmailStatus, OutboxEmail
+from utils.email_outbox import EmailOutboxSender
+from utils.email_utils import send_email
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: records messages, refuses recipients at reject.example.com."""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 localhost stand-in")
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().rstrip("\r\n")
+            command = line[:4].upper()
+            if not line or command == "QUIT":
+                self.reply("221 bye")
+                return
+            if command in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif command == "MAIL":
+                recipients = []
+                self.reply("250 ok")
+            elif command == "RCPT":
+                if "reject.example.com" in line:
+                    self.reply("550 no such user")
+                else:
+                    recipients.append(line.split(":", 1)[1].strip(" <>"))
+                    self.reply("250 ok")
+            elif command == "DATA":
+                self.reply("354 go ahead")
+                data = []
+                while (line := self.rfile.readline().decode()) != ".\r\n":
+                    data.append(line)
+                server.messages.append((recipients, "".join(data)))
+                self.reply("250 queued")
+            else:
+                self.reply("250 ok")
+
+
+@pytest.fixture
+def smtp_server():
+    """A local SMTP stand-in on a free port."""
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPHandler)
+    server.daemon_threads = True
+    server.connections, server.messages = 0, []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sender(test_app, monkeypatch, smtp_server):
+    """An outbox sender delivering to the SMTP stand-in."""
+    mail = Mail().init_mail({
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': smtp_server.server_address[1],
+        'MAIL_DEFAULT_SENDER': 'timewise@example.com',
+        'MAIL_SUPPRESS_SEND': False,
+    })
+    monkeypatch.setitem(test_app.extensions, 'mail', mail)
+    OutboxEmail.query.delete()
+    db.session.commit()
+    yield EmailOutboxSender(test_app, batch_size=10, max_attempts=2, backoff=60)
+    OutboxEmail.query.delete()
+    db.session.commit()
+
+
+def test_verification_request_only_queues(test_client, auth_headers, smtp_server, sender):
+    """The request inserts an outbox row and never connects to SMTP."""
+    response = test_client.post('/api/v1/auth/email-verification-request', headers=auth_headers)
+    assert response.status_code == 200
+    assert smtp_server.connections == 0
+    email = OutboxEmail.query.one()
+    assert email.status == EmailStatus.PENDING
+    assert email.subject == "Email Verification"
+
+
+def test_batch_is_sent_over_one_connection(smtp_server, sender):
+    """Every email of a batch goes over the same SMTP connection."""
+    for i in range(3):
+        assert send_email(f"Hello {i}", [f"user{i}@example.com"], "body")
+
+    assert sender.drain_once() == 3
+    assert smtp_server.connections == 1
+    assert sorted(recipients[0] for recipients, _ in smtp_server.messages) == [
+        'user0@example.com', 'user1@example.com', 'user2@example.com'
+    ]
+    db.session.expire_all()
+    assert {email.status for email in OutboxEmail.query.all()} == {EmailStatus.SENT}
+    assert sender.drain_once() == 0
+
+
+def test_refused_email_is_retried_with_backoff_then_failed(smtp_server, sender):
+    """A refused email is rescheduled, then marked failed after max_attempts; others still go out."""
+    send_email("Bounce", ["nobody@reject.example.com"], "body")
+    send_email("Fine", ["somebody@example.com"], "body")
+
+    assert sender.drain_once() == 2
+    assert len(smtp_server.messages) == 1
+    db.session.expire_all()
+    refused = OutboxEmail.query.filter_by(subject="Bounce").one()
+    assert refused.status == EmailStatus.PENDING
+    assert refused.attempts == 1
+    assert refused.next_attempt_at > datetime.utcnow()
+    assert 'SMTPRecipientsRefused' in refused.last_error
+
+    # Not due yet
+    assert sender.drain_once() == 0
+
+    refused.next_attempt_at = datetime.utcnow()
+    db.session.commit()
+    assert sender.drain_once() == 1
+    db.session.expire_all()
+    assert db.session.get(OutboxEmail, refused.id).status == EmailStatus.FAILED
+
+
+def test_unreachable_server_keeps_emails_queued(test_app, monkeypatch, sender):
+    """When SMTP is down the emails stay pending for a later attempt."""
+    down = Mail().init_mail({'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': 1, 'MAIL_SUPPRESS_SEND': False,
+                             'MAIL_DEFAULT_SENDER': 'timewise@example.com'})
+    monkeypatch.setitem(test_app.extensions, 'mail', down)
+    send_email("Later", ["somebody@example.com"], "body")
+
+    assert sender.drain_once() == 1
+    db.session.expire_all()
+    email = OutboxEmail.query.one()
+    assert email.status == EmailStatus.PENDING
+    assert email.attempts == 1
@@ -1,4 +1,7 @@
+import json
 import logging
+import multiprocessing
+import os
 import pytest
 from utils.logging_utils import setup_logging
 
@@ -23,4 +26,90 @@ def test_console_and_file_logging(tmp_path, capsys):
     captured = capsys.readouterr()
     assert "Hello Info" in captured.out or "Hello Info" in captured.err
     assert "Hello Debug" not in captured.out
-    assert "Hello Debug" not in captured.err
\ No newline at end of file
+    assert "Hello Debug" not in captured.err
+
+def _flush_logs():
+    for h in logging.getLogger().handlers:
+        h.flush()
+
+
+def test_json_lines_and_per_logger_levels(tmp_path):
+    log_file = tmp_path / "json.log"
+    setup_logging(str(log_file), level="INFO", json_lines=True, levels="noisy=WARNING")
+    logging.getLogger("noisy").info("Hidden")
+    logging.getLogger("noisy.child").warning("Shown %s", "warning")
+    logging.getLogger("app").info("Shown info")
+    _flush_logs()
+    entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+    messages = [entry["message"] for entry in entries]
+    assert "Shown warning" in messages and "Shown info" in messages
+    assert "Hidden" not in messages
+    assert entries[-1]["logger"] == "app" and entries[-1]["level"] == "INFO"
+
+
+def test_per_logger_level_more_verbose_than_root(tmp_path, capsys):
+    log_file = tmp_path / "verbose.log"
+    setup_logging(str(log_file), level="INFO", levels="demo=DEBUG")
+    try:
+        logging.getLogger("demo").debug("Demo debug")
+        logging.getLogger("app").debug("App debug")
+        _flush_logs()
+        content = log_file.read_text()
+        assert "Demo debug" in content
+        assert "App debug" not in content
+        # The console still never shows DEBUG
+        captured = capsys.readouterr()
+        assert "Demo debug" not in captured.out + captured.err
+    finally:
+        logging.getLogger("demo").setLevel(logging.NOTSET)
+
+
+def test_sampling_keeps_warnings(tmp_path):
+    log_file = tmp_path / "sampled.log"
+    setup_logging(str(log_file), sampling={"chatty": 0.0})
+    logging.getLogger("chatty").info("Sampled out")
+    logging.getLogger("chatty").warning("Always kept")
+    _flush_logs()
+    content = log_file.read_text()
+    assert "Sampled out" not in content
+    assert "Always kept" in content
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    log_file = tmp_path / "full.log"
+    setup_logging(str(log_file), queue_size=1)
+    handler = logging.getLogger().handlers[0]
+    handler.listener.stop()  # Nothing drains the queue now
+    handler.listener = None
+    while not handler.queue.full():
+        handler.queue.put_nowait(None)
+    logging.getLogger("app").info("Dropped")
+    assert handler.dropped == 1
+
+
+def _write_lines(log_file, worker):
+    setup_logging(log_file, json_lines=True, max_bytes=16 * 1024, backup_count=50)
+    for i in range(200):
+        logging.getLogger("worker").info("worker %s line %s", worker, i)
+    _flush_logs()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_processes_share_rotation(tmp_path):
+    log_file = str(tmp_path / "shared.log")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_write_lines, args=(log_file, worker)) for worker in range(3)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(30)
+        assert process.exitcode == 0
+
+    lines = []
+    for path in tmp_path.glob("shared.log*"):
+        if not path.name.endswith(".lock"):
+            lines += path.read_text().splitlines()
+    # Every line is intact and none were lost to a clobbered rotation
+    messages = {json.loads(line)["message"] for line in lines}
+    assert os.path.exists(f"{log_file}.1")
+    assert all(f"worker {worker} line {i}" in messages for worker in range(3) for i in range(200))
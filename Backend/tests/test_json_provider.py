@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+    This module contains the tests for the FastJSONProvider
+"""
+import json
+import uuid
+import pytest
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from models.user import UserRole
+from utils.json_provider import FastJSONProvider, orjson
+
+
+@pytest.fixture(params=[True, False], ids=['orjson', 'stdlib'])
+def provider(request, test_app):
+    """A provider bound to the test app using each encoder backend."""
+    if request.param and orjson is None:
+        pytest.skip("orjson is not installed")
+    json_provider = FastJSONProvider(test_app)
+    json_provider.use_orjson = request.param
+    return json_provider
+
+
+def test_encodes_api_types_natively(provider):
+    """UUID, datetime, timedelta and Enum values are encoded without str() in views."""
+    value_id = uuid.uuid4()
+    payload = {
+        'id': value_id,
+        'created_at': datetime(2025, 1, 31, 9, 30),
+        'total_time_spent': timedelta(hours=1, minutes=30),
+        'role': UserRole.ADMIN,
+    }
+    assert json.loads(provider.dumps(payload)) == {
+        'id': str(value_id),
+        'created_at': '2025-01-31T09:30:00',
+        'total_time_spent': '1:30:00',
+        'role': 'admin',
+    }
+
+
+def test_falls_back_to_stdlib(provider):
+    """Values orjson cannot encode still serialize through the stdlib."""
+    assert provider.loads(provider.dumps({'big': 2 ** 70})) == {'big': 2 ** 70}
+
+
+@dataclass
+class _Point:
+    x: int
+    y: Decimal
+
+
+def test_encodes_flask_default_types(provider):
+    """Decimal, dataclasses and __html__ objects encode as with Flask's default provider."""
+    class Markup:
+        def __html__(self):
+            return '<b>bold</b>'
+
+    payload = {'amount': Decimal('1.5'), 'point': _Point(1, Decimal('2.25')), 'html': Markup()}
+    assert provider.loads(provider.dumps(payload)) == {
+        'amount': '1.5', 'point': {'x': 1, 'y': '2.25'}, 'html': '<b>bold</b>'
+    }
+    with pytest.raises(TypeError):
+        provider.dumps({'unknown': object()})
+
+
+def test_response_uses_provider(test_app):
+    """jsonify goes through the registered provider."""
+    assert isinstance(test_app.json, FastJSONProvider)
+    with test_app.test_request_context():
+        response = test_app.json.response({'b': 1, 'a': timedelta(seconds=5)})
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data()) == {'a': '0:00:05', 'b': 1}
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+    This module contains the tests for the request and SQL metrics
+"""
+import multiprocessing
+import os
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from models.base_model import db
+from utils.metrics import MetricsExporter, MetricsRegistry, instrument_sql, render_prometheus
+
+
+def _metric_value(text, prefix):
+    """The value of the first sample line starting with prefix."""
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f"{prefix} not found in:\n{text}")
+
+
+def test_metrics_require_admin(test_client, auth_headers):
+    """The endpoint is admin only."""
+    assert test_client.get('/api/v1/metrics').status_code == 401
+    assert test_client.get('/api/v1/metrics', headers=auth_headers).status_code == 403
+
+
+def test_metrics_record_latency_status_and_sql(test_client, auth_headers, admin_auth_headers):
+    """Requests are counted per blueprint and endpoint, with their SQL statements."""
+    for _ in range(3):
+        assert test_client.get('/api/v1/task/tasks', headers=auth_headers).status_code == 200
+    test_client.get('/api/v1/no-such-route')
+
+    response = test_client.get('/api/v1/metrics', headers=admin_auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+
+    route = 'blueprint="task",endpoint="task.get_tasks"'
+    assert _metric_value(text, f'http_requests_total{{{route},method="GET",status="200"}}') >= 3
+    assert _metric_value(text, f'http_request_duration_seconds_count{{{route},method="GET"}}') >= 3
+    assert _metric_value(text, f'http_request_duration_seconds_bucket{{{route},method="GET",le="+Inf"}}') >= 3
+    assert _metric_value(text, f'db_queries_total{{{route}}}') >= 3
+    assert _metric_value(text, f'db_query_duration_seconds_total{{{route}}}') > 0
+    assert 'endpoint="unmatched",method="GET",status="404"' in text
+
+
+def test_failing_statement_leaves_no_timing_on_the_connection(test_app):
+    """A statement that raises (no after_cursor_execute) leaves nothing on the pooled connection."""
+    instrument_sql(db.engine)
+    with db.engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM no_such_table"))
+        connection.execute(text("SELECT 1")).all()
+        assert not any('start' in key for key in connection.info)
+
+
+def _record_in_worker(directory):
+    exporter = MetricsExporter(MetricsRegistry(), directory)
+    exporter.registry.observe_request('task', 'task.get_tasks', 'GET', 200, 0.02, 2, 0.001)
+    exporter.write()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork")
+def test_metrics_aggregate_across_workers(tmp_path):
+    """Each worker writes its own file; collecting sums them all."""
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_record_in_worker, args=(str(tmp_path),)) for _ in range(2)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(10)
+        assert process.exitcode == 0
+
+    exporter = MetricsExporter(MetricsRegistry(), str(tmp_path))
+    exporter.registry.observe_request('task', 'task.get_tasks', 'GET', 200, 0.3, 1, 0.001)
+    text = render_prometheus(exporter.collect())
+
+    route = 'blueprint="task",endpoint="task.get_tasks"'
+    assert _metric_value(text, f'http_requests_total{{{route},method="GET",status="200"}}') == 3
+    assert _metric_value(text, f'db_queries_total{{{route}}}') == 5
+    assert _metric_value(text, f'http_request_duration_seconds_bucket{{{route},method="GET",le="0.025"}}') == 2
+    assert _metric_value(text, f'http_request_duration_seconds_bucket{{{route},method="GET",le="0.5"}}') == 3
+    assert len(list(tmp_path.glob('metrics-*.json'))) == 3
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+    This module contains the tests for the bounded password hashing pool
+    and the hash policy
+"""
+import threading
+import pytest
+from werkzeug.security import generate_password_hash
+from models.base_model import db
+from models.user import User
+from utils.password_hashing import PasswordHasher, PasswordHashingBusy, needs_rehash, normalize_method
+
+
+@pytest.fixture
+def hasher():
+    """A pool with one worker and no queue."""
+    pool = PasswordHasher(workers=1, max_pending=0)
+    yield pool
+    pool.shutdown()
+
+
+def test_hash_and_verify_on_pool(hasher):
+    """Hashes made on the pool verify on the pool."""
+    pwhash = hasher.hash('correct horse')
+    assert pwhash != 'correct horse'
+    assert hasher.verify(pwhash, 'correct horse')
+    assert not hasher.verify(pwhash, 'wrong horse')
+
+
+def test_saturated_pool_rejects_immediately(hasher):
+    """When every worker and queue slot is taken, new work is rejected, not queued."""
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait(5)
+
+    blocker = threading.Thread(target=hasher._run, args=(slow_hash,))
+    blocker.start()
+    assert started.wait(5)
+    try:
+        with pytest.raises(PasswordHashingBusy):
+            hasher.hash('password')
+        assert hasher.rejected == 1
+    finally:
+        release.set()
+        blocker.join()
+
+    # The slot is released once the running hash finishes
+    assert hasher.verify(hasher.hash('password'), 'password')
+
+
+def test_login_returns_503_when_hashing_saturated(test_app, test_client, new_user, monkeypatch):
+    """A saturated pool sheds logins with 503 and Retry-After."""
+    saturated = PasswordHasher(workers=1, max_pending=0)
+    monkeypatch.setattr(saturated._slots, 'acquire', lambda *args, **kwargs: False)
+    monkeypatch.setitem(test_app.extensions, 'password_hasher', saturated)
+
+    response = test_client.post('/api/v1/auth/login', json={'email': new_user.email, 'password': 'password123'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json() == {'error': 'Server is busy, please retry shortly'}
+
+
+def test_normalize_method_and_needs_rehash():
+    """Short method names expand to werkzeug's defaults; other parameters need a rehash."""
+    assert normalize_method('scrypt') == 'scrypt:32768:8:1'
+    assert normalize_method('pbkdf2:sha256:600000') == 'pbkdf2:sha256:600000'
+    assert normalize_method('pbkdf2').startswith('pbkdf2:sha256:')
+    with pytest.raises(ValueError):
+        normalize_method('md5')
+
+    pwhash = generate_password_hash('password', 'scrypt:16384:8:1')
+    assert not needs_rehash(pwhash, 'scrypt:16384:8:1')
+    assert needs_rehash(pwhash, 'scrypt')
+    assert needs_rehash(pwhash, 'pbkdf2:sha256:600000')
+
+
+def test_login_upgrades_hash_to_policy(test_app, test_client, new_user, monkeypatch):
+    """A successful login rehashes a password stored under an older policy, once."""
+    new_user.password_hash = generate_password_hash('password123', 'pbkdf2:sha256:1000')
+    db.session.commit()
+    monkeypatch.setitem(test_app.config, 'PASSWORD_HASH_METHOD', 'scrypt:16384:8:1')
+    monkeypatch.setitem(test_app.extensions, 'password_hasher',
+                        PasswordHasher(workers=1, max_pending=0, method='scrypt:16384:8:1'))
+
+    # A wrong password leaves the old hash alone
+    response = test_client.post('/api/v1/auth/login', json={'email': new_user.email, 'password': 'wrong'})
+    assert response.status_code == 401
+    assert new_user.password_hash.startswith('pbkdf2:sha256:1000$')
+
+    response = test_client.post('/api/v1/auth/login', json={'email': new_user.email, 'password': 'password123'})
+    assert response.status_code == 200
+    upgraded = db.session.get(User, new_user.id).password_hash
+    assert upgraded.startswith('scrypt:16384:8:1$')
+
+    response = test_client.post('/api/v1/auth/login', json={'email': new_user.email, 'password': 'password123'})
+    assert response.status_code == 200
+    assert db.session.get(User, new_user.id).password_hash == upgraded
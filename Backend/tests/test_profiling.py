@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+    This module contains the tests for the on-demand request profiler
+"""
+import pstats
+import time
+import pytest
+from flask_jwt_extended import create_access_token
+from api.v1.app import create_app
+from api.v1.config import TestConfig, config_dict
+from models.base_model import db
+from models.user import User, UserRole
+
+
+@pytest.fixture
+def profiled_app(tmp_path, monkeypatch):
+    """An app with profiling enabled, a slow route, and tokens of an admin and a user."""
+    class ProfilingConfig(TestConfig):
+        PROFILING_ENABLED = True
+        PROFILING_DIR = str(tmp_path / 'profiles')
+        PROFILING_SAMPLE_INTERVAL_MS = 1
+
+    monkeypatch.setitem(config_dict, 'profiling', ProfilingConfig)
+    app = create_app(config_name='profiling')
+
+    def slow_view():
+        time.sleep(0.05)
+        return 'done'
+
+    app.add_url_rule('/slow', 'slow_view', slow_view)
+    with app.app_context():
+        db.create_all()
+        admin = User(name='Admin', username='profiler_admin', email='profiler_admin@example.com',
+                     password_hash='x', role=UserRole.ADMIN)
+        user = User(name='User', username='profiler_user', email='profiler_user@example.com', password_hash='x')
+        db.session.add_all([admin, user])
+        db.session.commit()
+        tokens = {
+            'admin': create_access_token(identity=str(admin.id), additional_claims=admin.token_claims()),
+            'user': create_access_token(identity=str(user.id), additional_claims=user.token_claims()),
+        }
+        yield app, tmp_path / 'profiles', tokens
+        db.session.remove()
+        db.drop_all()
+
+
+def test_profiling_disabled_registers_nothing(test_app):
+    """Without PROFILING_ENABLED, requests run no profiling hook."""
+    hooks = [hook.__name__ for hook in test_app.before_request_funcs.get(None, [])]
+    assert 'start_profiler' not in hooks
+
+
+def test_only_admins_asking_are_profiled(profiled_app):
+    app, directory, tokens = profiled_app
+    client = app.test_client()
+
+    response = client.get('/slow', headers={'Authorization': f"Bearer {tokens['admin']}"})
+    assert 'X-Profile-File' not in response.headers
+    response = client.get('/slow', headers={'Authorization': f"Bearer {tokens['user']}", 'X-Profile': 'sample'})
+    assert 'X-Profile-File' not in response.headers
+    response = client.get('/slow', headers={'X-Profile': 'sample'})
+    assert 'X-Profile-File' not in response.headers
+    assert not directory.exists()
+
+
+def test_sampled_profile_has_collapsed_stacks(profiled_app):
+    app, directory, tokens = profiled_app
+    response = app.test_client().get('/slow', headers={'Authorization': f"Bearer {tokens['admin']}",
+                                                       'X-Profile': 'sample'})
+    assert response.status_code == 200
+    name = response.headers['X-Profile-File']
+    assert '-GET-slow_view-' in name and name.endswith('.collapsed')
+
+    lines = (directory / name).read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) >= 1
+    assert 'slow_view (test_profiling.py:' in stack
+    assert stack.index('wsgi_app') < stack.index('slow_view')
+
+
+def test_cprofile_profile_is_loadable(profiled_app):
+    app, directory, tokens = profiled_app
+    response = app.test_client().get('/slow', headers={'Authorization': f"Bearer {tokens['admin']}",
+                                                       'X-Profile': 'cprofile'})
+    name = response.headers['X-Profile-File']
+    assert name.endswith('.prof')
+    stats = pstats.Stats(str(directory / name))
+    assert any(function == 'slow_view' for _, _, function in stats.stats)
@@ -5,6 +5,7 @@
 from models.progress import Progress
 from models.task import Task
 from models.base_model import db
+from datetime import datetime, timedelta
 
 
 def test_progress_tracking(test_client, new_user):
@@ -23,3 +24,61 @@ def test_progress_tracking(test_client, new_user):
     retrieved_progress = Progress.query.filter_by(task_id=task.id).first()
     assert retrieved_progress is not None
     assert retrieved_progress.user_id == new_user.id
+
+
+def test_progress_updates_task_time_spent(test_client, new_user):
+    """Test that closing, editing and deleting progress keeps the task total in step."""
+    task = Task(title="Timed Task", user_id=new_user.id)
+    db.session.add(task)
+    db.session.commit()
+
+    progress = Progress(user_id=new_user.id, task_id=task.id)
+    db.session.add(progress)
+    db.session.commit()
+    assert task.total_time_spent == timedelta()
+
+    # Closing the timer adds its duration
+    progress.end_time = datetime.utcnow()
+    progress.duration = timedelta(minutes=30)
+    db.session.commit()
+    assert task.total_time_spent == timedelta(minutes=30)
+
+    # Editing applies only the difference
+    progress.duration = timedelta(minutes=20)
+    db.session.commit()
+    assert task.total_time_spent == timedelta(minutes=20)
+
+    # Deleting removes it again
+    db.session.delete(progress)
+    db.session.commit()
+    assert task.total_time_spent == timedelta()
+
+
+def test_recompute_total_time_spent_repairs_drift(test_client, new_user):
+    """Test the set-based recompute fixes tasks whose total has drifted."""
+    task = Task(title="Drifted Task", user_id=new_user.id)
+    db.session.add(task)
+    db.session.commit()
+    db.session.add(Progress(user_id=new_user.id, task_id=task.id, duration=timedelta(hours=1)))
+    db.session.commit()
+
+    task.total_time_spent = timedelta(days=2)
+    db.session.commit()
+
+    assert Task.recompute_total_time_spent() >= 1
+    db.session.commit()
+    assert task.total_time_spent == timedelta(hours=1)
+
+
+def test_task_has_many_timers(test_client, new_user):
+    """Test that every timer of a task is loaded, not just one of them."""
+    task = Task(title="Often Timed Task", user_id=new_user.id)
+    db.session.add(task)
+    db.session.commit()
+    first = Progress(user_id=new_user.id, task_id=task.id, end_time=datetime.utcnow(), duration=timedelta(minutes=5))
+    second = Progress(user_id=new_user.id, task_id=task.id)
+    db.session.add_all([first, second])
+    db.session.commit()
+
+    db.session.expire(task, ['progress'])
+    assert sorted(p.id for p in task.progress) == sorted([first.id, second.id])
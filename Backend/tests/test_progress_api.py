@@ -30,4 +30,49 @@ def test_get_progress_for_task(test_client, new_user, auth_headers, db_session):
 
 def test_get_progress_unauthorized(test_client):
     response = test_client.get('/api/v1/progress') # Or specific task progress route
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+def test_timer_start_stop_and_list(test_client, new_user, auth_headers, db_session):
+    task = Task(title="Timed Task", user_id=new_user.id)
+    db_session.add(task)
+    db_session.commit()
+
+    response = test_client.post('/api/v1/progress', json={'task_id': str(task.id)}, headers=auth_headers)
+    assert response.status_code == 201
+    timer_id = response.get_json()['id']
+
+    response = test_client.get('/api/v1/progress/current', headers=auth_headers)
+    assert response.get_json()['timer']['id'] == timer_id
+
+    response = test_client.post('/api/v1/progress/stop', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['end_time'] != 'None'
+
+    response = test_client.post('/api/v1/progress/stop', headers=auth_headers)
+    assert response.status_code == 404
+
+    response = test_client.get('/api/v1/progress?from=2000-01-01T00:00:00Z', headers=auth_headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [p['id'] for p in data['progress']] == [timer_id]
+    assert data['next_cursor'] is None
+
+    response = test_client.get('/api/v1/progress?to=2000-01-01T00:00:00Z', headers=auth_headers)
+    assert response.get_json()['progress'] == []
+
+
+def test_only_one_running_timer(test_client, new_user, auth_headers, db_session):
+    task = Task(title="Busy Task", user_id=new_user.id)
+    db_session.add(task)
+    db_session.commit()
+
+    response = test_client.post('/api/v1/progress', json={'task_id': str(task.id)}, headers=auth_headers)
+    assert response.status_code == 201
+    response = test_client.post('/api/v1/progress', json={'task_id': str(task.id)}, headers=auth_headers)
+    assert response.status_code == 409
+    assert Progress.query.filter_by(user_id=new_user.id).count() == 1
+
+
+def test_start_timer_on_unknown_task(test_client, auth_headers):
+    response = test_client.post('/api/v1/progress', json={'task_id': '00000000-0000-0000-0000-000000000000'}, headers=auth_headers)
+    assert response.status_code == 404
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+    This module contains the tests for the query counter and the per-view query budgets
+"""
+import logging
+import pytest
+from flask import Response
+from models.base_model import db
+from models.task import Task
+from utils.query_counter import QueryBudgetExceeded, count_queries
+
+
+def test_count_queries_and_repeats(test_app, new_user):
+    """Statements inside the block are counted, and repeats are reported."""
+    user_id = new_user.id
+    with count_queries() as queries:
+        for _ in range(3):
+            db.session.query(Task).filter_by(user_id=user_id).all()
+    assert queries.count == 3
+    assert list(queries.repeated(3).values()) == [3]
+
+    # The listener is removed on exit
+    db.session.query(Task).all()
+    assert queries.count == 3
+
+
+def test_max_queries_fixture(max_queries, new_user):
+    """Exceeding the budget fails with the statements listed."""
+    user_id = new_user.id
+    with max_queries(1):
+        db.session.query(Task).all()
+    with pytest.raises(QueryBudgetExceeded, match="Expected at most 1 queries, ran 2"):
+        with max_queries(1):
+            db.session.query(Task).all()
+            db.session.query(Task).filter_by(user_id=user_id).all()
+
+
+def test_request_over_view_budget_is_reported(test_app, test_client, auth_headers, monkeypatch):
+    """A request running more queries than its view's @query_budget is recorded as a violation."""
+    checks = test_app.extensions['query_checks']
+    monkeypatch.setattr(test_app.view_functions['task.get_tasks'], 'query_budget', 0)
+
+    assert test_client.get('/api/v1/task/tasks', headers=auth_headers).status_code == 200
+    assert len(checks.violations) == 1
+    assert "(task.get_tasks) ran" in checks.violations[0]
+    assert "queries, over its budget of 0" in checks.violations[0]
+    checks.violations.clear()  # Expected here; the autouse fixture would fail the test
+
+
+def test_repeated_statements_warn_in_debug(test_app, new_user, monkeypatch, caplog):
+    """In debug mode, a request running one statement repeatedly logs an N+1 warning."""
+    monkeypatch.setattr(test_app, 'debug', True)
+    # The alembic env of the migration tests disables the loggers that exist when it runs
+    monkeypatch.setattr(logging.getLogger('utils.query_counter'), 'disabled', False)
+    user_id = new_user.id
+    with caplog.at_level(logging.WARNING, logger='utils.query_counter'):
+        with test_app.test_request_context('/api/v1/health'):
+            test_app.preprocess_request()
+            for _ in range(3):
+                db.session.query(Task).filter_by(user_id=user_id).first()
+            test_app.process_response(Response())
+    assert any("Possible N+1 query" in record.getMessage() and "ran this statement 3 times" in record.getMessage()
+               for record in caplog.records)
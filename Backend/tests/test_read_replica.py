@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+    This module contains the tests for read-replica routing, using two SQLite
+    files standing in for the primary and the replica.
+"""
+import shutil
+import pytest
+from flask_jwt_extended import create_access_token
+from api.v1.app import create_app
+from api.v1.config import TestConfig, config_dict
+from models.base_model import db
+from models.session import replica_engine, route_reads_to_replica
+from models.user import User
+from models.task import Task
+
+
+@pytest.fixture
+def replica_app(tmp_path, monkeypatch):
+    """An app whose primary and replica are separate SQLite files."""
+    primary = tmp_path / 'primary.db'
+    replica = tmp_path / 'replica.db'
+
+    class ReplicaConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{primary}"
+        SQLALCHEMY_REPLICA_URI = f"sqlite:///{replica}"
+
+    monkeypatch.setitem(config_dict, 'replica', ReplicaConfig)
+    app = create_app(config_name='replica')
+    with app.app_context():
+        db.create_all()
+        user = User(name='Replica User', username='replica_user',
+                    email='replica@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Task(title='Replicated', user_id=user.id))
+        db.session.commit()
+        user_id = user.id
+        replica_engine(app).dispose()
+        db.engine.dispose()
+        # The replica has caught up with everything so far
+        shutil.copy(primary, replica)
+
+        # ...but not with this write
+        db.session.add(Task(title='Not yet replicated', user_id=user_id))
+        db.session.commit()
+        yield app, user_id
+        db.session.remove()
+
+
+def titles(user_id):
+    """Titles of the user's tasks, read through the session."""
+    return sorted(task.title for task in Task.query.filter_by(user_id=user_id))
+
+
+def test_get_routes_read_from_replica(replica_app):
+    """Read-only routes are served by the replica."""
+    app, user_id = replica_app
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+    db.session.expunge_all()
+
+    response = app.test_client().get('/api/v1/task/tasks', headers=headers)
+    assert response.status_code == 200
+    assert [task['title'] for task in response.get_json()['tasks']] == ['Replicated']
+
+
+def test_writes_go_to_primary(replica_app):
+    """Write requests use the primary for their reads and writes."""
+    app, user_id = replica_app
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+
+    response = app.test_client().post('/api/v1/task/tasks', headers=headers,
+                                      json={'title': 'Created', 'description': 'On the primary'})
+    assert response.status_code == 201
+    db.session.expunge_all()
+    assert titles(user_id) == ['Created', 'Not yet replicated', 'Replicated']
+
+
+def test_read_your_writes_within_a_request(replica_app):
+    """After a flush, the rest of a read-only request reads from the primary."""
+    app, user_id = replica_app
+    with app.test_request_context('/api/v1/task/tasks', method='GET'):
+        route_reads_to_replica(db.session, True)
+        assert titles(user_id) == ['Replicated']
+
+        db.session.add(Task(title='Written in request', user_id=user_id))
+        db.session.flush()
+        assert titles(user_id) == ['Not yet replicated', 'Replicated', 'Written in request']
+        db.session.rollback()
+        route_reads_to_replica(db.session, False)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+    This module contains the tests for the slow-query log
+"""
+import logging
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from models.base_model import db
+from utils.slow_query_log import SlowQueryLog, init_slow_query_log, parameter_shape
+
+
+@pytest.fixture
+def slow_log(test_app, tmp_path, monkeypatch):
+    """Log every statement (threshold 0) to a temporary file; returns a reader of the file."""
+    log_file = tmp_path / 'slow_queries.log'
+    monkeypatch.setitem(test_app.config, 'SLOW_QUERY_LOG_FILE', str(log_file))
+    monkeypatch.setitem(test_app.config, 'SLOW_QUERY_THRESHOLD_MS', 0)
+    # The alembic env of the migration tests disables the loggers that exist when it runs
+    monkeypatch.setattr(logging.getLogger('utils.slow_query_log'), 'disabled', False)
+    slow_queries = init_slow_query_log(test_app, [db.engine])
+
+    def read():
+        for handler in logging.getLogger('utils.slow_query_log').handlers:
+            handler.flush()
+        return log_file.read_text() if log_file.exists() else ''
+
+    yield slow_queries, read
+    slow_queries.remove(db.engine)
+
+
+def test_slow_request_query_is_logged_with_route_and_plan(slow_log, test_client, new_user, auth_headers):
+    slow_queries, read = slow_log
+    user_id = new_user.id
+    assert test_client.get('/api/v1/task/tasks', headers=auth_headers).status_code == 200
+
+    log = read()
+    entries = [entry for entry in log.split('Slow query') if 'GET /api/v1/task/tasks (task.get_tasks)' in entry]
+    task_query = next(entry for entry in entries if 'FROM tasks' in entry)
+    assert "parameters: ['str', 'int', 'int']" in task_query
+    assert user_id.hex not in log and str(user_id) not in log
+    assert 'SEARCH tasks USING INDEX ix_tasks_user_id_created_at_id' in task_query
+    assert '[full scan]' not in task_query.split('\n')[0]
+
+
+def test_full_scan_is_flagged(slow_log):
+    slow_queries, read = slow_log
+    db.session.execute(text("SELECT id FROM tasks WHERE title = :title"), {'title': 'secret title'}).all()
+    db.session.rollback()
+
+    entry = next(entry for entry in read().split('Slow query') if 'WHERE title' in entry)
+    assert entry.startswith(' [full scan]:')
+    assert 'in thread MainThread' in entry
+    assert "parameters: ['str']" in entry and 'secret title' not in entry
+    assert 'SCAN tasks' in entry
+
+
+def test_fast_statements_are_not_logged(test_app, monkeypatch):
+    slow_queries = SlowQueryLog(threshold_ms=10000)
+    monkeypatch.setattr(slow_queries, 'log', lambda *args: pytest.fail("logged a fast statement"))
+    slow_queries.install(db.engine)
+    try:
+        db.session.execute(text("SELECT 1")).all()
+    finally:
+        slow_queries.remove(db.engine)
+    assert slow_queries.logged == 0
+
+
+def test_failing_statement_leaves_no_state_on_the_connection(slow_log):
+    slow_queries, read = slow_log
+    with db.engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM no_such_table"))
+        connection.execute(text("SELECT 'after the failure'")).all()
+        assert not any(key.startswith('slow_query') for key in connection.info)
+    assert 'after the failure' in read()
+
+
+def test_parameter_shape():
+    assert parameter_shape({'id_1': 'x', 'limit': 5}) == {'id_1': 'str', 'limit': 'int'}
+    assert parameter_shape(('x', None)) == ['str', 'NoneType']
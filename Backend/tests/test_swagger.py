@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+    This module contains the tests for the cached Swagger spec and the docs switch
+"""
+import json
+import os
+import subprocess
+import sys
+import pytest
+from api.v1.app import create_app
+from api.v1.config import TestConfig, config_dict
+from utils.swagger import build_spec, spec_fingerprint, swag_from
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def docs_app_factory(tmp_path, monkeypatch):
+    """Create apps that cache their spec in a temporary file."""
+    spec_file = tmp_path / 'apispec.json'
+
+    class CachedSpecConfig(TestConfig):
+        API_DOCS_ENABLED = True
+        API_DOCS_SPEC_FILE = str(spec_file)
+
+    monkeypatch.setitem(config_dict, 'cached-spec', CachedSpecConfig)
+    return lambda: create_app(config_name='cached-spec'), spec_file
+
+
+def test_swag_from_only_attaches_the_spec():
+    """Views keep their own function; flasgger reads the spec from specs_dict."""
+    spec = {'tags': ['Example']}
+
+    def view():
+        return 'ok'
+
+    assert swag_from(spec)(view) is view
+    assert view.specs_dict is spec
+
+
+def test_spec_generated_once_and_cached(docs_app_factory):
+    """The first /apispec_1.json hit writes the cache file other workers reuse."""
+    make_app, spec_file = docs_app_factory
+    app = make_app()
+    response = app.test_client().get('/apispec_1.json')
+    assert response.status_code == 200
+    assert '/task/tasks' in response.get_json()['paths']
+
+    cached = json.loads(spec_file.read_text())
+    assert cached['fingerprint'] == spec_fingerprint(app)
+    assert cached['spec'] == response.get_json()
+
+    # A new worker serves the file instead of regenerating the spec
+    cached['spec']['info']['title'] = 'Served from cache'
+    spec_file.write_text(json.dumps(cached))
+    response = make_app().test_client().get('/apispec_1.json')
+    assert response.get_json()['info']['title'] == 'Served from cache'
+
+
+def test_stale_spec_cache_is_regenerated(docs_app_factory):
+    """A cache built from different routes or specs is ignored."""
+    make_app, spec_file = docs_app_factory
+    spec_file.write_text(json.dumps({'fingerprint': 'outdated', 'spec': {'paths': {}}}))
+    response = make_app().test_client().get('/apispec_1.json')
+    assert '/task/tasks' in response.get_json()['paths']
+    assert json.loads(spec_file.read_text())['fingerprint'] != 'outdated'
+
+
+def test_build_spec_at_build_time(docs_app_factory, tmp_path):
+    """build_spec writes the same spec the endpoint would serve."""
+    make_app, spec_file = docs_app_factory
+    app = make_app()
+    assert build_spec(app) == str(spec_file)
+    cached = json.loads(spec_file.read_text())
+    assert cached['fingerprint'] == spec_fingerprint(app)
+    assert cached['spec'] == app.test_client().get('/apispec_1.json').get_json()
+
+
+def test_docs_disabled_skips_flasgger():
+    """With API_DOCS_ENABLED=False a worker never imports flasgger."""
+    script = (
+        "import sys\n"
+        "from api.v1.app import create_app\n"
+        "app = create_app(config_name='testing')\n"
+        "assert app.test_client().get('/apispec_1.json').status_code == 404\n"
+        "print('flasgger' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=BACKEND_DIR, capture_output=True, text=True,
+        env=dict(os.environ, API_DOCS_ENABLED='False')
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == 'False'
@@ -1,8 +1,11 @@
 import json
+import os
 import pytest # Import pytest
 from models.user import User, UserRole
 from models.task import Task
+from models.progress import Progress
 from models.base_model import db
+from datetime import datetime, timedelta
 # Fixtures like new_user, admin_user, test_client, auth_headers, admin_auth_headers are now auto-imported from conftest.py
 
 def test_get_tasks_unauthorized(test_client):
@@ -154,4 +157,298 @@ def test_delete_task_forbidden(test_client, new_user, another_user, auth_headers
     db_session.commit()
 
     response = test_client.delete(f'/api/v1/tasks/{other_task.id}', headers=auth_headers)
-    assert response.status_code == 403
\ No newline at end of file
+    assert response.status_code == 403
+
+def test_get_tasks_paginated(test_client, new_user, auth_headers, db_session):
+    """Test GET /task/tasks pages through tasks with a cursor."""
+    tasks = [Task(title=f"Paged Task {i}", user_id=new_user.id) for i in range(5)]
+    db_session.add_all(tasks)
+    db_session.commit()
+
+    seen = []
+    cursor = None
+    for _ in range(3):
+        url = '/api/v1/task/tasks?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        response = test_client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        json_data = response.get_json()
+        assert len(json_data['tasks']) <= 2
+        seen.extend(t['id'] for t in json_data['tasks'])
+        cursor = json_data['next_cursor']
+        if cursor is None:
+            break
+
+    assert cursor is None
+    assert len(seen) == 5
+    assert set(seen) == {str(t.id) for t in tasks}
+
+
+def test_get_tasks_invalid_cursor(test_client, auth_headers):
+    """Test GET /task/tasks rejects a malformed cursor."""
+    response = test_client.get('/api/v1/task/tasks?cursor=not-a-cursor', headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid cursor'
+
+
+def _all_pages(test_client, url, headers):
+    """Follow next_cursor through every page of a task list URL; returns the task ids in order."""
+    ids, cursor = [], None
+    while True:
+        response = test_client.get(url + (f'&cursor={cursor}' if cursor else ''), headers=headers)
+        assert response.status_code == 200, response.get_json()
+        ids.extend(task['id'] for task in response.get_json()['tasks'])
+        cursor = response.get_json()['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def test_get_tasks_filters(test_client, new_user, auth_headers, db_session):
+    """Test GET /task/tasks filters by priority, completion and date ranges in SQL."""
+    now = datetime(2026, 3, 1)
+    tasks = {
+        'due_high': Task(title='a', user_id=new_user.id, priority='high', deadline=now + timedelta(days=2)),
+        'due_medium': Task(title='b', user_id=new_user.id, priority='medium', deadline=now + timedelta(days=5)),
+        'due_low': Task(title='c', user_id=new_user.id, priority='low', deadline=now + timedelta(days=3)),
+        'done_high': Task(title='d', user_id=new_user.id, priority='high', completed=True,
+                          deadline=now + timedelta(days=1)),
+        'late_high': Task(title='e', user_id=new_user.id, priority='high', deadline=now + timedelta(days=30)),
+        'no_deadline': Task(title='f', user_id=new_user.id, priority='high',
+                            created_at=now - timedelta(days=40), updated_at=now - timedelta(days=40)),
+    }
+    db_session.add_all(tasks.values())
+    db_session.commit()
+    ids = {name: str(task.id) for name, task in tasks.items()}
+
+    url = ('/api/v1/task/tasks?priority=high,medium&completed=false'
+           '&deadline_from=2026-03-01T00:00:00Z&deadline_to=2026-03-10T00:00:00Z')
+    assert set(_all_pages(test_client, url, auth_headers)) == {ids['due_high'], ids['due_medium']}
+
+    url = '/api/v1/task/tasks?completed=true'
+    assert _all_pages(test_client, url, auth_headers) == [ids['done_high']]
+
+    url = '/api/v1/task/tasks?created_to=2026-02-01T00:00:00&updated_to=2026-02-01T00:00:00'
+    assert _all_pages(test_client, url, auth_headers) == [ids['no_deadline']]
+
+
+def test_get_tasks_sorted_by_deadline(test_client, new_user, auth_headers, db_session):
+    """Test GET /task/tasks?sort=deadline pages in deadline order, tasks without one last."""
+    start = datetime(2026, 3, 1)
+    tasks = [Task(title=f"Due {i}", user_id=new_user.id, deadline=start + timedelta(days=i % 3) if i < 5 else None)
+             for i in range(7)]
+    db_session.add_all(tasks)
+    db_session.commit()
+    expected = [str(task.id) for task in sorted(tasks, key=lambda task: (
+        task.deadline is None, task.deadline or start, str(task.id)))]
+
+    assert _all_pages(test_client, '/api/v1/task/tasks?sort=deadline&limit=2', auth_headers) == expected
+    assert _all_pages(test_client, '/api/v1/task/tasks?sort=-deadline&limit=2', auth_headers) == expected[::-1]
+
+
+def test_get_tasks_sorted_by_update_descending(test_client, new_user, auth_headers, db_session):
+    """Test GET /task/tasks?sort=-updated_at returns the most recently updated tasks first."""
+    start = datetime(2026, 3, 1)
+    tasks = [Task(title=f"Updated {i}", user_id=new_user.id, updated_at=start + timedelta(hours=i)) for i in range(5)]
+    db_session.add_all(tasks)
+    db_session.commit()
+
+    ids = _all_pages(test_client, '/api/v1/task/tasks?sort=-updated_at&limit=2', auth_headers)
+    assert ids == [str(task.id) for task in reversed(tasks)]
+
+
+@pytest.mark.parametrize('query', [
+    'priority=urgent', 'completed=maybe', 'deadline_from=tomorrow', 'sort=title', 'sort=--deadline'
+])
+def test_get_tasks_invalid_filters(test_client, auth_headers, query):
+    """Test GET /task/tasks rejects unknown filter and sort values."""
+    response = test_client.get(f'/api/v1/task/tasks?{query}', headers=auth_headers)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_create_tasks_batch_success(test_client, new_user, auth_headers):
+    """Test POST /task/tasks/batch inserts every valid task."""
+    payload = {'tasks': [
+        {'title': f'Imported {i}', 'description': 'From onboarding', 'priority': 'high',
+         'deadline': '2030-01-01T09:00:00Z'}
+        for i in range(3)
+    ]}
+    response = test_client.post('/api/v1/task/tasks/batch', json=payload, headers=auth_headers)
+    assert response.status_code == 201
+    json_data = response.get_json()
+    assert json_data['created'] == 3
+    assert json_data['failed'] == 0
+    assert [r['index'] for r in json_data['results']] == [0, 1, 2]
+    assert Task.query.filter_by(user_id=new_user.id).count() == 3
+
+
+def test_create_tasks_batch_partial(test_client, new_user, auth_headers):
+    """Test POST /task/tasks/batch reports invalid items and keeps valid ones."""
+    payload = {'tasks': [
+        {'title': 'Good', 'description': 'ok'},
+        {'description': 'Missing title'},
+        {'title': 'Bad priority', 'description': 'x', 'priority': 'urgent'},
+    ]}
+    response = test_client.post('/api/v1/task/tasks/batch', json=payload, headers=auth_headers)
+    assert response.status_code == 207
+    results = response.get_json()['results']
+    assert results[0]['status'] == 'created'
+    assert results[1] == {'index': 1, 'status': 'error', 'error': 'Missing required field: title'}
+    assert results[2]['status'] == 'error'
+    assert Task.query.filter_by(user_id=new_user.id).count() == 1
+
+
+def test_create_tasks_batch_too_large(test_client, test_app, auth_headers):
+    """Test POST /task/tasks/batch rejects batches over the configured limit."""
+    max_size = test_app.config['TASK_BATCH_MAX_SIZE']
+    payload = {'tasks': [{'title': 't', 'description': 'd'}] * (max_size + 1)}
+    response = test_client.post('/api/v1/task/tasks/batch', json=payload, headers=auth_headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('body', [[{'title': 'x', 'description': 'd'}], 'tasks', 3])
+def test_create_tasks_batch_body_not_an_object(test_client, auth_headers, body):
+    """Test POST /task/tasks/batch rejects JSON bodies that are not objects."""
+    response = test_client.post('/api/v1/task/tasks/batch', json=body, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid input'}
+
+
+def test_bulk_complete_tasks(test_client, new_user, another_user, auth_headers, db_session):
+    """Test POST /task/tasks/bulk completes only the caller's tasks."""
+    mine = [Task(title=f"Mine {i}", user_id=new_user.id) for i in range(3)]
+    other = Task(title="Not mine", user_id=another_user.id)
+    db_session.add_all(mine + [other])
+    db_session.commit()
+
+    payload = {'action': 'complete', 'ids': [str(t.id) for t in mine] + [str(other.id)]}
+    response = test_client.post('/api/v1/task/tasks/bulk', json=payload, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json() == {'action': 'complete', 'requested': 4, 'affected': 3}
+
+    db_session.expire_all()
+    assert all(t.completed for t in mine)
+    assert not other.completed
+
+
+def test_bulk_delete_tasks(test_client, new_user, auth_headers, db_session):
+    """Test POST /task/tasks/bulk deletes tasks together with their progress."""
+    tasks = [Task(title=f"Done {i}", user_id=new_user.id, completed=True) for i in range(2)]
+    keep = Task(title="Keep", user_id=new_user.id)
+    db_session.add_all(tasks + [keep])
+    db_session.commit()
+    db_session.add(Progress(user_id=new_user.id, task_id=tasks[0].id, duration=timedelta(minutes=5)))
+    db_session.commit()
+
+    payload = {'action': 'delete', 'ids': [str(t.id) for t in tasks]}
+    response = test_client.post('/api/v1/task/tasks/bulk', json=payload, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['affected'] == 2
+
+    db_session.expire_all()
+    assert Task.query.filter_by(user_id=new_user.id).all() == [keep]
+    assert Progress.query.filter_by(user_id=new_user.id).count() == 0
+
+
+def test_bulk_update_tasks_invalid_field(test_client, new_user, auth_headers, db_session):
+    """Test POST /task/tasks/bulk validates field patches."""
+    task = Task(title="Patch me", user_id=new_user.id)
+    db_session.add(task)
+    db_session.commit()
+
+    payload = {'action': 'update', 'ids': [str(task.id)], 'fields': {'priority': 'urgent'}}
+    response = test_client.post('/api/v1/task/tasks/bulk', json=payload, headers=auth_headers)
+    assert response.status_code == 400
+
+    payload['fields'] = {'priority': 'high'}
+    response = test_client.post('/api/v1/task/tasks/bulk', json=payload, headers=auth_headers)
+    assert response.status_code == 200
+    db_session.refresh(task)
+    assert task.priority == 'high'
+
+
+@pytest.mark.parametrize('body', [['00000000-0000-0000-0000-000000000000'], 'ids', None])
+def test_bulk_task_action_body_not_an_object(test_client, auth_headers, body):
+    """Test POST /task/tasks/bulk rejects JSON bodies that are not objects."""
+    response = test_client.post('/api/v1/task/tasks/bulk', json=body, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid input'}
+
+
+def test_search_tasks_ranked_and_paginated(test_client, new_user, another_user, auth_headers, db_session):
+    """Test GET /task/tasks/search finds stemmed words, best matches first, one page at a time."""
+    strong = Task(title='Quarterly report', description='Report on the reporting pipeline', user_id=new_user.id)
+    weak = [Task(title=f'Review {i}', description='Mentions the report once, among many other words',
+                 user_id=new_user.id) for i in range(3)]
+    unrelated = Task(title='Budget', description='Numbers only', user_id=new_user.id)
+    foreign = Task(title='Report of someone else', description='report', user_id=another_user.id)
+    db_session.add_all([strong, *weak, unrelated, foreign])
+    db_session.commit()
+
+    ids = _all_pages(test_client, '/api/v1/task/tasks/search?q=reports&limit=2', auth_headers)
+    assert ids[0] == str(strong.id)
+    assert sorted(ids[1:]) == sorted(str(task.id) for task in weak)
+
+    # Every word must match; punctuation is not query syntax
+    assert _all_pages(test_client, '/api/v1/task/tasks/search?q=quarterly+"report-', auth_headers) == [str(strong.id)]
+
+    # The index follows updates and deletes
+    unrelated.description = 'Now a report too'
+    db_session.delete(strong)
+    db_session.commit()
+    ids = _all_pages(test_client, '/api/v1/task/tasks/search?q=report', auth_headers)
+    assert str(unrelated.id) in ids and str(strong.id) not in ids
+
+
+@pytest.mark.parametrize('query', ['', 'q=', 'q=+-"', 'q=' + 'a' * 201, 'q=report&cursor=bad', 'q=report&limit=0'])
+def test_search_tasks_invalid(test_client, auth_headers, query):
+    """Test GET /task/tasks/search rejects empty queries and bad pagination."""
+    response = test_client.get(f'/api/v1/task/tasks/search?{query}', headers=auth_headers)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+TEST_POSTGRES_URL = os.getenv('TEST_POSTGRES_URL')
+requires_postgres = pytest.mark.skipif(not TEST_POSTGRES_URL, reason="set TEST_POSTGRES_URL to a scratch PostgreSQL database")
+
+
+@pytest.fixture
+def postgres_app(monkeypatch):
+    """An app on the TEST_POSTGRES_URL database, with a user and their token."""
+    from flask_jwt_extended import create_access_token
+    from api.v1.app import create_app
+    from api.v1.config import TestConfig, config_dict
+
+    class PostgresConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = TEST_POSTGRES_URL
+
+    monkeypatch.setitem(config_dict, 'postgres', PostgresConfig)
+    app = create_app(config_name='postgres')
+    with app.app_context():
+        db.create_all()
+        user = User(name='Search User', username='pg_search_user', email='pg_search_user@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id), additional_claims=user.token_claims())
+        yield app, user, {'Authorization': f'Bearer {token}'}
+        db.session.remove()
+        db.drop_all()
+
+
+@requires_postgres
+def test_search_tasks_postgres_pages_through_ties(postgres_app):
+    """Test GET /task/tasks/search on PostgreSQL keeps tied ranks across pages and ignores query syntax."""
+    app, user, headers = postgres_app
+    strong = Task(title='Quarterly report', description='Report on the reporting pipeline', user_id=user.id)
+    tied = [Task(title=f'Review {i}', description='Mentions the report once', user_id=user.id) for i in range(5)]
+    db.session.add_all([strong, *tied])
+    db.session.commit()
+    client = app.test_client()
+
+    ids = _all_pages(client, '/api/v1/task/tasks/search?q=reports&limit=2', headers)
+    assert ids[0] == str(strong.id)
+    assert sorted(ids[1:]) == sorted(str(task.id) for task in tied)
+
+    # "-" and "or" are words to ignore or match, never operators
+    ids = _all_pages(client, '/api/v1/task/tasks/search?q=quarterly+-report', headers)
+    assert ids == [str(strong.id)]
+    assert _all_pages(client, '/api/v1/task/tasks/search?q=quarterly+or+review', headers) == []
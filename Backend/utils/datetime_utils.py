@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the Utilities for parsing datetimes sent by clients.
+    Timestamps are stored as naive UTC, so aware values are converted to UTC
+    before their timezone is dropped.
+"""
+from datetime import datetime, timezone
+
+
+def parse_iso_datetime(value):
+    """
+        Parse an ISO 8601 datetime string into a naive UTC datetime
+        Arguments:
+            - value: The string to parse, e.g. '2025-01-31T09:00:00Z'
+        Returns:
+            - A naive datetime in UTC
+        Raises:
+            - ValueError if the value is not a valid ISO 8601 datetime
+    """
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the Utilities for the database connection pool.
+    It builds the SQLAlchemy engine options from the app config and keeps
+    live pool statistics (checked-out connections, overflow and the time
+    spent waiting for a connection) for the /api/v1/health/pool endpoint.
+"""
+import threading
+import time
+import weakref
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+class PoolStats:
+    """Thread-safe counters for one engine's connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checked_out = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        """Record the time one checkout waited for a connection."""
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def connection_out(self):
+        """Count a connection handed out by the pool."""
+        with self._lock:
+            self.checked_out += 1
+
+    def connection_in(self):
+        """Count a connection returned to the pool."""
+        with self._lock:
+            self.checked_out -= 1
+
+
+class TimedQueuePool(QueuePool):
+    """A QueuePool that records how long each checkout waits for a connection."""
+
+    stats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start, timed_out)
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep the counters
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+_engine_stats = weakref.WeakKeyDictionary()
+
+
+def build_engine_options(config):
+    """
+        Build SQLALCHEMY_ENGINE_OPTIONS from the DB_* config values
+        Arguments:
+            - config: The Flask app config
+        Returns:
+            - A dict of create_engine keyword arguments. Non-PostgreSQL
+              databases (SQLite in tests) keep Flask-SQLAlchemy's defaults.
+    """
+    uri = config.get('SQLALCHEMY_DATABASE_URI') or ''
+    if not uri.startswith('postgresql'):
+        return {}
+
+    if config.get('DB_PGBOUNCER'):
+        # pgbouncer owns the pooling: open a connection per checkout, and do not
+        # rely on session state such as server-side prepared statements or
+        # startup options, which transaction pooling does not preserve
+        options = {'poolclass': NullPool}
+        if uri.startswith('postgresql+psycopg://'):
+            options['connect_args'] = {'prepare_threshold': None}
+        return options
+
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': config.get('DB_POOL_SIZE', 10),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+    }
+    statement_timeout = config.get('DB_STATEMENT_TIMEOUT_MS')
+    if statement_timeout:
+        options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout)}'}
+    return options
+
+
+def instrument_engine(engine):
+    """
+        Start collecting pool statistics for an engine
+        Arguments:
+            - engine: The SQLAlchemy engine
+        Returns:
+            - The PoolStats collecting for the engine
+    """
+    if engine in _engine_stats:
+        return _engine_stats[engine]
+
+    stats = PoolStats()
+    _engine_stats[engine] = stats
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.stats = stats
+    event.listen(engine, 'checkout', lambda *args: stats.connection_out())
+    event.listen(engine, 'checkin', lambda *args: stats.connection_in())
+    return stats
+
+
+def pool_status(engine):
+    """
+        Report the live state of an engine's connection pool
+        Arguments:
+            - engine: The SQLAlchemy engine
+        Returns:
+            - A JSON-serializable dict
+    """
+    pool = engine.pool
+    stats = instrument_engine(engine)
+    status = {
+        'pool': type(pool).__name__,
+        'checked_out': stats.checked_out,
+        'size': None,
+        'checked_in': None,
+        'overflow': None,
+        'wait': None,
+    }
+    if isinstance(pool, QueuePool):
+        status['size'] = pool.size()
+        status['checked_in'] = pool.checkedin()
+        # overflow() counts from -size while the pool is not yet full
+        status['overflow'] = max(pool.overflow(), 0)
+    if isinstance(pool, TimedQueuePool):
+        status['wait'] = {
+            'checkouts': stats.checkouts,
+            'timeouts': stats.timeouts,
+            'avg_ms': round(stats.total_wait / stats.checkouts * 1000, 3) if stats.checkouts else 0.0,
+            'max_ms': round(stats.max_wait * 1000, 3),
+        }
+    return status
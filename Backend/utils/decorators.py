@@ -4,16 +4,19 @@
 """
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
-from flask_jwt_extended.exceptions import JWTDecodeError, NoAuthorizationError
-from models.user import User, UserRole
+from flask_jwt_extended import current_user, get_jwt, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import (
+    JWTDecodeError, NoAuthorizationError, RevokedTokenError, UserLookupError
+)
+from models.user import UserRole
 import logging
-import uuid
 
 def admin_required(fn):
     """
     Decorator to ensure the user has the 'admin' role.
-    Handles JWT and database errors gracefully.
+    The role is read from the token's claims, or from the already loaded user
+    for tokens issued without one, so no extra database lookup is needed.
+    Handles JWT errors gracefully.
     """
     @wraps(fn)
     def wrapper(*args, **kwargs):
@@ -27,25 +30,46 @@ def admin_required(fn):
         except JWTDecodeError:
             logging.warning("Admin access denied: Invalid JWT.")
             return jsonify(msg="Invalid or malformed token."), 401
+        except RevokedTokenError:
+            logging.warning("Admin access denied: Token issued before a role change.")
+            return jsonify(msg="Token has been revoked."), 401
+        except UserLookupError:
+            logging.warning("Admin access denied: Token user not found.")
+            return jsonify(msg="Admin access required."), 403
         except Exception as e:
             logging.error(f"Unexpected JWT verification error: {str(e)}")
             return jsonify(msg="Authentication error."), 500
 
-        try:
-            # Retrieve user from database
-            user_id = uuid.UUID(user_id)
-            user = User.get(id=user_id)
-            if not user:
-                logging.warning(f"Admin access denied: User {user_id} not found.")
-                return jsonify(msg="Admin access required."), 403
-        except Exception as e:
-            logging.error(f"Database error while fetching user {user_id}: {str(e)}")
-            return jsonify(msg="Error accessing user data."), 500
-
-        # Check if user has admin role
-        if user.role != UserRole.ADMIN:
-            logging.warning(f"Admin access denied for user {user_id} (Role: {user.role}).")
+        # Authorize from the role claim embedded at login; tokens issued before a
+        # role change are rejected as revoked when the user is loaded. Tokens
+        # issued before the claim existed fall back to the loaded user's role.
+        role = get_jwt().get('role')
+        if role is None and current_user is not None:
+            role = current_user.role.value
+        if role != UserRole.ADMIN.value:
+            logging.warning(f"Admin access denied for user {user_id} (Role: {role}).")
             return jsonify(msg="Admin access required."), 403
 
         return fn(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+def use_primary(fn):
+    """
+    Decorator for read-only routes that must not be served by the read replica,
+    e.g. when a client needs to see its own write from a previous request.
+    """
+    fn.use_primary = True
+    return fn
+
+
+def query_budget(max_queries):
+    """
+    Declare the most SQL statements one request to the view may run, including
+    the user lookup. Checked in debug and test runs (see utils/query_counter.py),
+    so an N+1 regression fails the tests instead of reaching production.
+    """
+    def decorator(fn):
+        fn.query_budget = max_queries
+        return fn
+    return decorator
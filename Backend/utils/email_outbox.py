@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the background sender of the email outbox.
+
+    Requests never talk to SMTP: `utils.email_utils.send_email` only inserts
+    an OutboxEmail row and wakes the sender. The sender claims due emails in
+    batches, delivers each batch over a single SMTP connection, and
+    reschedules failed emails with exponential backoff until
+    EMAIL_OUTBOX_MAX_ATTEMPTS, after which they are marked failed.
+
+    EMAIL_OUTBOX_WORKER=thread runs the sender on a daemon thread in each API
+    process. With EMAIL_OUTBOX_WORKER=off, run it as its own process instead:
+        python -m utils.email_outbox [--config production]
+    Claimed emails are leased for EMAIL_OUTBOX_CLAIM_TIMEOUT seconds, and on
+    PostgreSQL claims skip rows another sender has locked, so several senders
+    can drain the same outbox.
+"""
+import argparse
+import logging
+import os
+import random
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Message
+from models.base_model import db
+from models.email_outbox import EmailStatus, OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# SMTP errors about a single email. Every other SMTPException (they are all
+# OSErrors) and socket error means the connection itself is unusable.
+MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError, smtplib.SMTPNotSupportedError
+)
+
+
+class EmailOutboxSender:
+    """
+        Drains the email outbox
+        Arguments:
+            - app: The Flask app whose database and Flask-Mail settings are used
+            - batch_size: Emails claimed and sent per SMTP connection
+            - poll_interval: Seconds between polls when the outbox is idle
+            - max_attempts: Attempts before an email is marked failed
+            - backoff: Seconds before the first retry, doubled on each attempt
+            - backoff_max: Upper bound of the retry delay in seconds
+            - claim_timeout: Seconds a claimed email is hidden from other senders
+    """
+
+    def __init__(self, app, batch_size=50, poll_interval=5.0, max_attempts=5,
+                 backoff=30.0, backoff_max=3600.0, claim_timeout=300.0):
+        self.app = app
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.claim_timeout = claim_timeout
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def claim_batch(self):
+        """Lease the next batch of due emails to this sender."""
+        now = datetime.utcnow()
+        emails = (
+            OutboxEmail.query
+            .filter(OutboxEmail.status == EmailStatus.PENDING, OutboxEmail.next_attempt_at <= now)
+            .order_by(OutboxEmail.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        lease_until = now + timedelta(seconds=self.claim_timeout)
+        for email in emails:
+            email.next_attempt_at = lease_until
+        db.session.commit()
+        return emails
+
+    def retry_delay(self, attempts):
+        """Seconds before the next attempt, with jitter so retries do not arrive in bursts."""
+        delay = min(self.backoff_max, self.backoff * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _mark_sent(self, email):
+        email.status = EmailStatus.SENT
+        email.attempts += 1
+        email.sent_at = datetime.utcnow()
+        email.last_error = None
+        db.session.commit()
+
+    def _mark_failed_attempt(self, email, error):
+        email.attempts += 1
+        email.last_error = f"{type(error).__name__}: {error}"
+        if email.attempts >= self.max_attempts:
+            email.status = EmailStatus.FAILED
+            logger.error(f"Giving up on {email} after {email.attempts} attempts: {email.last_error}")
+        else:
+            email.next_attempt_at = datetime.utcnow() + timedelta(seconds=self.retry_delay(email.attempts))
+            logger.warning(f"Retrying {email} later (attempt {email.attempts}): {email.last_error}")
+        db.session.commit()
+
+    def _release(self, emails):
+        """Make claimed but unattempted emails due again."""
+        now = datetime.utcnow()
+        for email in emails:
+            email.next_attempt_at = now
+        db.session.commit()
+
+    def drain_once(self):
+        """
+            Claim one batch and deliver it over one SMTP connection
+            Returns:
+                - The number of emails claimed
+        """
+        with self.app.app_context():
+            emails = self.claim_batch()
+            if not emails:
+                return 0
+
+            mail = current_app.extensions['mail']
+            remaining = list(emails)
+            connection = mail.connect()
+            try:
+                connection.__enter__()
+            except OSError as error:
+                logger.warning(f"Could not connect to the mail server: {error}")
+                for email in remaining:
+                    self._mark_failed_attempt(email, error)
+                return len(emails)
+
+            try:
+                while remaining:
+                    email = remaining.pop(0)
+                    try:
+                        connection.send(Message(subject=email.subject, recipients=email.recipients,
+                                                body=email.body))
+                    except MESSAGE_ERRORS as error:
+                        self._mark_failed_attempt(email, error)
+                    except OSError as error:
+                        # The connection is gone; the rest of the batch waits for the next one
+                        self._mark_failed_attempt(email, error)
+                        self._release(remaining)
+                        remaining = []
+                        connection.host = None
+                    except Exception as error:
+                        self._mark_failed_attempt(email, error)
+                    else:
+                        self._mark_sent(email)
+            finally:
+                try:
+                    connection.__exit__(None, None, None)
+                except OSError:
+                    pass
+            logger.info(f"Email outbox: processed a batch of {len(emails)}")
+            return len(emails)
+
+    def run(self):
+        """Drain the outbox until stop() is called."""
+        while not self._stop.is_set():
+            try:
+                claimed = self.drain_once()
+            except Exception:
+                logger.exception("Email outbox sender failed; retrying after the poll interval")
+                claimed = 0
+            if claimed < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def start(self):
+        """Run the sender on a daemon thread of this process (again after a fork)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self.run, name='email-outbox', daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Deliver newly queued emails now instead of at the next poll."""
+        self._wake.set()
+
+    def join(self, timeout=None):
+        """Wait for the sender thread to exit."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stop(self, timeout=None):
+        """Stop the sender thread after its current batch."""
+        self._stop.set()
+        self._wake.set()
+        self.join(timeout)
+
+
+def init_email_outbox(app, start=None):
+    """
+        Create the app's outbox sender from the EMAIL_OUTBOX_* config
+        Arguments:
+            - start: Start the sender thread (default: EMAIL_OUTBOX_WORKER == 'thread')
+    """
+    sender = EmailOutboxSender(
+        app,
+        batch_size=app.config.get('EMAIL_OUTBOX_BATCH_SIZE', 50),
+        poll_interval=app.config.get('EMAIL_OUTBOX_POLL_INTERVAL', 5.0),
+        max_attempts=app.config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5),
+        backoff=app.config.get('EMAIL_OUTBOX_BACKOFF', 30.0),
+        claim_timeout=app.config.get('EMAIL_OUTBOX_CLAIM_TIMEOUT', 300.0)
+    )
+    app.extensions['email_outbox'] = sender
+    if start is None:
+        start = app.config.get('EMAIL_OUTBOX_WORKER', 'thread') == 'thread'
+    if start:
+        sender.start()
+    return sender
+
+
+def wake_email_sender():
+    """Wake the current app's sender thread, starting it if this process has none yet."""
+    sender = current_app.extensions.get('email_outbox')
+    if sender is None or current_app.config.get('EMAIL_OUTBOX_WORKER', 'thread') != 'thread':
+        return
+    sender.start()
+    sender.wake()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the email outbox sender")
+    parser.add_argument('--config', default='development', help='Config name from api.v1.config')
+    args = parser.parse_args()
+
+    from api.v1.app import create_app
+    app = create_app(config_name=args.config)
+    sender = app.extensions['email_outbox']
+    sender.start()  # No-op when EMAIL_OUTBOX_WORKER=thread already started it
+    logger.info("Email outbox sender running")
+    sender.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 #!/usr/bin/python3
 """
     This Module contains the Utilities for sending Emails.
+
+    Emails are queued in the outbox table and delivered by the background
+    sender in utils/email_outbox.py, so SMTP latency and outages never reach
+    the request that sends them.
 """
-from flask_mail import Message
+from models.base_model import db
+from models.email_outbox import OutboxEmail
+from utils.email_outbox import wake_email_sender
 import logging # Import logging
 
 # Get a logger for this module
@@ -10,22 +16,23 @@ logger = logging.getLogger(__name__)
 
 def send_email(subject, recipients, body):
     """
-        Send an email using Flask-Mail
+        Queue an email for delivery by the outbox sender
         Arguments:
             - subject: The subject of the Email
             - recipients: The list of recipients
             - body: The body of the Email
         Returns:
-            - Boolean indicating success or failure
+            - Boolean indicating whether the email was queued
     """
-    # Import mail instance here to avoid circular imports if mail is initialized in app.py
-    from api.v1.app import mail 
     try:
-        msg = Message(subject=subject, recipients=recipients, body=body)
-        mail.send(msg)
-        logger.info(f"Email sent successfully to {recipients} with subject '{subject}'")
-        return True
-    except Exception as e:
+        email = OutboxEmail(subject=subject, recipients=list(recipients), body=body)
+        db.session.add(email)
+        db.session.commit()
+    except Exception:
         # Use logger.exception to include stack trace for errors
-        logger.exception(f"Error sending email to {recipients} with subject '{subject}'") 
+        logger.exception(f"Error queueing email to {recipients} with subject '{subject}'")
+        db.session.rollback()
         return False
+    logger.info(f"Email queued for {recipients} with subject '{subject}'")
+    wake_email_sender()
+    return True
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the JSON provider used for API responses.
+    It encodes with orjson (a C-accelerated encoder) when it is installed and
+    falls back to the standard library otherwise. UUIDs, datetimes, timedeltas
+    and Enums are encoded natively by both paths; any other type Flask's
+    default provider knows (Decimal, dataclasses, __html__) is encoded as Flask
+    would.
+"""
+import enum
+import json
+import logging
+import uuid
+from datetime import date, timedelta
+from flask.json.provider import DefaultJSONProvider, _default as _flask_default
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _default(value):
+    """Encode the types the API returns that json cannot handle itself."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        # Matches the "H:MM:SS" format used by BaseModel.to_json
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    # Decimal, dataclasses, __html__; raises TypeError for anything else
+    return _flask_default(value)
+
+
+def _orjson_default(value):
+    """orjson handles UUID, datetime, Enum and dataclasses; timedelta and Flask's types are left."""
+    if isinstance(value, timedelta):
+        return str(value)
+    return _flask_default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+        Flask JSON provider that prefers orjson and falls back to the stdlib.
+        Set `use_orjson = False` (or JSON_USE_ORJSON=False in the config) to
+        force the stdlib encoder.
+    """
+    use_orjson = orjson is not None
+
+    def _orjson_options(self, pretty=False):
+        """Build the orjson option flags matching this provider's settings."""
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_SUBCLASS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj, pretty=False):
+        """Serialize obj to UTF-8 encoded JSON bytes."""
+        if self.use_orjson:
+            try:
+                return orjson.dumps(obj, default=_orjson_default,
+                                    option=self._orjson_options(pretty))
+            except TypeError as e:
+                # e.g. integers wider than 64 bits; the stdlib can encode them
+                logger.debug(f"orjson could not encode response, using stdlib: {e}")
+        return json.dumps(
+            obj, default=_default, sort_keys=self.sort_keys,
+            ensure_ascii=self.ensure_ascii,
+            indent=2 if pretty else None,
+            separators=None if pretty else (",", ":")
+        ).encode("utf-8")
+
+    def dumps(self, obj, **kwargs):
+        """Serialize obj to a JSON string."""
+        if kwargs:
+            kwargs.setdefault("default", _default)
+            kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+            kwargs.setdefault("sort_keys", self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        """Deserialize JSON from a string or bytes."""
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        """Build a JSON response without an intermediate str round-trip."""
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self.dumps_bytes(obj, pretty=pretty) + b"\n", mimetype=self.mimetype
+        )
@@ -2,21 +2,252 @@
 """
     This Module contains the Utilities for setting up logging.
     It configures a logger to log messages to both the console and a rotating file.
-    The file handler rotates the log files when they reach a certain size.
+
+    Request threads never write logs themselves: the root logger has a single
+    QueueHandler, and one QueueListener thread per process formats and writes
+    the records to the console and the file. When the queue is full, records
+    are dropped (and counted) rather than blocking the request.
+
+    The file handler rotates the log files when they reach a certain size. The
+    check and the rotation happen under an exclusive lock on "<log_file>.lock",
+    so several worker processes can share one log file without corrupting it.
 """
+import json
 import logging
-from logging.handlers import RotatingFileHandler
 import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows; rotation is then per process
+    fcntl = None
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+FILE_FORMAT = TEXT_FORMAT + ' [in %(pathname)s:%(lineno)d]'
+
+# The QueueHandler installed by the last setup_logging call
+_queue_handler = None
+# The QueueHandlers of the loggers set up by setup_file_logger, by logger name
+_file_logger_handlers = {}
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """Format each record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'location': f"{record.pathname}:{record.lineno}",
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+        Keep only a fraction of the records below WARNING from chosen loggers
+        Arguments:
+            - rates: {logger name: fraction kept}, applied to the logger and its children
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        # Most specific names first
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(name + '.'):
+                return random.random() < rate
+        return True
+
 
+class LockedRotatingFileHandler(RotatingFileHandler):
+    """
+        A RotatingFileHandler that is safe to share between processes: each
+        write takes an exclusive lock on "<filename>.lock", reopens the file if
+        another process rotated it, and rotates on the file's real size.
+    """
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding=None):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding)
+        self.lock_file = None
+        self.reopen_lock_file()
+
+    def reopen_lock_file(self):
+        """Open a private lock file; flock is shared by descriptors inherited over fork."""
+        if self.lock_file is not None:
+            self.lock_file.close()
+        self.lock_file = open(f"{self.baseFilename}.lock", 'a') if fcntl else None
+
+    def _reopen_if_rotated(self):
+        """Follow the log file if another process renamed it away."""
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            current = None
+        if self.stream is not None:
+            opened = os.fstat(self.stream.fileno())
+            if current is not None and (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino):
+                return
+            self.stream.close()
+        self.stream = self._open()
+
+    def shouldRollover(self, record):
+        if self.maxBytes <= 0:
+            return False
+        message = f"{self.format(record)}\n"
+        return self.stream.tell() + len(message.encode(self.encoding or 'utf-8')) >= self.maxBytes
+
+    def emit(self, record):
+        if self.lock_file is None:
+            return super().emit(record)
+        try:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+            try:
+                self._reopen_if_rotated()
+                self.stream.seek(0, os.SEEK_END)
+                if self.shouldRollover(record):
+                    self.doRollover()
+                logging.FileHandler.emit(self, record)
+            finally:
+                fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        super().close()
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
 
-def setup_logging(log_file="app.log"):
+
+class _LogListener(QueueListener):
+    """A QueueListener whose stop() waits for room in a full queue."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class AsyncLogHandler(QueueHandler):
+    """
+        Root handler that only enqueues records; a QueueListener thread hands
+        them to the real handlers
+        Arguments:
+            - handlers: The handlers the listener writes to
+            - queue_size: Records buffered before new ones are dropped
+    """
+
+    def __init__(self, handlers, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.handlers = handlers
+        self.dropped = 0
+        self.listener = None
+
+    def start(self):
+        """Start the writer thread."""
+        self.listener = _LogListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def restart_after_fork(self):
+        """The writer thread does not survive a fork; give the child its own."""
+        self.queue = queue.Queue(self.queue_size)
+        for handler in self.handlers:
+            if isinstance(handler, LockedRotatingFileHandler):
+                handler.reopen_lock_file()
+        self.start()
+
+    def prepare(self, record):
+        # Merge the message with its args now, as the args may change before
+        # the listener runs; formatting itself happens on the listener thread.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Wait until every queued record has been written."""
+        if self.listener is not None:
+            self.queue.join()
+            for handler in self.handlers:
+                handler.flush()
+
+    def close(self):
+        """Write the queued records, stop the writer thread and close the handlers."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+
+def _restart_in_child():
+    for handler in [_queue_handler, *_file_logger_handlers.values()]:
+        if handler is not None and handler.listener is not None:
+            handler.restart_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def parse_logger_settings(value, convert=str):
+    """
+        Parse "name=value,name2=value2" (or a dict) into {name: convert(value)}
+        Example: parse_logger_settings("sqlalchemy=WARNING,models=INFO")
+    """
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return {name: convert(setting) for name, setting in value.items()}
+    settings = {}
+    for item in value.split(','):
+        name, _, setting = item.strip().partition('=')
+        if name and setting:
+            settings[name.strip()] = convert(setting.strip())
+    return settings
+
+
+def setup_logging(log_file="app.log", level=logging.DEBUG, json_lines=False, levels=None,
+                  sampling=None, max_bytes=5 * 1024 * 1024, backup_count=3, queue_size=10000):
     """
     Configure logging for the application.
-    Logs will be written to both the console and a rotating file.
+    Logs will be written to both the console and a rotating file, by a
+    background thread.
 
     Arguments:
         log_file: This is the File to store all the Logs
+        level: The root level (the console never shows DEBUG)
+        json_lines: Write the file as JSON lines instead of text
+        levels: Per-logger levels, e.g. {"sqlalchemy.engine": "WARNING", "models": "DEBUG"}
+        sampling: Fraction of sub-WARNING records kept per logger, e.g. {"models": 0.1}
+        max_bytes, backup_count: Rotation of the log file
+        queue_size: Records buffered for the writer thread
     """
+    global _queue_handler
+
     # Validates the Log file exists else Create it
     log_dir = os.path.dirname(log_file) or "."
     if not os.path.exists(log_dir):
@@ -25,32 +256,80 @@ def setup_logging(log_file="app.log"):
 
     # Avoid adding handlers multiple times if called again (e.g., in tests)
     if logger.hasHandlers():
-        logger.handlers.clear()
-        
-    logger.setLevel(logging.DEBUG)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            if handler is _queue_handler:
+                handler.close()
+        _queue_handler = None
 
-    # Console handler
+    level = logging.getLevelName(level) if isinstance(level, str) else level
+    logger.setLevel(level)
+    for name, logger_level in parse_logger_settings(levels, str.upper).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    # Console handler. The handlers do not filter by the root level: a
+    # per-logger level may be more verbose than it (only the console drops DEBUG)
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    console_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    console_formatter = logging.Formatter(TEXT_FORMAT)
     console_handler.setFormatter(console_formatter)
 
     # File handler with rotation
     try:
-        file_handler = RotatingFileHandler(log_file, maxBytes=5 * 1024 * 1024, backupCount=3)
+        file_handler = LockedRotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
     except (PermissionError, OSError) as e:
         logging.error(f"Failed to create log file {log_file}: {str(e)}")
         raise
-    file_handler.setLevel(logging.DEBUG)
-    file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s [in %(pathname)s:%(lineno)d]')
+    file_handler.setLevel(logging.NOTSET)
+    file_formatter = JSONLinesFormatter() if json_lines else logging.Formatter(FILE_FORMAT)
     file_handler.setFormatter(file_formatter)
 
-    # Add handlers to the logger
+    # Add the queue handler to the logger
     try:
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
+        queue_handler = AsyncLogHandler([console_handler, file_handler], queue_size=queue_size)
+        rates = parse_logger_settings(sampling, float)
+        if rates:
+            queue_handler.addFilter(SamplingFilter(rates))
+        queue_handler.start()
+        logger.addHandler(queue_handler)
     except Exception as e:
         print(f"Failed to configure logging: {str(e)}", file=sys.stderr)
         raise
+    _queue_handler = queue_handler
 
     logging.info("Logging configured.")
+
+
+def setup_file_logger(name, log_file, json_lines=False, max_bytes=5 * 1024 * 1024, backup_count=3,
+                      queue_size=10000):
+    """
+    Send a logger's records to a file of their own instead of the app log,
+    written by its own background thread with the same shared rotation.
+
+    Arguments:
+        name: The logger, e.g. "utils.slow_query_log"
+        log_file: The file it writes to
+        json_lines, max_bytes, backup_count, queue_size: As for setup_logging
+    Returns:
+        The logger
+    """
+    log_dir = os.path.dirname(log_file) or "."
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    logger = logging.getLogger(name)
+
+    # Replace the handler of a previous call (e.g., in tests)
+    previous = _file_logger_handlers.pop(name, None)
+    if previous is not None:
+        logger.removeHandler(previous)
+        previous.close()
+
+    file_handler = LockedRotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
+    file_handler.setFormatter(JSONLinesFormatter() if json_lines else logging.Formatter(TEXT_FORMAT))
+    queue_handler = AsyncLogHandler([file_handler], queue_size=queue_size)
+    queue_handler.start()
+    logger.addHandler(queue_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _file_logger_handlers[name] = queue_handler
+    return logger
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the request and SQL metrics served at /api/v1/metrics.
+
+    Every request records its latency, status and the number and total time
+    of the SQL statements it ran (timed with the before/after_cursor_execute
+    events), labelled by blueprint and endpoint, so the blueprints eating the
+    capacity stand out.
+
+    Each process keeps its metrics in memory. With METRICS_DIR set, a
+    background thread writes them to "<METRICS_DIR>/metrics-<pid>.json" every
+    METRICS_FLUSH_INTERVAL seconds, and the endpoint sums the files of all
+    gunicorn workers. Empty the directory before starting the server, as
+    counters of exited workers are kept (like Prometheus multiprocess mode).
+"""
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from flask import g, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name: (type, help)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by blueprint, endpoint, method and status'),
+    'http_request_duration_seconds': ('histogram', 'Request latency by blueprint, endpoint and method'),
+    'db_queries_total': ('counter', 'SQL statements executed by requests'),
+    'db_query_duration_seconds_total': ('counter', 'Time requests spent executing SQL statements'),
+}
+
+
+class MetricsRegistry:
+    """
+        The metrics of one process
+        Arguments:
+            - buckets: Upper bounds of the latency histogram buckets, in seconds
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded (a forked child starts from zero)."""
+        with self._lock:
+            self.counters = {name: {} for name, (kind, _) in METRICS.items() if kind == 'counter'}
+            # labels: [bucket counts..., +Inf count, sum]
+            self.histograms = {name: {} for name, (kind, _) in METRICS.items() if kind == 'histogram'}
+            self.dirty = False
+
+    def observe_request(self, blueprint, endpoint, method, status, seconds, sql_count, sql_seconds):
+        """Record one finished request."""
+        route = (blueprint, endpoint)
+        with self._lock:
+            requests = self.counters['http_requests_total']
+            key = route + (method, str(status))
+            requests[key] = requests.get(key, 0) + 1
+
+            histogram = self.histograms['http_request_duration_seconds']
+            values = histogram.get(route + (method,))
+            if values is None:
+                values = histogram[route + (method,)] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    values[index] += 1
+            values[-2] += 1
+            values[-1] += seconds
+
+            queries = self.counters['db_queries_total']
+            queries[route] = queries.get(route, 0) + sql_count
+            sql_time = self.counters['db_query_duration_seconds_total']
+            sql_time[route] = sql_time.get(route, 0.0) + sql_seconds
+            self.dirty = True
+
+    def snapshot(self):
+        """A JSON-serializable copy of the metrics."""
+        with self._lock:
+            return {
+                'buckets': list(self.buckets),
+                'counters': {name: [[list(labels), value] for labels, value in series.items()]
+                             for name, series in self.counters.items()},
+                'histograms': {name: [[list(labels), list(values)] for labels, values in series.items()]
+                               for name, series in self.histograms.items()},
+            }
+
+
+def merge_snapshots(snapshots):
+    """Sum the snapshots of several processes into one."""
+    merged = {'buckets': list(LATENCY_BUCKETS), 'counters': {}, 'histograms': {}}
+    for snapshot in snapshots:
+        merged['buckets'] = snapshot.get('buckets', merged['buckets'])
+        for name, series in snapshot.get('counters', {}).items():
+            target = merged['counters'].setdefault(name, {})
+            for labels, value in series:
+                target[tuple(labels)] = target.get(tuple(labels), 0) + value
+        for name, series in snapshot.get('histograms', {}).items():
+            target = merged['histograms'].setdefault(name, {})
+            for labels, values in series:
+                current = target.get(tuple(labels))
+                target[tuple(labels)] = values if current is None else [a + b for a, b in zip(current, values)]
+    return merged
+
+
+LABEL_NAMES = {
+    'http_requests_total': ('blueprint', 'endpoint', 'method', 'status'),
+    'http_request_duration_seconds': ('blueprint', 'endpoint', 'method'),
+    'db_queries_total': ('blueprint', 'endpoint'),
+    'db_query_duration_seconds_total': ('blueprint', 'endpoint'),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def render_prometheus(merged):
+    """Render merged metrics in the Prometheus text exposition format."""
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        names = LABEL_NAMES[name]
+        if kind == 'counter':
+            for labels, value in sorted(merged['counters'].get(name, {}).items()):
+                lines.append(f"{name}{_labels(names, labels)} {value}")
+        else:
+            for labels, values in sorted(merged['histograms'].get(name, {}).items()):
+                for bound, count in zip(merged['buckets'], values):
+                    lines.append(f"{name}_bucket{_labels(names, labels, {'le': bound})} {count}")
+                lines.append(f"{name}_bucket{_labels(names, labels, {'le': '+Inf'})} {values[-2]}")
+                lines.append(f"{name}_sum{_labels(names, labels)} {values[-1]}")
+                lines.append(f"{name}_count{_labels(names, labels)} {values[-2]}")
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsExporter:
+    """
+        Writes this process's metrics to the shared METRICS_DIR and reads
+        the metrics of every process back
+        Arguments:
+            - registry: The MetricsRegistry of this process
+            - directory: The directory shared by the workers, or None
+            - interval: Seconds between writes
+    """
+
+    def __init__(self, registry, directory=None, interval=5.0):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+
+    def write(self):
+        """Atomically write this process's snapshot."""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.registry.dirty = False
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as output:
+            json.dump(self.registry.snapshot(), output)
+        os.replace(tmp_path, self.path)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if self.registry.dirty:
+                try:
+                    self.write()
+                except OSError:
+                    logger.exception("Could not write the metrics of this worker")
+
+    def ensure_started(self):
+        """Start the writer thread in this process (again after a fork, with fresh metrics)."""
+        if not self.directory or (self._thread is not None and self._pid == os.getpid()):
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                self.registry.reset()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+            self._thread.start()
+
+    def collect(self):
+        """Merge the metrics of all workers, with this process's live values."""
+        if not self.directory:
+            return merge_snapshots([self.registry.snapshot()])
+        self.write()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            try:
+                with open(path) as metrics_file:
+                    snapshots.append(json.load(metrics_file))
+            except (OSError, ValueError):
+                logger.warning(f"Skipping unreadable metrics file {path}")
+        return merge_snapshots(snapshots)
+
+
+# The start time lives on the statement's execution context: after_cursor_execute
+# does not fire for a failing statement, so nothing may be left on the connection
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_metrics_start', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    sql = g.get('_metrics_sql') if g else None
+    if sql is not None:
+        sql[0] += 1
+        sql[1] += elapsed
+
+
+def instrument_sql(engine):
+    """Time every statement run on the engine into the current request's totals."""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def init_metrics(app, engines=()):
+    """
+        Record request and SQL metrics for the app
+        Arguments:
+            - app: The Flask app
+            - engines: The engines whose statements are timed
+        Returns:
+            - The MetricsExporter, also kept in app.extensions['metrics']
+    """
+    registry = MetricsRegistry()
+    exporter = MetricsExporter(
+        registry,
+        directory=app.config.get('METRICS_DIR'),
+        interval=app.config.get('METRICS_FLUSH_INTERVAL', 5.0)
+    )
+    app.extensions['metrics'] = exporter
+    for engine in engines:
+        instrument_sql(engine)
+
+    @app.before_request
+    def start_request_metrics():
+        g._metrics_start = time.perf_counter()
+        g._metrics_sql = [0, 0.0]
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.pop('_metrics_start', None)
+        sql = g.pop('_metrics_sql', None) or [0, 0.0]
+        if start is not None:
+            exporter.ensure_started()
+            registry.observe_request(
+                request.blueprint or '',
+                request.endpoint or 'unmatched',  # 404s would otherwise add a series per URL
+                request.method,
+                response.status_code,
+                time.perf_counter() - start,
+                sql[0],
+                sql[1]
+            )
+        return response
+
+    return exporter
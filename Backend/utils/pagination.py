@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the Utilities for keyset (cursor) pagination.
+    A cursor is an opaque, URL-safe token that encodes the sort key of the
+    last row a client has seen, so the next page can be fetched with an
+    indexed range condition instead of an OFFSET scan.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from sqlalchemy import and_, or_, tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(sort_value, row_id):
+    """
+        Encode the (sort value, id) sort key of a row into a cursor
+        Arguments:
+            - sort_value: The datetime (or number, e.g. a search rank) the rows
+              are ordered by; may be None
+            - row_id: The UUID primary key of the row
+        Returns:
+            - A URL-safe string
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, str(row_id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+        Decode a cursor produced by encode_cursor
+        Arguments:
+            - cursor: The cursor string sent by the client
+        Returns:
+            - A (datetime, number or None, UUID) tuple
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(sort_value, str):
+            sort_value = datetime.fromisoformat(sort_value)
+        elif sort_value is not None and not isinstance(sort_value, (int, float)):
+            raise ValueError("Unexpected sort value")
+        return sort_value, uuid.UUID(row_id)
+    except Exception as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """
+        Parse the page size from a query string value
+        Arguments:
+            - value: The raw `limit` query parameter (may be None)
+        Returns:
+            - An int between 1 and maximum
+    """
+    if value is None:
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, maximum)
+
+
+def _after_cursor(sort_column, id_column, sort_value, row_id, descending, nullable):
+    """The condition selecting the rows after the cursor's (sort_value, id) in the sort order."""
+    after = tuple_(sort_column, id_column) < tuple_(sort_value, row_id) if descending \
+        else tuple_(sort_column, id_column) > tuple_(sort_value, row_id)
+    if not nullable:
+        return after
+    # NULLs sort as the largest values: last going up, first going down
+    if sort_value is None:
+        null_after = and_(sort_column.is_(None), id_column < row_id if descending else id_column > row_id)
+        return or_(null_after, sort_column.isnot(None)) if descending else null_after
+    return after if descending else or_(after, sort_column.is_(None))
+
+
+def paginate_keyset(query, model, limit, cursor=None, sort_column=None, descending=False, nullable=False):
+    """
+        Apply keyset pagination on (sort_column, id) to a query
+        Arguments:
+            - query: A SQLAlchemy query already filtered by its owner
+            - model: The model class being paginated
+            - limit: The page size
+            - cursor: The cursor returned with the previous page, if any
+            - sort_column: The datetime column to order by (default created_at)
+            - descending: Newest first
+            - nullable: The sort column has NULLs; they sort after every value
+              going up and before them going down, the order of a default
+              PostgreSQL btree index read either way
+        Returns:
+            - A (rows, next_cursor) tuple; next_cursor is None on the last page
+    """
+    if sort_column is None:
+        sort_column = model.created_at
+
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        if not isinstance(sort_value, datetime) and not (sort_value is None and nullable):
+            raise InvalidCursorError("Invalid cursor")
+        query = query.filter(_after_cursor(sort_column, model.id, sort_value, row_id, descending, nullable))
+
+    if descending:
+        order = [sort_column.desc().nulls_first() if nullable else sort_column.desc(), model.id.desc()]
+    else:
+        order = [sort_column.asc().nulls_last() if nullable else sort_column, model.id]
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(*order).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), last.id)
+    return rows, next_cursor
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the bounded pool used to hash and verify passwords.
+
+    Password hashing is deliberately CPU-expensive. Running it on a small,
+    bounded executor caps how many request threads can burn CPU on it at
+    once, so a burst of logins cannot starve the rest of the API. When every
+    worker is busy and the pending queue is full, new requests are rejected
+    immediately with PasswordHashingBusy (served as a 503) instead of
+    piling up behind the storm.
+
+    The hash parameters come from PASSWORD_HASH_METHOD (a werkzeug method
+    string such as "scrypt:32768:8:1" or "pbkdf2:sha256:600000"). Hashes made
+    with other parameters are upgraded on the next successful login. To pick
+    parameters for a machine, run
+        python -m utils.password_hashing recommend [--config production] [--target-ms 250]
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from flask import current_app, has_app_context
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_HASH_METHOD = 'scrypt'
+SCRYPT_DEFAULTS = (2 ** 15, 8, 1)
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the password hashing pool is saturated."""
+
+
+def normalize_method(method):
+    """
+        Expand a werkzeug hash method to the full form stored in its hashes
+        Arguments:
+            - method: e.g. "scrypt", "pbkdf2", "pbkdf2:sha512"
+        Returns:
+            - e.g. "scrypt:32768:8:1", "pbkdf2:sha256:1000000"
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else SCRYPT_DEFAULTS
+        return f"scrypt:{n}:{r}:{p}"
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Invalid hash method '{method}'")
+
+
+def needs_rehash(pwhash, method):
+    """Whether a stored hash was made with parameters other than `method`."""
+    return pwhash.split('$', 1)[0] != normalize_method(method)
+
+
+class PasswordHasher:
+    """
+        Bounded executor for password hashing
+        Arguments:
+            - workers: Hashes computed concurrently
+            - max_pending: Hashes allowed to wait for a worker
+            - queue_timeout: Seconds to wait for a free slot before rejecting
+            - executor: 'thread' (hashlib releases the GIL) or 'process'
+            - method: The werkzeug hash method new hashes are made with
+    """
+
+    def __init__(self, workers, max_pending, queue_timeout=0.0, executor='thread',
+                 method=DEFAULT_HASH_METHOD):
+        if executor not in ('thread', 'process'):
+            raise ValueError("executor must be 'thread' or 'process'")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.executor_type = executor
+        self.method = normalize_method(method)
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created on first use, i.e. after gunicorn has forked the worker
+        with self._lock:
+            if self._executor is None:
+                if self.executor_type == 'process':
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix='password-hash'
+                    )
+            return self._executor
+
+    def _run(self, fn, *args):
+        """Run fn on the pool and wait for it, or reject if the pool is full."""
+        if self.queue_timeout > 0:
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                self.rejected += 1
+            logger.warning("Password hashing pool saturated; rejecting request")
+            raise PasswordHashingBusy("Password hashing pool is saturated")
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _future: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        """Hash a password on the pool."""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        """Verify a password against its hash on the pool."""
+        return self._run(check_password_hash, pwhash, password)
+
+    def shutdown(self):
+        """Stop the executor, waiting for running hashes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+def init_password_hasher(app):
+    """
+        Create the app's password hasher from the PASSWORD_HASH_* config
+        PASSWORD_HASH_WORKERS=0 hashes inline in the request thread.
+    """
+    workers = app.config.get('PASSWORD_HASH_WORKERS')
+    if workers is None:
+        workers = min(4, os.cpu_count() or 1)
+    if workers <= 0:
+        app.extensions.pop('password_hasher', None)
+        return None
+    hasher = PasswordHasher(
+        workers=workers,
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 2 * workers),
+        queue_timeout=app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT', 0.0),
+        executor=app.config.get('PASSWORD_HASH_EXECUTOR', 'thread'),
+        method=hash_method(app)
+    )
+    app.extensions['password_hasher'] = hasher
+    return hasher
+
+
+def hash_method(app=None):
+    """The normalized PASSWORD_HASH_METHOD of the app (werkzeug's default outside one)."""
+    if app is None:
+        app = current_app if has_app_context() else None
+    method = app.config.get('PASSWORD_HASH_METHOD') if app is not None else None
+    return normalize_method(method or DEFAULT_HASH_METHOD)
+
+
+def _current_hasher():
+    """The app's hasher, or None outside an app or when hashing inline."""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('password_hasher')
+
+
+def hash_password(password):
+    """Hash a password, on the app's pool when there is one."""
+    hasher = _current_hasher()
+    if hasher is None:
+        return generate_password_hash(password, hash_method())
+    return hasher.hash(password)
+
+
+def verify_password(pwhash, password):
+    """Verify a password, on the app's pool when there is one."""
+    hasher = _current_hasher()
+    if hasher is None:
+        return check_password_hash(pwhash, password)
+    return hasher.verify(pwhash, password)
+
+
+def time_hash(method, rounds=3):
+    """Median milliseconds to verify one password hashed with `method`."""
+    pwhash = generate_password_hash('benchmark-password', method)
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        check_password_hash(pwhash, 'benchmark-password')
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+def recommend(target_ms, max_memory_mb=64):
+    """
+        Benchmark this machine and pick the strongest parameters whose verify
+        time stays within target_ms
+        Returns:
+            - A list of (method, verify ms) candidates, strongest scrypt and pbkdf2
+    """
+    candidates = []
+
+    # scrypt: the cost n must be a power of two; memory is 128 * n * r bytes
+    best = None
+    n = 2 ** 12
+    while 128 * n * 8 <= max_memory_mb * 1024 * 1024:
+        method = f"scrypt:{n}:8:1"
+        elapsed = time_hash(method)
+        if elapsed > target_ms:
+            break
+        best = (method, elapsed)
+        n *= 2
+    if best:
+        candidates.append(best)
+
+    # pbkdf2: time scales linearly with the iterations
+    sample = 100_000
+    per_iteration = time_hash(f"pbkdf2:sha256:{sample}") / sample
+    iterations = max(sample, int(target_ms / per_iteration) // 10_000 * 10_000)
+    method = f"pbkdf2:sha256:{iterations}"
+    candidates.append((method, time_hash(method)))
+    return candidates
+
+
+def main():
+    from api.v1.config import config_dict
+
+    parser = argparse.ArgumentParser(description="Recommend password hash parameters for this machine")
+    parser.add_argument('command', choices=['recommend'])
+    parser.add_argument('--config', default='development', help='Config name from api.v1.config')
+    parser.add_argument('--target-ms', type=float, default=None,
+                        help='Verify latency to aim for (default: the PASSWORD_HASH_TARGET_MS config)')
+    parser.add_argument('--max-memory-mb', type=int, default=64, help='Memory cap for scrypt')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help='PASSWORD_HASH_WORKERS, to estimate login throughput')
+    args = parser.parse_args()
+    config = config_dict[args.config]
+    target_ms = args.target_ms if args.target_ms is not None else config.PASSWORD_HASH_TARGET_MS
+
+    current = normalize_method(config.PASSWORD_HASH_METHOD or DEFAULT_HASH_METHOD)
+    current_ms = time_hash(current)
+    print(f"current  {current:<28} {current_ms:>8.1f} ms/verify  "
+          f"~{args.workers * 1000 / current_ms:.0f} logins/s per worker process")
+    for method, elapsed in recommend(target_ms, args.max_memory_mb):
+        print(f"candidate {method:<27} {elapsed:>8.1f} ms/verify  "
+              f"~{args.workers * 1000 / elapsed:.0f} logins/s per worker process")
+    print("\nSet PASSWORD_HASH_METHOD to a candidate; existing hashes are upgraded on login.")
+
+
+if __name__ == "__main__":
+    main()
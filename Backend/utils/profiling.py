@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the on-demand profiler of single requests.
+
+    With PROFILING_ENABLED, an admin can send a request with the
+    PROFILING_HEADER header (default "X-Profile") to profile just that request
+    in production. The profile is written under PROFILING_DIR (default
+    logs/profiles) and its file name is returned in the X-Profile-File
+    response header:
+        - "X-Profile: sample" samples the request thread's stack every
+          PROFILING_SAMPLE_INTERVAL_MS and writes collapsed stacks (.collapsed),
+          the input of flamegraph.pl and speedscope
+        - "X-Profile: cprofile" traces every call with cProfile and writes a
+          .prof file, for pstats or snakeviz
+    Any other value uses PROFILING_MODE. Sampling is the default as it barely
+    slows the request down; it needs sys._current_frames, and falls back to
+    cProfile without it.
+
+    When disabled, no hook is registered and requests pay nothing.
+"""
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import g, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from models.user import UserRole
+
+logger = logging.getLogger(__name__)
+
+MODES = ('sample', 'cprofile')
+
+
+def sampling_available():
+    return hasattr(sys, '_current_frames')
+
+
+class StackSampler:
+    """
+        Samples the stack of one thread from a background thread and counts
+        the distinct stacks
+        Arguments:
+            - thread_id: The thread to sample (threading.get_ident() of the request)
+            - interval: Seconds between samples
+    """
+    extension = 'collapsed'
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def frame_label(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def sample(self):
+        """Record the thread's current stack, outermost frame first."""
+        frame = sys._current_frames().get(self.thread_id)
+        labels = []
+        while frame is not None:
+            labels.append(self.frame_label(frame))
+            frame = frame.f_back
+        if labels:
+            self.stacks[';'.join(reversed(labels))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write(self, path):
+        """Write one "frame;frame;frame count" line per distinct stack."""
+        with open(path, 'w') as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f"{stack} {count}\n")
+
+
+class TracingProfiler:
+    """cProfile of the calling thread, written as a .prof file."""
+    extension = 'prof'
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, path):
+        self.profile.dump_stats(path)
+
+
+def requested_mode(value, default):
+    """The profiler asked for by the header value, else the default (sampling only where supported)."""
+    mode = value.strip().lower() if value and value.strip().lower() in MODES else default
+    if mode == 'sample' and not sampling_available():
+        return 'cprofile'
+    return mode
+
+
+def is_admin_request():
+    """Whether the request carries a valid admin token (no error when it does not)."""
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt().get('role') == UserRole.ADMIN.value
+    except Exception:
+        return False
+
+
+def profile_path(directory, extension):
+    """A unique file name telling when, which route and which worker."""
+    endpoint = (request.endpoint or 'unmatched').replace('.', '-')
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    return os.path.join(directory, f"{stamp}-{request.method}-{endpoint}-{os.getpid()}.{extension}")
+
+
+def init_profiling(app):
+    """
+        Profile the requests of admins that ask for it with the PROFILING_HEADER
+        header. Does nothing unless PROFILING_ENABLED.
+        Returns:
+            - Whether the hooks were registered
+    """
+    if not app.config.get('PROFILING_ENABLED', False):
+        return False
+
+    header = app.config.get('PROFILING_HEADER', 'X-Profile')
+    directory = app.config.get('PROFILING_DIR', 'logs/profiles')
+    default_mode = app.config.get('PROFILING_MODE', 'sample')
+    interval = app.config.get('PROFILING_SAMPLE_INTERVAL_MS', 2) / 1000
+
+    @app.before_request
+    def start_profiler():
+        value = request.headers.get(header)
+        if not value or not is_admin_request():
+            return
+        if requested_mode(value, default_mode) == 'sample':
+            profiler = StackSampler(threading.get_ident(), interval)
+        else:
+            profiler = TracingProfiler()
+        try:
+            profiler.start()
+        except ValueError as e:
+            # Another profiler (e.g. a debugger) is already tracing this thread
+            logger.warning(f"Could not profile {request.method} {request.path}: {e}")
+            return
+        g._profiler = (profiler, time.perf_counter())
+
+    @app.after_request
+    def write_profile(response):
+        started = g.pop('_profiler', None)
+        if started is None:
+            return response
+        profiler, start = started
+        profiler.stop()
+        path = profile_path(directory, profiler.extension)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            profiler.write(path)
+        except OSError:
+            logger.exception(f"Could not write the profile of {request.method} {request.path}")
+            return response
+        logger.info(f"Profiled {request.method} {request.path} "
+                    f"({(time.perf_counter() - start) * 1000:.1f} ms) into {path}")
+        response.headers['X-Profile-File'] = os.path.basename(path)
+        return response
+
+    @app.teardown_request
+    def stop_profiler(_error):
+        # A request that failed before after_request still stops its profiler
+        started = g.pop('_profiler', None)
+        if started is not None:
+            started[0].stop()
+
+    return True
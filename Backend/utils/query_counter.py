@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the Utilities for counting the SQL statements run by
+    a block of code or by a request.
+
+    `count_queries` and `assert_max_queries` count the statements of a `with`
+    block. Views declare the statements a request may run with
+    utils.decorators.query_budget; `init_query_checks` reports requests over
+    their budget (tests/conftest.py fails the test) and, in debug mode, warns
+    when a request runs the same statement over and over, the signature of an
+    N+1 query.
+"""
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request
+from sqlalchemy import event
+from models.base_model import db
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block runs more SQL statements than its budget."""
+
+
+class QueryCounter:
+    """
+        Records the statements run on the engines while it is active
+        Arguments:
+            - engines: The engines to listen on
+    """
+
+    def __init__(self, engines):
+        self.engines = engines
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        for engine in self.engines:
+            event.remove(engine, 'before_cursor_execute', self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeated(self, threshold=2):
+        """The statements run at least `threshold` times, with their counts."""
+        return {statement: count for statement, count in Counter(self.statements).items() if count >= threshold}
+
+
+def format_statements(statements):
+    """Number the statements for an error message."""
+    return "\n".join(f"  {index}. {statement}" for index, statement in enumerate(statements, 1))
+
+
+def count_queries(*engines):
+    """
+        Count the SQL statements run inside a `with` block
+        Example:
+            with count_queries() as queries:
+                ...
+            assert queries.count == 2
+    """
+    return QueryCounter(engines or (db.engine,))
+
+
+@contextmanager
+def assert_max_queries(budget, *engines):
+    """Raise QueryBudgetExceeded when the block runs more than `budget` statements."""
+    with count_queries(*engines) as queries:
+        yield queries
+    if queries.count > budget:
+        raise QueryBudgetExceeded(
+            f"Expected at most {budget} queries, ran {queries.count}:\n{format_statements(queries.statements)}"
+        )
+
+
+class QueryChecks:
+    """The budget violations seen since the last reset (read by the tests)."""
+
+    def __init__(self, repeat_threshold):
+        self.repeat_threshold = repeat_threshold
+        self.violations = []
+
+
+def _record_request_statement(conn, cursor, statement, parameters, context, executemany):
+    statements = g.get('_query_statements') if g else None
+    if statements is not None:
+        statements.append(statement)
+
+
+def init_query_checks(app, engines=()):
+    """
+        Check every request against its view's query_budget and, in debug mode,
+        warn about repeated statements. Enabled by QUERY_CHECKS_ENABLED, which
+        defaults to the debug and testing modes.
+        Returns:
+            - The QueryChecks kept in app.extensions['query_checks'], or None
+    """
+    enabled = app.config.get('QUERY_CHECKS_ENABLED')
+    if enabled is None:
+        enabled = app.debug or app.testing
+    if not enabled:
+        return None
+
+    checks = QueryChecks(app.config.get('QUERY_REPEAT_THRESHOLD', 3))
+    app.extensions['query_checks'] = checks
+    for engine in engines:
+        if not event.contains(engine, 'before_cursor_execute', _record_request_statement):
+            event.listen(engine, 'before_cursor_execute', _record_request_statement)
+
+    @app.before_request
+    def start_query_checks():
+        g._query_statements = []
+
+    @app.after_request
+    def finish_query_checks(response):
+        statements = g.pop('_query_statements', None)
+        if statements is None:
+            return response
+
+        view = app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        if budget is not None and len(statements) > budget:
+            message = (f"{request.method} {request.path} ({request.endpoint}) ran {len(statements)} "
+                       f"queries, over its budget of {budget}:\n{format_statements(statements)}")
+            logger.error(message)
+            checks.violations.append(message)
+
+        if app.debug:
+            for statement, count in Counter(statements).items():
+                if count >= checks.repeat_threshold:
+                    logger.warning(f"Possible N+1 query: {request.method} {request.path} ran this "
+                                   f"statement {count} times: {statement}")
+        return response
+
+    return checks
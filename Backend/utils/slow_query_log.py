@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the slow-query log.
+
+    Every statement is timed with the before/after_cursor_execute engine
+    events. Statements slower than SLOW_QUERY_THRESHOLD_MS are written to
+    SLOW_QUERY_LOG_FILE (default logs/slow_queries.log, apart from the app
+    log) with:
+        - the duration and the statement
+        - the shape of its bound parameters (types, never the values)
+        - the route (or thread) that ran it
+        - its plan: EXPLAIN on PostgreSQL, EXPLAIN QUERY PLAN on SQLite.
+          A SLOW_QUERY_ANALYZE_RATE fraction of slow SELECTs get EXPLAIN
+          ANALYZE instead, which runs the query again.
+    Plans reading a whole table are flagged "[full scan]".
+
+    The plan is read on the statement's own connection, inside a savepoint
+    on PostgreSQL so that a failing EXPLAIN cannot abort the transaction.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from flask import has_request_context, request
+from sqlalchemy import event
+from utils.logging_utils import setup_file_logger
+
+logger = logging.getLogger(__name__)
+
+EXPLAINABLE = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b', re.IGNORECASE)
+# PostgreSQL "Seq Scan on tasks"; SQLite "SCAN tasks" (an index is "SEARCH" or "SCAN ... USING")
+FULL_SCAN = re.compile(r'\bSeq Scan on\b|^\s*SCAN (?!.*\bUSING\b)', re.MULTILINE)
+
+
+def parameter_shape(parameters):
+    """The types of the bound parameters, without their values."""
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def request_origin():
+    """The route running the statement, or the thread outside requests."""
+    if has_request_context():
+        return f"{request.method} {request.path} ({request.endpoint or 'unmatched'})"
+    return f"thread {threading.current_thread().name}"
+
+
+class SlowQueryLog:
+    """
+        Times the statements of engines and logs the slow ones with their plan
+        Arguments:
+            - threshold_ms: Statements at least this slow are logged
+            - analyze_rate: Fraction of slow SELECTs explained with EXPLAIN ANALYZE
+    """
+
+    def __init__(self, threshold_ms=500, analyze_rate=0.0):
+        self.threshold = threshold_ms / 1000
+        self.analyze_rate = analyze_rate
+        self.logged = 0
+
+    def install(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def remove(self, engine):
+        event.remove(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.remove(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    # The start time lives on the statement's execution context, not on the
+    # connection: after_cursor_execute does not fire for a failing statement,
+    # and a context is dropped with its statement
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, '_slow_query_start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        if elapsed < self.threshold:
+            return
+        try:
+            self.log(conn.dialect.name, cursor.connection, statement, parameters, executemany, elapsed)
+        except Exception:
+            # Never fail the query because of its log entry
+            logger.exception("Could not log a slow query")
+
+    def explain(self, dialect, dbapi_connection, statement, parameters, analyze=False):
+        """Return the plan of the statement as text, on the statement's connection."""
+        if dialect == 'postgresql':
+            prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+        elif dialect == 'sqlite':
+            prefix = "EXPLAIN QUERY PLAN "
+        else:
+            prefix = "EXPLAIN "
+
+        # A raw cursor: the plan query is not itself timed or counted
+        cursor = dbapi_connection.cursor()
+        savepoint = dialect == 'postgresql'
+        try:
+            if savepoint:
+                cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(prefix + statement, parameters)
+                rows = cursor.fetchall()
+            except Exception:
+                if savepoint:
+                    cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        finally:
+            cursor.close()
+
+        if dialect == 'sqlite':
+            # (id, parent, notused, detail): indent each step under its parent
+            depth = {0: -1}
+            lines = []
+            for row in rows:
+                depth[row[0]] = depth.get(row[1], -1) + 1
+                lines.append("  " * depth[row[0]] + str(row[3]))
+            return "\n".join(lines)
+        return "\n".join(str(row[0]) for row in rows)
+
+    def log(self, dialect, dbapi_connection, statement, parameters, executemany, elapsed):
+        """Write one slow statement, with its plan when it can be explained."""
+        if executemany:
+            shape = f"{len(parameters)} x {parameter_shape(parameters[0]) if parameters else None}"
+        else:
+            shape = parameter_shape(parameters)
+
+        plan_label, plan = "plan", None
+        if not executemany and EXPLAINABLE.match(statement):
+            analyze = (dialect == 'postgresql' and statement.lstrip()[:6].upper() == 'SELECT'
+                       and random.random() < self.analyze_rate)
+            plan_label = "EXPLAIN ANALYZE" if analyze else "plan"
+            try:
+                plan = self.explain(dialect, dbapi_connection, statement, parameters, analyze)
+            except Exception as e:
+                plan = f"(EXPLAIN failed: {e})"
+
+        flag = " [full scan]" if plan and FULL_SCAN.search(plan) else ""
+        self.logged += 1
+        plan_text = "\n    ".join(plan.splitlines()) if plan else "(not explained)"
+        logger.warning(
+            f"Slow query{flag}: {elapsed * 1000:.1f} ms in {request_origin()}\n"
+            f"  statement: {' '.join(statement.split())}\n"
+            f"  parameters: {shape}\n"
+            f"  {plan_label}:\n    {plan_text}"
+        )
+
+
+def init_slow_query_log(app, engines=()):
+    """
+        Log the statements of the engines slower than SLOW_QUERY_THRESHOLD_MS
+        to SLOW_QUERY_LOG_FILE. Disabled when SLOW_QUERY_LOG_ENABLED is false.
+        Returns:
+            - The SlowQueryLog kept in app.extensions['slow_query_log'], or None
+    """
+    if not app.config.get('SLOW_QUERY_LOG_ENABLED', True):
+        return None
+
+    setup_file_logger(
+        __name__,
+        app.config.get('SLOW_QUERY_LOG_FILE', 'logs/slow_queries.log'),
+        json_lines=app.config.get('LOG_JSON', False),
+        max_bytes=app.config.get('LOG_MAX_BYTES', 5 * 1024 * 1024),
+        backup_count=app.config.get('LOG_BACKUP_COUNT', 3)
+    )
+    slow_queries = SlowQueryLog(
+        threshold_ms=app.config.get('SLOW_QUERY_THRESHOLD_MS', 500),
+        analyze_rate=app.config.get('SLOW_QUERY_ANALYZE_RATE', 0.0)
+    )
+    app.extensions['slow_query_log'] = slow_queries
+    for engine in engines:
+        slow_queries.install(engine)
+    return slow_queries
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the Utilities for the Swagger (OpenAPI) documentation.
+
+    Views describe themselves with `swag_from`, which only attaches the spec
+    dict to the view function, so importing the views does not import flasgger.
+    flasgger is imported by `init_api_docs` only when API_DOCS_ENABLED is set;
+    the generated spec is cached in API_DOCS_SPEC_FILE, either at build time with
+        python -m utils.swagger build [--config development] [--output path]
+    or on the first request to /apispec_1.json.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def swag_from(specs):
+    """
+        Attach an OpenAPI spec dict to a view, the way flasgger.swag_from does
+        (flasgger reads it from the `specs_dict` attribute)
+        Arguments:
+            - specs: The spec dict of the view
+    """
+    def decorator(function):
+        function.specs_dict = specs
+        return function
+    return decorator
+
+
+def spec_fingerprint(app, endpoint='apispec_1'):
+    """
+        Hash the inputs of a generated spec: its endpoint, the swagger
+        template and config, and every route with its spec dict
+        Returns:
+            - A hex digest that changes whenever the spec would change
+    """
+    routes = sorted(
+        (rule.rule, sorted(rule.methods), getattr(app.view_functions[rule.endpoint], 'specs_dict', None))
+        for rule in app.url_map.iter_rules()
+    )
+    payload = [endpoint, app.config.get('SWAGGER'), app.extensions.get('api_docs_template'), routes]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def read_cached_spec(path, fingerprint):
+    """Return the spec cached in path if it was built from the same inputs, else None."""
+    try:
+        with open(path) as cache:
+            cached = json.load(cache)
+    except (OSError, ValueError):
+        return None
+    if cached.get('fingerprint') != fingerprint:
+        return None
+    return cached.get('spec')
+
+
+def write_cached_spec(path, fingerprint, spec):
+    """Atomically write the spec cache, so concurrent workers never read a partial file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as cache:
+        json.dump({'fingerprint': fingerprint, 'spec': spec}, cache)
+    os.replace(tmp_path, path)
+
+
+def spec_cache_path(app):
+    """Return the configured spec cache file, or None to keep the spec in memory only."""
+    path = app.config.get('API_DOCS_SPEC_FILE')
+    if path and not os.path.isabs(path):
+        path = os.path.join(app.instance_path, path)
+    return path
+
+
+def init_api_docs(app, template):
+    """
+        Set up the Swagger UI and spec routes when API_DOCS_ENABLED is set
+        Arguments:
+            - app: The Flask app
+            - template: The base swagger template
+        Returns:
+            - The flasgger Swagger instance, or None when the docs are disabled
+    """
+    if not app.config.get('API_DOCS_ENABLED', True):
+        return None
+
+    # Imported here so workers serving without docs never load flasgger
+    from utils.swagger_ui import CachedSwagger
+
+    app.extensions['api_docs_template'] = template
+    return CachedSwagger(app, template=template)
+
+
+def build_spec(app, output=None):
+    """
+        Generate the spec and write it to the cache file
+        Arguments:
+            - app: A Flask app created with API_DOCS_ENABLED
+            - output: The file to write (default API_DOCS_SPEC_FILE)
+        Returns:
+            - The path written
+    """
+    swagger = app.extensions.get('api_docs')
+    if swagger is None:
+        raise RuntimeError("API docs are disabled; set API_DOCS_ENABLED=True to build the spec")
+    path = output or spec_cache_path(app)
+    if not path:
+        raise RuntimeError("No output file; pass --output or set API_DOCS_SPEC_FILE")
+    with app.test_request_context():
+        spec = swagger.generate_spec()
+    write_cached_spec(path, spec_fingerprint(app), spec)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the cached OpenAPI spec")
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('--config', default='development', help='Config name from api.v1.config')
+    parser.add_argument('--output', help='File to write (default API_DOCS_SPEC_FILE)')
+    args = parser.parse_args()
+
+    from api.v1.app import create_app
+    app = create_app(config_name=args.config)
+    print(f"Wrote {build_spec(app, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
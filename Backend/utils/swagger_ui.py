@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+    This Module contains the flasgger integration for the Swagger UI.
+    It is only imported when the API docs are enabled (see utils/swagger.py).
+"""
+import logging
+from flasgger import Swagger
+from utils.swagger import read_cached_spec, spec_cache_path, spec_fingerprint, write_cached_spec
+
+logger = logging.getLogger(__name__)
+
+
+class CachedSwagger(Swagger):
+    """
+        Swagger that builds each spec once per process and persists it in
+        API_DOCS_SPEC_FILE, so workers reuse a spec built at build time or by
+        the first worker that served /apispec_1.json. Debug mode always
+        regenerates, as flasgger does.
+    """
+
+    def init_app(self, app, decorators=None):
+        super().init_app(app, decorators=decorators)
+        app.extensions['api_docs'] = self
+
+    def generate_spec(self, endpoint='apispec_1'):
+        """Generate a spec from the routes, bypassing every cache."""
+        self.apispecs.pop(endpoint, None)
+        return super().get_apispecs(endpoint)
+
+    def get_apispecs(self, endpoint='apispec_1'):
+        if self.app.debug:
+            return super().get_apispecs(endpoint)
+        if endpoint in self.apispecs:
+            return self.apispecs[endpoint]
+
+        path = spec_cache_path(self.app)
+        fingerprint = spec_fingerprint(self.app, endpoint)
+        spec = read_cached_spec(path, fingerprint) if path else None
+        if spec is None:
+            spec = super().get_apispecs(endpoint)
+            if path:
+                try:
+                    write_cached_spec(path, fingerprint, spec)
+                except OSError as e:
+                    logger.warning(f"Could not cache the API spec in {path}: {e}")
+        self.apispecs[endpoint] = spec
+        return spec